@@ -0,0 +1,155 @@
+"""
+基于 SQLite 的持久化响应缓存。
+
+用于缓存 Semantic Scholar 等外部 API 的响应：同一请求再次运行时直接读本地，
+避免重复付出请求间隔与限流成本。每条记录带独立 TTL，过期后视为未命中。
+
+用法：
+  from api_cache import configure_s2_cache, get_s2_cache
+  configure_s2_cache(cache_dir=".cache")      # 或 enabled=False 关闭缓存
+  cache = get_s2_cache()
+  hit, value = cache.get(key)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# 默认缓存目录（与脚本同目录）
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# S2 各类响应的默认 TTL（秒）：论文元数据基本不变，引用/被引列表会增长
+S2_PAPER_TTL = 30 * 24 * 3600
+S2_RELATIONS_TTL = 7 * 24 * 3600
+S2_NOT_FOUND_TTL = 24 * 3600
+
+
+class SQLiteCache:
+    """
+    键值缓存：key -> JSON 值，附带过期时间与命中/未命中计数。
+    值为 None 也会被缓存（用于记录 404 等“确定不存在”的结果）。
+    """
+
+    def __init__(self, path, default_ttl=S2_PAPER_TTL):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """返回 (是否命中, 值)。过期记录视为未命中。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < time.time():
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        """写入一条记录；ttl 为空时使用 default_ttl。"""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + ttl),
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """清空全部记录。"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def purge_expired(self):
+        """删除已过期记录，返回删除条数。"""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            return cur.rowcount
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def normalize_s2_url(url):
+    """
+    规范化 S2 请求 URL 作为缓存键：
+    - 去掉协议与主机之外的差异（主机小写）；
+    - 查询参数按名称排序；
+    - fields 内的字段去重并排序（字段顺序不同视为同一请求）。
+    """
+    parts = urlsplit(url)
+    params = []
+    for k, v in parse_qsl(parts.query, keep_blank_values=True):
+        if k == "fields":
+            v = ",".join(sorted({f.strip() for f in v.split(",") if f.strip()}))
+        params.append((k, v))
+    params.sort()
+    query = urlencode(params, safe=",:")
+    return f"{parts.netloc.lower()}{parts.path}" + (f"?{query}" if query else "")
+
+
+# ---------- 进程内共享的 S2 缓存 ----------
+
+_s2_cache = None
+_s2_cache_enabled = True
+_s2_cache_dir = DEFAULT_CACHE_DIR
+
+
+def configure_s2_cache(cache_dir=None, enabled=True):
+    """设置 S2 缓存目录与开关；需在首次请求前调用。"""
+    global _s2_cache, _s2_cache_enabled, _s2_cache_dir
+    if _s2_cache is not None:
+        _s2_cache.close()
+        _s2_cache = None
+    _s2_cache_enabled = enabled
+    _s2_cache_dir = cache_dir or DEFAULT_CACHE_DIR
+
+
+def get_s2_cache():
+    """返回共享的 S2 缓存；已通过 --no-cache 关闭时返回 None。"""
+    global _s2_cache
+    if not _s2_cache_enabled:
+        return None
+    if _s2_cache is None:
+        _s2_cache = SQLiteCache(os.path.join(_s2_cache_dir, "s2_responses.sqlite"))
+    return _s2_cache
+
+
+def print_s2_cache_stats():
+    """打印本次运行的 S2 缓存命中情况。"""
+    if _s2_cache is None:
+        return
+    s = _s2_cache.stats()
+    print(f"[*] [S2 缓存] 命中 {s['hits']} 次, 未命中 {s['misses']} 次, 命中率 {s['hit_rate']:.0%}")
@@ -1,17 +1,27 @@
+import argparse
+import heapq
 import json
 import os
-import sys
-from openai import OpenAI
 
-from config import API_KEY, BASE_URL, MODEL_NAME, is_api_configured
+from config import is_api_configured
+from kg_stream import StreamSection, is_kg_stream, open_kg
+from llm_client import chat_completion
+from llm_metrics import report_llm_metrics
+from text_utils import overlap_tokens
 
 INPUT_FILE = "result.json"  # 默认图谱文件，可通过命令行参数覆盖
+# 提示词中最多放入的三元组事实数：未设置时普通 JSON 图谱放入全部事实，
+# 流式图谱（.kg.jsonl）按 STREAM_QA_MAX_FACTS 只取与问题最相关的部分；设为 0 表示不限
+QA_MAX_FACTS = int(os.environ["QA_MAX_FACTS"]) if os.environ.get("QA_MAX_FACTS") else None
+STREAM_QA_MAX_FACTS = 300
 
 def load_knowledge_graph(path=None):
-    """加载知识图谱 JSON，path 为空时使用 INPUT_FILE。"""
+    """加载知识图谱 JSON，path 为空时使用 INPUT_FILE；流式图谱（.kg.jsonl）只读清单，三元组在提问时逐条读取。"""
     path = path or INPUT_FILE
     if not os.path.exists(path):
         return None
+    if is_kg_stream(path):
+        return open_kg(path)
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
@@ -37,25 +47,53 @@ def _triple_to_fact(triple):
     return f"{head} 的 {rel} 是 {tail}。" if rel else None
 
 
-def graph_rag_qa(user_query, kg_data):
+def select_facts(user_query, triples, limit=None):
+    """
+    三元组 -> 事实列表，返回 (事实列表, 事实总数)。limit 为空或 <= 0 时按原顺序返回全部事实；
+    否则逐条遍历，保留与问题重合度最高的 limit 条（堆大小固定，内存不随图谱增长），按原顺序返回。
+    """
+    if not limit or limit <= 0:
+        facts = [fact for fact in map(_triple_to_fact, triples) if fact]
+        return facts, len(facts)
+    words = overlap_tokens(user_query)
+    kept = []  # (重合度, -序号, 事实) 小顶堆
+    total = 0
+    for i, triple in enumerate(triples):
+        fact = _triple_to_fact(triple)
+        if not fact:
+            continue
+        total += 1
+        item = (len(words & overlap_tokens(fact)) if words else 0, -i, fact)
+        if len(kept) < limit:
+            heapq.heappush(kept, item)
+        elif item > kept[0]:
+            heapq.heapreplace(kept, item)
+    return [fact for _, _, fact in sorted(kept, key=lambda x: -x[1])], total
+
+
+def graph_rag_qa(user_query, kg_data, max_facts=None):
     """
     实现一个简单的 Graph RAG (图谱增强检索)
     1. 将图谱的三元组转化为自然语言上下文
     2. 让大模型仅根据这些上下文回答问题，防止幻觉
+    max_facts 为空时取 QA_MAX_FACTS；二者都未设置时普通图谱放入全部事实，流式图谱最多 STREAM_QA_MAX_FACTS 条。
     """
     if not is_api_configured():
         return "❌ 请配置 API Key：复制 config_local.py.example 为 config_local.py 并填入 Key，或设置环境变量 OPENAI_API_KEY。"
-    client = OpenAI(api_key=API_KEY, base_url=BASE_URL)
 
     # 1. 知识图谱扁平化 (Flattening)
     paper_meta = kg_data.get("paper_metadata", {})
     paper_title = paper_meta.get("title", "")
     facts = [f"论文《{paper_title}》的元数据: {json.dumps(paper_meta, ensure_ascii=False)}"]
 
-    for triple in kg_data.get("knowledge_graph", {}).get("triples", []):
-        fact = _triple_to_fact(triple)
-        if fact:
-            facts.append(fact)
+    triples = kg_data.get("knowledge_graph", {}).get("triples", [])
+    limit = max_facts if max_facts is not None else QA_MAX_FACTS
+    if limit is None and isinstance(triples, StreamSection):
+        limit = STREAM_QA_MAX_FACTS
+    selected, total = select_facts(user_query, triples, limit)
+    if len(selected) < total:
+        print(f"[*] [QA] 图谱共 {total} 条事实，提示词中只放入与问题最相关的 {len(selected)} 条（--max-facts 可调整，0 为不限）")
+    facts.extend(selected)
 
     context_str = "\n".join(facts)
     system_prompt = f"""你是一个基于知识图谱的智能问答助手。仅根据我提供的【已知知识图谱事实】回答用户问题。
@@ -66,20 +104,26 @@ def graph_rag_qa(user_query, kg_data):
 要求：若答案在事实中请准确回答；若不在请直接说“知识图谱中未包含此信息”，严禁编造。回答简洁、专业。"""
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
+        return chat_completion(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_query},
             ],
             temperature=0.1,
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"❌ 调用失败: {e}"
 
 if __name__ == "__main__":
-    input_path = (sys.argv[1] if len(sys.argv) > 1 else None) or INPUT_FILE
+    parser = argparse.ArgumentParser(description="基于知识图谱的问答（Graph RAG）")
+    parser.add_argument("input", nargs="?", default=None, help=f"图谱 JSON 或 .kg.jsonl (默认 {INPUT_FILE})")
+    parser.add_argument(
+        "--max-facts", type=int, default=None,
+        help="提示词中最多放入的事实数，只保留与问题重合度最高的部分；0 为不限 "
+             f"(默认读环境变量 QA_MAX_FACTS；都未设置时 JSON 图谱全部放入，流式图谱 {STREAM_QA_MAX_FACTS})",
+    )
+    args = parser.parse_args()
+    input_path = args.input or INPUT_FILE
     kg_data = load_knowledge_graph(input_path)
 
     if not kg_data:
@@ -102,5 +146,6 @@ if __name__ == "__main__":
             if not query:
                 continue
             print("Thinking...")
-            answer = graph_rag_qa(query, kg_data)
-            print(f"🤖 回答: {answer}")
\ No newline at end of file
+            answer = graph_rag_qa(query, kg_data, max_facts=args.max_facts)
+            print(f"🤖 回答: {answer}")
+        report_llm_metrics()
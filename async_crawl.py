@@ -0,0 +1,113 @@
+"""
+异步抓取引擎：基于 aiohttp 并发请求 Semantic Scholar。
+
+recursive_citations_kg 在 --concurrency N (N > 1) 时用它并发展开 BFS 的一整层：
+同层论文的引用/被引请求同时发出（最多 N 个在途），仍经共享缓存与令牌桶限流，
+因此总耗时受限于配额而不是往返延迟。结果按输入顺序返回，合并顺序与串行完全一致，
+同样的种子、k、d 得到同样的图谱。
+
+请求解析与缓存、限流、重试策略都与同步路径共用 top_citations_kg 中的步骤生成器
+（见 _run_s2_steps、_s2_request_steps），这里只做协程版的等待与 I/O；
+HTTP 请求经 transport 发出（支持录制/回放与故障注入）。
+"""
+
+import asyncio
+
+from rate_limiter import get_s2_limiter, s2_headers
+from transport import http_request_async
+from corpus_store import get_corpus_store
+from top_citations_kg import _related_papers_steps, _s2_request_steps, record_expansion
+
+try:
+    import aiohttp
+except ImportError:  # 仅 --concurrency > 1 时需要
+    aiohttp = None
+
+
+async def _request_s2_async(session, url, **kwargs):
+    """_request_s2_with_retry 的异步驱动：缓存、限流与重试策略同为 _s2_request_steps，只有等待与 I/O 换成协程。"""
+    steps = _s2_request_steps(url, **kwargs)
+    limiter = get_s2_limiter()
+    try:
+        action = next(steps)
+        while True:
+            if action[0] == "acquire":
+                await limiter.acquire_async()
+                action = steps.send(None)
+            elif action[0] == "sleep":
+                await asyncio.sleep(action[1])
+                action = steps.send(None)
+            else:
+                _, method, json_body, timeout = action
+                try:
+                    resp = await http_request_async(
+                        session, method, url, json_body=json_body, headers=s2_headers(),
+                        timeout=aiohttp.ClientTimeout(total=timeout),
+                    )
+                except Exception as e:
+                    action = steps.throw(e)
+                else:
+                    action = steps.send(resp)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _run_s2_steps_async(session, steps):
+    """_run_s2_steps 的异步驱动。"""
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(await _request_s2_async(session, **request))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def fetch_related_papers_async(session, arxiv_id, top_n=5, max_scan=None, rich_fields=False):
+    """fetch_related_papers_via_semantic_scholar 的异步版本。"""
+    try:
+        return await _run_s2_steps_async(
+            session, _related_papers_steps(arxiv_id, top_n, max_scan, rich_fields)
+        )
+    except Exception as e:
+        print(f"❌ 网络错误: {e}")
+        return {"references": [], "citations": []}
+
+
+async def _fetch_related_many(arxiv_ids, top_n, concurrency, max_scan, rich_fields):
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async def one(session, aid):
+        async with semaphore:
+            return await fetch_related_papers_async(
+                session, aid, top_n=top_n, max_scan=max_scan, rich_fields=rich_fields
+            )
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(*(one(session, aid) for aid in arxiv_ids))
+
+
+def fetch_related_papers_concurrently(arxiv_ids, top_n=5, concurrency=4, max_scan=None, rich_fields=False):
+    """
+    并发获取多篇论文的 top_n 引用/被引，最多 concurrency 个请求在途。
+    返回与 arxiv_ids 一一对应的列表（顺序与输入一致）。
+    启用语料库时库中已展开过的论文直接读库，只并发请求其余论文。
+    """
+    if aiohttp is None:
+        raise RuntimeError("并发抓取需要 aiohttp：pip install aiohttp")
+    if not arxiv_ids:
+        return []
+    store = get_corpus_store()
+    found = {}
+    if store is not None:
+        for aid in arxiv_ids:
+            rel = store.get_expansion(aid, top_n, max_scan, rich=rich_fields)
+            if rel is not None:
+                found[aid] = rel
+    todo = [aid for aid in dict.fromkeys(arxiv_ids) if aid not in found]
+    if todo:
+        fetched = asyncio.run(_fetch_related_many(todo, top_n, max(1, concurrency), max_scan, rich_fields))
+        for aid, rel in zip(todo, fetched):
+            record_expansion(aid, rel, top_n, max_scan, rich=rich_fields)
+            found[aid] = rel
+    return [found[aid] for aid in arxiv_ids]
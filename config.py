@@ -6,6 +6,14 @@
   2. 否则从环境变量读取：OPENAI_API_KEY、OPENAI_BASE_URL、OPENAI_MODEL_NAME
   3. 未设置时使用占位符/默认值（LLM 相关功能会提示配置）
 
+Semantic Scholar（可选）：
+  - S2_API_KEY：S2 API Key，配置后请求带 x-api-key 并按 Key 的配额限流
+  - S2_RATE_LIMIT：覆盖默认配额，格式 "请求数/秒数"，如 "10/1"
+
+大模型配额（可选）：
+  - LLM_RPM / LLM_TPM：每分钟请求数 / token 数上限，并发抽取按此限流（默认 60 / 100000）
+  - LLM_PRICE：每百万 token 的美元单价 "输入/输出"，如 "0.27/1.10"，用于估算费用（常见模型已内置）
+
 使用方式：
   - 推荐：复制 config_local.py.example 为 config_local.py，填入你的 Key（勿提交 config_local.py）
   - 或：设置环境变量 OPENAI_API_KEY 等
@@ -24,6 +32,30 @@ except ImportError:
     BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.deepseek.com")
     MODEL_NAME = os.environ.get("OPENAI_MODEL_NAME", "deepseek-chat")
 
+# Semantic Scholar API Key 与配额（可选，未设置时按无 Key 配额限流）
+try:
+    from config_local import S2_API_KEY
+except ImportError:
+    S2_API_KEY = os.environ.get("S2_API_KEY", "")
+try:
+    from config_local import S2_RATE_LIMIT
+except ImportError:
+    S2_RATE_LIMIT = os.environ.get("S2_RATE_LIMIT", "")
+
+# 大模型每分钟请求数 / token 数配额
+try:
+    from config_local import LLM_RPM
+except ImportError:
+    LLM_RPM = int(os.environ.get("LLM_RPM", "60") or 60)
+try:
+    from config_local import LLM_TPM
+except ImportError:
+    LLM_TPM = int(os.environ.get("LLM_TPM", "100000") or 100000)
+try:
+    from config_local import LLM_PRICE
+except ImportError:
+    LLM_PRICE = os.environ.get("LLM_PRICE", "")
+
 # 占位符，用于判断是否已配置真实 Key
 _PLACEHOLDER = "sk-xxxxxxxxxxxxxxxxxxxxxxxx"
 
@@ -0,0 +1,512 @@
+"""
+语料图谱库（SQLite）：把每次爬取得到的论文、作者、实体与三元组累积到同一个数据库，后续爬取直接复用。
+
+表：
+  papers         论文，一篇一行（按 paper_identity 的身份键识别）；s2_id / arxiv_id / doi 唯一索引，
+                 title_key 普通索引；data 为合并后的完整元数据 JSON
+  paper_alias    合并掉的旧行 id -> 保留行 id（两条记录后来被同一论文桥接时）
+  authors, paper_authors   作者及其署名的论文（按署名顺序）
+  citations      引用边 (citing, cited)，两端为 papers.id，另有 (cited, citing) 索引
+  expansions     已拉取过 top N 引用/被引的论文：按引用量排好序的 papers.id 列表与拉取参数
+                 （rich 标记是否为 --rich-fields 拉取，即邻居带回了摘要与作者）
+  entities       图谱实体（名称唯一，类型先到先得）
+  triples        图谱三元组，主键 (head, relation, tail)，另有 (tail, relation) 索引
+写入均为 upsert：同一篇论文只保留一行，后到的记录只补充缺失字段；
+同一三元组只保留一行，count 取各次写入的最大值（同一图谱重复写入不会累加）。
+
+生成脚本加 --store 时：
+  - 拉取引用/被引前先查 expansions，展开过（top N 不少于本次、扫描范围相同或为全量）的论文直接读库；
+    --rich-fields 运行只复用同样以 rich 模式拉取的记录，否则邻居又要逐篇补全元数据；
+  - ArXiv 元数据与摘要/作者补全先查 papers，库中已完整的论文不再请求；
+  - 运行结束把论文、实体与三元组写回库中。
+图谱 JSON / HTML 也可以不发请求、直接从库中导出：
+  python corpus_store.py export 1706.03762 -k 5 -d 2
+  python corpus_store.py stats
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from api_cache import DEFAULT_CACHE_DIR
+from knowledge_graph import KnowledgeGraph
+from paper_identity import PaperIndex, canonical_arxiv_id, identity_keys, merge_paper, title_key
+
+DEFAULT_STORE_PATH = os.path.join(DEFAULT_CACHE_DIR, "corpus.sqlite")
+# 论文之间的边与作者关系由 papers / citations / paper_authors 表达，导出时重新生成
+PAPER_RELATIONS = ("author_of", "cites")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    s2_id TEXT UNIQUE,
+    arxiv_id TEXT UNIQUE,
+    doi TEXT UNIQUE,
+    title TEXT,
+    title_key TEXT,
+    citation_count INTEGER,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_title_key ON papers (title_key);
+CREATE TABLE IF NOT EXISTS paper_alias (
+    old_id INTEGER PRIMARY KEY,
+    new_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS paper_authors (
+    paper_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (paper_id, author_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS paper_authors_author ON paper_authors (author_id);
+CREATE TABLE IF NOT EXISTS citations (
+    citing INTEGER NOT NULL,
+    cited INTEGER NOT NULL,
+    PRIMARY KEY (citing, cited)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS citations_cited ON citations (cited, citing);
+CREATE TABLE IF NOT EXISTS expansions (
+    paper_id INTEGER PRIMARY KEY,
+    top_n INTEGER NOT NULL,
+    max_scan INTEGER,
+    refs TEXT NOT NULL,
+    cites TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    rich INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS entities (
+    name TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    attrs TEXT NOT NULL DEFAULT '{}'
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS triples (
+    head TEXT NOT NULL,
+    relation TEXT NOT NULL,
+    tail TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (head, relation, tail)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS triples_tail ON triples (tail, relation);
+"""
+
+# 身份键前缀 -> papers 表中的列
+KEY_COLUMNS = {"s2": "s2_id", "arxiv": "arxiv_id", "doi": "doi"}
+
+
+def _has_full_metadata(paper):
+    return bool(paper and paper.get("abstract") and paper.get("authors"))
+
+
+class CorpusStore:
+    def __init__(self, path):
+        self.path = path
+        self.expansion_hits = 0
+        self.paper_hits = 0
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(expansions)")}
+        if "rich" not in columns:  # 早期版本建的库：旧记录视为非 rich
+            self._conn.execute("ALTER TABLE expansions ADD COLUMN rich INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    # ---------- 论文 ----------
+
+    def _resolve(self, pid):
+        while True:
+            row = self._conn.execute("SELECT new_id FROM paper_alias WHERE old_id = ?", (pid,)).fetchone()
+            if row is None:
+                return pid
+            pid = row[0]
+
+    def _match(self, paper):
+        """库中与 paper 为同一篇论文的行 id（升序）；无身份键时按标题匹配同样无身份键的行。"""
+        keys = identity_keys(paper)
+        if not keys:
+            tkey = title_key(paper.get("title"))
+            rows = self._conn.execute(
+                "SELECT id FROM papers WHERE title_key = ? AND s2_id IS NULL AND arxiv_id IS NULL AND doi IS NULL",
+                (tkey,),
+            ).fetchall()
+            return [r[0] for r in rows]
+        found = set()
+        for key in keys:
+            prefix, value = key.split(":", 1)
+            row = self._conn.execute(f"SELECT id FROM papers WHERE {KEY_COLUMNS[prefix]} = ?", (value,)).fetchone()
+            if row is not None:
+                found.add(row[0])
+        return sorted(found)
+
+    def _load(self, pid):
+        row = self._conn.execute("SELECT data FROM papers WHERE id = ?", (pid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _merge_rows(self, keep, other):
+        """把行 other 并入 keep：引用边、作者、展开记录改指 keep，other 记为别名。"""
+        conn = self._conn
+        for sql in (
+            "UPDATE OR IGNORE citations SET citing = :keep WHERE citing = :other",
+            "UPDATE OR IGNORE citations SET cited = :keep WHERE cited = :other",
+            "DELETE FROM citations WHERE citing = :other OR cited = :other",
+            "UPDATE OR IGNORE paper_authors SET paper_id = :keep WHERE paper_id = :other",
+            "DELETE FROM paper_authors WHERE paper_id = :other",
+            "UPDATE OR IGNORE expansions SET paper_id = :keep WHERE paper_id = :other",
+            "DELETE FROM expansions WHERE paper_id = :other",
+            "DELETE FROM papers WHERE id = :other",
+            "INSERT OR REPLACE INTO paper_alias (old_id, new_id) VALUES (:other, :keep)",
+        ):
+            conn.execute(sql, {"keep": keep, "other": other})
+
+    def _upsert(self, paper):
+        """写入一篇论文（需已持有锁、处于事务中），返回行 id。"""
+        conn = self._conn
+        ids = self._match(paper)
+        if ids:
+            pid = ids[0]
+            data = merge_paper(self._load(pid), paper)
+            for other in ids[1:]:
+                merge_paper(data, self._load(other))
+                self._merge_rows(pid, other)
+        else:
+            pid, data = None, dict(paper)
+        cols = {KEY_COLUMNS[k.split(":", 1)[0]]: k.split(":", 1)[1] for k in identity_keys(data)}
+        values = (
+            cols.get("s2_id"), cols.get("arxiv_id"), cols.get("doi"),
+            data.get("title") or "", title_key(data.get("title")), data.get("citation_count"),
+            json.dumps(data, ensure_ascii=False), time.time(),
+        )
+        if pid is None:
+            pid = conn.execute(
+                "INSERT INTO papers (s2_id, arxiv_id, doi, title, title_key, citation_count, data, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            ).lastrowid
+        else:
+            conn.execute(
+                "UPDATE papers SET s2_id = ?, arxiv_id = ?, doi = ?, title = ?, title_key = ?, citation_count = ?,"
+                " data = ?, updated_at = ? WHERE id = ?",
+                values + (pid,),
+            )
+        authors = [a.strip() for a in data.get("authors") or [] if a and a.strip()]
+        if authors and conn.execute("SELECT 1 FROM paper_authors WHERE paper_id = ? LIMIT 1", (pid,)).fetchone() is None:
+            for position, name in enumerate(authors):
+                conn.execute("INSERT OR IGNORE INTO authors (name) VALUES (?)", (name,))
+                aid = conn.execute("SELECT id FROM authors WHERE name = ?", (name,)).fetchone()[0]
+                conn.execute(
+                    "INSERT OR IGNORE INTO paper_authors (paper_id, author_id, position) VALUES (?, ?, ?)",
+                    (pid, aid, position),
+                )
+        return pid
+
+    def upsert_papers(self, papers):
+        """写入多篇论文（一个事务），返回对应的行 id 列表。"""
+        with self._lock, self._conn:
+            return [self._upsert(p) for p in papers]
+
+    def find_paper(self, paper):
+        """论文在库中时返回合并后的元数据，否则返回 None。"""
+        with self._lock:
+            ids = self._match(paper)
+            return self._load(ids[0]) if ids else None
+
+    def papers_by_arxiv(self, arxiv_ids):
+        """{请求的 arxiv id: 库中元数据}；只返回已有摘要与作者的论文（可直接代替 ArXiv 查询）。"""
+        found = {}
+        with self._lock:
+            for aid in arxiv_ids:
+                row = self._conn.execute(
+                    "SELECT data FROM papers WHERE arxiv_id = ?", (canonical_arxiv_id(aid),)
+                ).fetchone()
+                if row is None:
+                    continue
+                data = json.loads(row[0])
+                if _has_full_metadata(data) and data.get("title"):
+                    data.setdefault("id", aid)
+                    found[aid] = data
+        self.paper_hits += len(found)
+        return found
+
+    def fill_metadata(self, papers):
+        """用库中记录补全缺摘要/作者的论文（只补空字段），返回补全的篇数。"""
+        filled = 0
+        for paper in papers:
+            if _has_full_metadata(paper):
+                continue
+            data = self.find_paper(paper)
+            if _has_full_metadata(data):
+                merge_paper(paper, data)
+                filled += 1
+        self.paper_hits += filled
+        return filled
+
+    # ---------- 引用关系 ----------
+
+    def record_expansion(self, arxiv_id, rel, top_n, max_scan=None, rich=False):
+        """
+        记录一篇论文的 top_n 引用/被引（rel 为 fetch_related_papers_via_semantic_scholar 的结果）；
+        rich 为 True 表示以 rich_fields 模式拉取（邻居带摘要与作者）。
+        """
+        with self._lock, self._conn:
+            pid = self._upsert({"arxiv_id": arxiv_id})
+            refs = [self._upsert(r) for r in rel.get("references") or [] if r.get("title")]
+            cites = [self._upsert(c) for c in rel.get("citations") or [] if c.get("title")]
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO citations (citing, cited) VALUES (?, ?)",
+                [(pid, r) for r in refs if r != pid] + [(c, pid) for c in cites if c != pid],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO expansions (paper_id, top_n, max_scan, refs, cites, fetched_at, rich)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (pid, top_n, max_scan, json.dumps(refs), json.dumps(cites), time.time(), int(bool(rich))),
+            )
+
+    def get_expansion(self, arxiv_id, top_n, max_scan=None, rich=False):
+        """
+        库中已展开过的论文返回 {"references": [...], "citations": [...]}（各取前 top_n），否则返回 None。
+        记录的 top N 少于本次，或是截断扫描（max_scan）而本次要求不同的扫描范围时视为未命中；
+        rich 为 True 时非 rich 模式拉取的记录也视为未命中（rich 记录可供任何运行复用）。
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.top_n, e.max_scan, e.refs, e.cites, e.rich FROM expansions e"
+                " JOIN papers p ON p.id = e.paper_id WHERE p.arxiv_id = ?",
+                (canonical_arxiv_id(arxiv_id),),
+            ).fetchone()
+            if row is None or row[0] < top_n or (row[1] is not None and row[1] != max_scan):
+                return None
+            if rich and not row[4]:
+                return None
+            rel = {}
+            for name, ids in (("references", row[2]), ("citations", row[3])):
+                papers = (self._load(self._resolve(pid)) for pid in json.loads(ids)[:top_n])
+                rel[name] = [p for p in papers if p]
+        self.expansion_hits += 1
+        return rel
+
+    def neighbourhood(self, arxiv_id, top_k=5, depth=2):
+        """
+        从库中取种子论文 depth 层内的邻域，不发请求：与爬取相同，每层沿展开记录（expansions）
+        取每篇论文引用量前 top_k 的引用/被引，库中未展开过的论文不再向外延伸。
+        返回 (论文列表, [(引用方下标, 被引方下标)])，种子在首位；种子不在库中返回 None。
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM papers WHERE arxiv_id = ?", (canonical_arxiv_id(arxiv_id),)
+            ).fetchone()
+            if row is None:
+                return None
+            order = {row[0]: 0}
+            edges = []
+            frontier = [row[0]]
+            for _ in range(depth):
+                next_frontier = []
+                for pid in frontier:
+                    row = self._conn.execute("SELECT refs, cites FROM expansions WHERE paper_id = ?", (pid,)).fetchone()
+                    if row is None:
+                        continue
+                    refs = [self._resolve(r) for r in json.loads(row[0])[:top_k]]
+                    cites = [self._resolve(c) for c in json.loads(row[1])[:top_k]]
+                    for other, is_ref in [(r, True) for r in refs] + [(c, False) for c in cites]:
+                        if other not in order:
+                            order[other] = len(order)
+                            next_frontier.append(other)
+                        edges.append((order[pid], order[other]) if is_ref else (order[other], order[pid]))
+                frontier = next_frontier
+            papers = [self._load(pid) for pid in order]
+        return papers, list(dict.fromkeys(edges))
+
+    # ---------- 实体与三元组 ----------
+
+    def add_graph(self, entities, triples):
+        """写入图谱实体与三元组（KnowledgeGraph.iter_entities / iter_triples 的记录）。"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO entities (name, type, attrs) VALUES (?, ?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET attrs = excluded.attrs WHERE entities.attrs = '{}'",
+                (
+                    (e["name"], e.get("type") or "", json.dumps(
+                        {k: v for k, v in e.items() if k not in ("name", "type")}, ensure_ascii=False
+                    ))
+                    for e in entities if e.get("name")
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO triples (head, relation, tail, count) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (head, relation, tail) DO UPDATE SET count = max(count, excluded.count)",
+                (
+                    (t["head"], t.get("relation") or "", t["tail"], t.get("count") or 1)
+                    for t in triples if t.get("head") and t.get("tail")
+                ),
+            )
+
+    def graph_around(self, names, exclude_relations=PAPER_RELATIONS):
+        """
+        以 names 中任一节点为头或尾的三元组（排除 exclude_relations），及其两端实体。
+        返回 ({实体名: (类型, 属性)}, [(头, 关系, 尾, 次数)])，三元组按 names 的顺序排列、已去重。
+        """
+        triples = {}
+        with self._lock:
+            for name in names:
+                for sql in (
+                    "SELECT head, relation, tail, count FROM triples WHERE head = ?",
+                    "SELECT head, relation, tail, count FROM triples WHERE tail = ?",
+                ):
+                    for h, r, t, c in self._conn.execute(sql, (name,)):
+                        if r not in exclude_relations:
+                            triples.setdefault((h, r, t), c)
+            entities = {}
+            for h, _, t in triples:
+                for n in (h, t):
+                    if n not in entities:
+                        row = self._conn.execute("SELECT type, attrs FROM entities WHERE name = ?", (n,)).fetchone()
+                        entities[n] = (row[0], json.loads(row[1])) if row else None
+        return entities, [(h, r, t, c) for (h, r, t), c in triples.items()]
+
+    # ---------- 统计 ----------
+
+    def counts(self):
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("papers", "authors", "citations", "expansions", "entities", "triples")
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ---------- 进程内共享的语料库 ----------
+
+_store = None
+_store_path = None
+
+
+def configure_corpus_store(path=None):
+    """设置语料库路径（None 表示不使用语料库）；需在首次请求前调用。"""
+    global _store, _store_path
+    if _store is not None:
+        _store.close()
+        _store = None
+    _store_path = path
+
+
+def get_corpus_store():
+    """返回共享的语料库；未通过 --store 启用时返回 None。"""
+    global _store
+    if _store_path is None:
+        return None
+    if _store is None:
+        _store = CorpusStore(_store_path)
+    return _store
+
+
+def save_to_corpus_store(papers, kg):
+    """把一次运行的论文与图谱写回语料库（未启用时什么也不做）。"""
+    store = get_corpus_store()
+    if store is None:
+        return
+    store.upsert_papers(papers)
+    store.add_graph(kg.iter_entities(), kg.iter_triples())
+
+
+def print_corpus_store_stats():
+    """打印本次运行从语料库复用的数量与库的规模。"""
+    if _store is None:
+        return
+    c = _store.counts()
+    print(
+        f"[*] [语料库] 复用展开 {_store.expansion_hits} 篇, 复用元数据 {_store.paper_hits} 篇; "
+        f"库中论文 {c['papers']} 篇, 引用边 {c['citations']} 条, 三元组 {c['triples']} 条 ({_store.path})"
+    )
+
+
+def export_neighbourhood(store, arxiv_id, top_k=5, depth=2, stream=False):
+    """
+    从语料库导出种子论文的邻域图谱（论文、作者、引用边及库中与这些论文相连的其他三元组），
+    输出格式与 recursive_citations_kg 相同，不发任何请求。返回图谱文件路径，种子不在库中返回 None。
+    """
+    from top_citations_kg import ALLOWED_TYPES, write_kg_output  # top_citations_kg 导入本模块，延迟导入避免循环
+
+    arxiv_id = canonical_arxiv_id(arxiv_id)
+    found = store.neighbourhood(arxiv_id, top_k, depth)
+    if found is None:
+        print(f"❌ 语料库中没有论文 {arxiv_id}，请先用 --store 爬取")
+        return None
+    papers, edges = found
+    index = PaperIndex()
+    pids = [index.add(p) for p in papers]
+    titles = [index.display_title(pid) for pid in pids]
+
+    kg = KnowledgeGraph(ALLOWED_TYPES)
+    kg.add_papers(papers, titles=titles)
+    kg.add_triples("cites", [(titles[h], titles[t]) for h, t in edges if h != t])
+    entities, triples = store.graph_around(titles)
+    for name, entity in entities.items():
+        if entity is not None:
+            kg.add_entity(name, entity[0], entity[1])
+    for h, r, t, c in triples:
+        kg.add_triple(h, r, t, count=c)
+
+    def _paper_meta(p):
+        return {
+            "title": p.get("title", ""),
+            "arxiv_id": p.get("arxiv_id", ""),
+            "abstract": p.get("abstract", ""),
+            "authors": p.get("authors", []),
+            "published_date": p.get("published_date", ""),
+            "pdf_url": p.get("pdf_url", ""),
+            "citation_count": p.get("citation_count"),
+            "year": p.get("year"),
+        }
+
+    output_data = {
+        "paper_metadata": papers[0],
+        "related_papers_count": {
+            "references": sum(1 for h, t in edges if h == 0),
+            "citations": sum(1 for h, t in edges if t == 0),
+        },
+        "related_papers": None,
+        "top_k": top_k,
+        "depth": depth,
+        "knowledge_graph": None,
+        "corpus_store": store.path,
+    }
+    print(f"[*] [语料库] 邻域: 论文 {len(papers)} 篇, 引用边 {len(edges)} 条, 其他三元组 {len(triples)} 条")
+    return write_kg_output(
+        f"corpus_kg_{arxiv_id}_k{top_k}_d{depth}", output_data, kg, (_paper_meta(p) for p in papers[1:]), stream
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="语料图谱库：查看规模，或不发请求从库中导出邻域图谱 JSON + HTML")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"语料库路径 (默认 {DEFAULT_STORE_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="导出种子论文的邻域图谱")
+    p_export.add_argument("arxiv_id", help="种子论文 ArXiv ID")
+    p_export.add_argument("-k", "--top", type=int, default=5, help="每篇论文引用/被引各取前 K 篇 (默认 5)")
+    p_export.add_argument("-d", "--depth", type=int, default=2, help="展开深度 (默认 2)")
+    p_export.add_argument("--stream", action="store_true", help="输出流式 JSONL（.kg.jsonl）而不是缩进 JSON")
+    sub.add_parser("stats", help="各表行数")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store):
+        print(f"❌ 找不到语料库: {args.store}")
+        raise SystemExit(1)
+    store = CorpusStore(args.store)
+    if args.command == "export":
+        export_neighbourhood(store, args.arxiv_id, args.top, args.depth, args.stream)
+    else:
+        for table, n in store.counts().items():
+            print(f"{table:12s} {n}")
+    store.close()
@@ -0,0 +1,141 @@
+"""
+递归爬取的断点续爬日志（append-only JSON Lines）。
+
+recursive_citations_kg 每推进一步就追加一条记录，中断后用 --resume 回放日志即可恢复
+BFS 前沿、已展开集合、论文身份索引（paper_identity.PaperIndex）与 edges，从中断处继续，不重复请求已完成的部分。
+
+记录类型：
+  start       爬取参数与种子论文（每个日志的第一条）
+  level       一层开始：本层前沿（已去重）与本层新拉取的元数据（仅 BFS）
+  node        一篇论文展开完毕：按顺序加入索引的论文、新增边（两端为论文主身份键，见 paper_key）、
+              加入下一层的 id；meta 为元数据已完整、无需再请求 ArXiv 的 id -> 论文主身份键
+              （论文记录本身已在 assign 中，不重复写入）；
+              best-first 模式另含 push（加入优先队列的 [分数, id, 层]）
+  crawl_done  爬取结束（因预算停止时不写，之后可 --resume 继续）
+最后一行若因中断写了一半，回放时忽略。
+"""
+
+import json
+import os
+
+from paper_identity import PaperIndex
+
+
+class CrawlJournal:
+    """追加写入的爬取日志；每条记录写完即 flush + fsync。"""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+
+    def start(self, header):
+        """新建日志（覆盖旧文件）并写入 start 记录。"""
+        self.close()
+        self._f = open(self.path, "w", encoding="utf-8")
+        self.append(dict(header, type="start"))
+
+    def reopen(self):
+        """续爬时以追加方式打开已有日志。"""
+        self.close()
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def append(self, record):
+        if self._f is None:
+            self.reopen()
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def read_journal(path):
+    """读取日志记录；跳过末尾写了一半的行。"""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+def replay_journal(records):
+    """
+    按顺序回放日志，重建爬取状态。返回 None 表示日志为空或缺少 start 记录，否则返回：
+      header          start 记录（爬取参数与种子 seed）
+      papers          PaperIndex，已去重的论文
+      edges           [(头论文内部 id, 尾论文内部 id)]
+      expanded_arxiv / arxiv_meta  与爬取时一致（arXiv id 均已去版本号）
+      frontier, level 当前层（level_open 为 True 时该层已开始，done 为其中已展开的 id）
+      next_frontier   当前层已产生的下一层 id
+      heap_items      best-first 模式下按顺序加入优先队列的 [分数, id, 层]
+      finished        爬取是否已结束
+    """
+    if not records or records[0].get("type") != "start":
+        return None
+    header = records[0]
+    seed = header["seed"]
+    papers = PaperIndex()
+    papers.add(seed)
+    state = {
+        "header": header,
+        "papers": papers,
+        "edges": [],
+        "expanded_arxiv": set(),
+        "arxiv_meta": {header["arxiv_id"]: seed},
+        "frontier": [header["arxiv_id"]],
+        "level": 0,
+        "level_open": False,
+        "done": set(),
+        "next_frontier": [],
+        "heap_items": [],
+        "finished": False,
+    }
+    for rec in records[1:]:
+        kind = rec.get("type")
+        if kind == "level":
+            state["level"] = rec["level"]
+            state["frontier"] = rec["frontier"]
+            state["expanded_arxiv"].update(rec["frontier"])
+            state["arxiv_meta"].update(rec.get("meta") or {})
+            state["level_open"] = True
+            state["done"] = set()
+            state["next_frontier"] = []
+        elif kind == "node":
+            apply_node(state, rec)
+        elif kind == "crawl_done":
+            state["finished"] = True
+    return state
+
+
+def apply_node(state, node):
+    """把一条 node 记录应用到爬取状态上（实时爬取与回放共用）。"""
+    papers = state["papers"]
+    for p in node.get("assign") or []:
+        papers.add(p)
+    for head, tail in node.get("edges") or []:
+        # 边的两端为主身份键；旧版日志中为标题，lookup 同样能找到
+        h, t = papers.lookup(head), papers.lookup(tail)
+        if h is not None and t is not None:
+            state["edges"].append((h, t))
+    state["next_frontier"].extend(node.get("next") or [])
+    state["heap_items"].extend(node.get("push") or [])
+    for aid, meta in (node.get("meta") or {}).items():
+        if isinstance(meta, str):  # 主身份键；旧版日志中为完整的论文字典
+            pid = papers.lookup(meta)
+            if pid is None:
+                continue
+            meta = papers.get(pid)
+        state["arxiv_meta"].setdefault(aid, meta)
+    state["expanded_arxiv"].add(node["aid"])
+    state["done"].add(node["aid"])
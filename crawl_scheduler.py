@@ -0,0 +1,76 @@
+"""
+递归爬取的调度策略与预算。
+
+- 评分函数：best-first 模式下决定前沿论文的展开顺序（分数高者先展开）
+    citations  引用量
+    recency    按年龄归一化的引用量：引用量 / (今年 - 发表年 + 1)，年份未知时不归一化
+    distance   与种子的距离（层数越小越先展开，相当于 BFS）
+- CrawlBudget：请求数与耗时预算，用尽后爬取停止，已抓到的部分照常输出。
+"""
+
+import datetime
+import time
+
+from top_citations_kg import network_request_count
+
+REQUESTS_PER_EXPANSION = 2  # 展开一篇论文至少请求引用、被引各一页（缓存未命中时）
+
+
+def score_citations(paper, level):
+    return float(paper.get("citation_count") or 0)
+
+
+def score_recency(paper, level):
+    citations = float(paper.get("citation_count") or 0)
+    year = paper.get("year") or 0
+    if not year:
+        return citations
+    age = max(1, datetime.date.today().year - int(year) + 1)
+    return citations / age
+
+
+def score_distance(paper, level):
+    return -float(level)
+
+
+SCORERS = {
+    "citations": score_citations,
+    "recency": score_recency,
+    "distance": score_distance,
+}
+
+
+class CrawlBudget:
+    """
+    爬取预算：max_requests 为本次爬取最多发出的网络请求数（缓存命中不计），
+    max_seconds 为最长耗时；均为 None 时不限。预算在每次拉取（每篇论文展开、每批元数据）前检查，
+    并发拉取的一批论文数不超过 expansions_left()，因此超出量不会多于一篇论文的请求。
+    """
+
+    def __init__(self, max_requests=None, max_seconds=None):
+        self.max_requests = max_requests
+        self.max_seconds = max_seconds
+        self._start_requests = network_request_count()
+        self._start_time = time.monotonic()
+
+    @property
+    def requests_used(self):
+        return network_request_count() - self._start_requests
+
+    @property
+    def seconds_used(self):
+        return time.monotonic() - self._start_time
+
+    def exhausted(self):
+        """预算用尽时返回原因说明，否则返回 None。"""
+        if self.max_requests is not None and self.requests_used >= self.max_requests:
+            return f"请求数达到上限 {self.max_requests}"
+        if self.max_seconds is not None and self.seconds_used >= self.max_seconds:
+            return f"耗时达到上限 {self.max_seconds} 秒"
+        return None
+
+    def expansions_left(self):
+        """剩余请求预算还能展开的论文数（每篇按 REQUESTS_PER_EXPANSION 个请求计，至少为 1）；不限请求数时返回 None。"""
+        if self.max_requests is None:
+            return None
+        return max(1, (self.max_requests - self.requests_used) // REQUESTS_PER_EXPANSION)
@@ -0,0 +1,293 @@
+"""
+基于词典（gazetteer）的本地实体/关系抽取，作为 LLM 抽取前的快速通道。
+
+LLM 抽出的 evaluated_on / uses_metric / proposed_model / baseline_model 三元组，
+尾实体大多来自一个反复出现的小词表（BLEU、WMT 2014、ImageNet、BERT……）。
+这里从已有的知识图谱 JSON 中收集这些实体及其关系，构建 Aho–Corasick 多模式匹配器，
+一次扫描摘要即可找出全部词条，输出格式与 extract_knowledge_with_llm 相同。
+
+LLM 也会抽出 "performance"、"neural networks"、"error" 这类泛称，它们几乎出现在每篇摘要里，不能入典：
+  - 全小写的普通短语、STOP_TERMS 中的泛用缩写与词（GitHub、LLM、Accuracy……）不收录；
+  - 在来源图谱摘要中的文档频率超过 MAX_DOC_FREQ 的词条删去（摘要不少于 MIN_DF_DOCS 篇时）；
+  - 只有专有词条（缩写、驼峰或带数字的名称，如 BERT、ImageNet、WMT 2014、GPT-2）计入命中数。
+命中不同专有词条足够多的论文直接用本地结果，其余论文交给 LLM。
+
+用法：
+  gaz = load_gazetteer()                      # 默认读取当前目录下已生成的图谱 JSON
+  result = gaz.extract({"title": ..., "abstract": ...})
+"""
+
+import glob
+import json
+import os
+import re
+from collections import Counter, deque
+
+# 默认从这些已生成的图谱 JSON 中收集词条
+DEFAULT_GAZETTEER_GLOBS = ("result.json", "final_kg_*.json", "top_citations_kg_*.json", "recursive_kg_*.json")
+
+# 命中不同词条数达到该值时使用本地结果，否则交给 LLM
+GAZETTEER_MIN_HITS = 3
+
+# 词典收集的关系；其余关系（cites、author_of）由引用网络与元数据给出
+GAZETTEER_RELATIONS = ("proposed_model", "baseline_model", "evaluated_on", "uses_metric")
+
+# 没有三元组佐证时按类型推断关系
+TYPE_DEFAULT_RELATION = {
+    "AIModel": "baseline_model",
+    "SoftwareApplication": "baseline_model",
+    "Dataset": "evaluated_on",
+    "Metric": "uses_metric",
+}
+
+# 论文、人物不进词典（标题与人名由元数据给出）
+SKIP_TYPES = {"AIPaper", "Thesis", "Article", "Researcher", "Person"}
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 60
+
+# 泛用的缩写与词：带大写或数字却不指向具体模型 / 数据集 / 指标（小写比较）
+STOP_TERMS = {
+    "ai", "api", "apis", "ar", "vr", "ml", "nlp", "cv", "rl", "sota", "llm", "llms", "mlp", "mlps",
+    "cnn", "cnns", "rnn", "rnns", "dnn", "dnns", "gnn", "gnns", "gpu", "gpus", "cpu", "cpus",
+    "github", "code", "accuracy", "precision", "recall", "error", "loss", "performance",
+}
+# 来源摘要中出现比例超过该值的词条视为泛称；摘要少于 MIN_DF_DOCS 篇时不做该过滤
+MAX_DOC_FREQ = 0.1
+MIN_DF_DOCS = 50
+
+
+class AhoCorasick:
+    """Aho–Corasick 自动机：一次线性扫描找出文本中所有模式串的出现位置。"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+
+    def add(self, pattern, value):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        """按 BFS 计算失败指针，并把失败链上的输出合并到各节点。"""
+        queue = deque(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text):
+        """逐个产出 (起始位置, 结束位置, value)。"""
+        if not self._built:
+            self.build()
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                yield i - length + 1, i + 1, value
+
+
+def _is_specific(name):
+    """专有词条：去掉括号中的缩写后仍含数字，或某个词的非首字母有大写（BERT、ImageNet、GPT-2、WMT 2014）。"""
+    core = re.sub(r"\s*\([^)]*\)", "", name)
+    return any(ch.isdigit() for ch in core) or any(ch.isupper() for word in core.split() for ch in word[1:])
+
+
+def _is_boundary(text, start, end):
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class Gazetteer:
+    """
+    词典：小写词条 -> {"name", "type", "relations"（三元组中作为尾实体的关系计数）, "proposed_by", "specific"}。
+    proposed_by 为提出该模型的论文标题；模型在其他论文中出现时按基线处理；
+    specific 表示专有词条（见 _is_specific），只有它们计入 extract_if_confident 的命中数。
+    """
+
+    def __init__(self):
+        self.terms = {}
+        self.common = set()    # 因文档频率过高删去的词条（小写）
+        self._documents = {}   # 来源图谱中的论文：规范化标题 -> 标题 + 摘要，用于统计文档频率
+        self._matcher = None
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add_entity(self, name, etype, relation=None, head=None):
+        name = (name or "").strip()
+        if not (MIN_TERM_LENGTH <= len(name) <= MAX_TERM_LENGTH) or etype in SKIP_TYPES:
+            return
+        if not any(ch.isalpha() for ch in name):
+            return
+        key = name.lower()
+        # 全小写的普通短语（performance、neural networks）与泛用词不收录
+        if key in STOP_TERMS or key in self.common or not any(ch.isupper() or ch.isdigit() for ch in name):
+            return
+        info = self.terms.setdefault(
+            key, {"name": name, "type": etype, "relations": Counter(), "proposed_by": set(), "specific": _is_specific(name)}
+        )
+        if relation == "proposed_model" and head:
+            info["proposed_by"].add(head)
+        elif relation in GAZETTEER_RELATIONS:
+            info["relations"][relation] += 1
+        self._matcher = None
+
+    def add_kg(self, kg_data):
+        """从一份图谱 JSON（含 knowledge_graph.entities / triples）收集词条。"""
+        kg = kg_data.get("knowledge_graph", {}) if isinstance(kg_data, dict) else {}
+        if isinstance(kg_data, dict):
+            for p in [kg_data.get("paper_metadata") or {}] + list(kg_data.get("related_papers") or []):
+                if p.get("abstract"):
+                    self._documents.setdefault(
+                        " ".join((p.get("title") or "").split()).casefold() or p["abstract"][:80],
+                        f"{p.get('title') or ''}\n{p['abstract']}",
+                    )
+                    self._matcher = None
+        entities = kg.get("entities", [])
+        types = {}
+        for e in entities:
+            if e.get("name"):
+                types.setdefault(e["name"].strip(), e.get("type", ""))
+        papers = {name for name, t in types.items() if t in SKIP_TYPES}
+        for t in kg.get("triples", []):
+            rel = t.get("relation")
+            tail = (t.get("tail") or t.get("object") or "").strip()
+            if rel in GAZETTEER_RELATIONS and tail and tail not in papers:
+                self.add_entity(tail, types.get(tail, ""), rel, (t.get("head") or t.get("subject") or "").strip())
+        for name, etype in types.items():
+            if name not in papers and etype in TYPE_DEFAULT_RELATION:
+                self.add_entity(name, etype)
+
+    def _relation_for(self, info, title):
+        if title in info["proposed_by"]:
+            return "proposed_model"
+        if info["relations"]:
+            return info["relations"].most_common(1)[0][0]
+        if info["proposed_by"]:
+            return "baseline_model"
+        return TYPE_DEFAULT_RELATION.get(info["type"])
+
+    def _build(self):
+        matcher = AhoCorasick()
+        for key, info in self.terms.items():
+            matcher.add(key, info)
+        matcher.build()
+        self._matcher = matcher
+        if len(self._documents) < MIN_DF_DOCS:
+            return
+        # 文档频率过高的词条几乎匹配任何摘要，删去后重建
+        df = Counter()
+        for text in self._documents.values():
+            df.update(info["name"].lower() for info in self.match(text))
+        common = {key for key, n in df.items() if n > MAX_DOC_FREQ * len(self._documents)}
+        if common:
+            self.common |= common
+            for key in common:
+                del self.terms[key]
+            self._build()
+
+    def prepare(self):
+        """构建匹配器（并按文档频率删去泛称）；match 首次调用时也会自动构建。"""
+        if self._matcher is None:
+            self._build()
+        return self
+
+    def match(self, text):
+        """返回文本中命中的词条（最左最长、互不重叠，按出现顺序去重）。"""
+        if not text or not self.terms:
+            return []
+        self.prepare()
+        lowered = text.lower()
+        candidates = []
+        for start, end, info in self._matcher.iter_matches(lowered):
+            if not _is_boundary(lowered, start, end):
+                continue
+            # 短的全大写缩写（如 GAN、MT）要求大小写一致，避免误匹配普通单词
+            name = info["name"]
+            if len(name) <= 4 and name.isupper() and text[start:end] != name:
+                continue
+            candidates.append((start, -(end - start), end, info))
+        candidates.sort(key=lambda c: (c[0], c[1]))
+        found, seen, last_end = [], set(), 0
+        for start, _, end, info in candidates:
+            if start < last_end:
+                continue
+            last_end = end
+            if info["name"] not in seen:
+                seen.add(info["name"])
+                found.append(info)
+        return found
+
+    def _extract(self, paper_info):
+        title = paper_info.get("title") or ""
+        entities, triples = [], []
+        specific = 0
+        for info in self.match(f"{title}\n{paper_info.get('abstract') or ''}"):
+            entities.append({"name": info["name"], "type": info["type"]})
+            specific += info["specific"]
+            relation = self._relation_for(info, title)
+            if relation and title:
+                triples.append({"head": title, "relation": relation, "tail": info["name"]})
+        return {"entities": entities, "triples": triples}, specific
+
+    def extract(self, paper_info):
+        """对一篇论文的标题 + 摘要做词典抽取，返回 {"entities": [...], "triples": [...]}。"""
+        return self._extract(paper_info)[0]
+
+    def extract_if_confident(self, paper_info, min_hits=None):
+        """
+        命中的不同专有词条不少于 min_hits（默认 GAZETTEER_MIN_HITS）时返回 extract 的结果，
+        否则返回 None（交给 LLM）。泛称即使命中再多也不计数。
+        """
+        result, specific = self._extract(paper_info)
+        return result if specific >= (GAZETTEER_MIN_HITS if min_hits is None else min_hits) else None
+
+
+def default_gazetteer_paths(directory="."):
+    paths = []
+    for pattern in DEFAULT_GAZETTEER_GLOBS:
+        paths.extend(sorted(glob.glob(os.path.join(directory, pattern))))
+    return list(dict.fromkeys(paths))
+
+
+def load_gazetteer(paths=None):
+    """从图谱 JSON 文件构建词典；paths 为空时读取当前目录下默认的图谱文件。"""
+    paths = paths or default_gazetteer_paths()
+    gaz = Gazetteer()
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                gaz.add_kg(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"   ⚠️ 词典跳过 {path}: {e}")
+    gaz.prepare()
+    n_specific = sum(info["specific"] for info in gaz.terms.values())
+    print(
+        f"[*] [词典] 从 {len(paths)} 个图谱文件收集 {len(gaz)} 个词条（专有 {n_specific} 个），"
+        f"按文档频率删去泛称 {len(gaz.common)} 个"
+    )
+    return gaz
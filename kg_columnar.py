@@ -0,0 +1,388 @@
+"""
+图谱的紧凑列式二进制格式：节点、字符串表与边写成 NumPy 数组，加载时可内存映射。
+
+一个图谱存为一个目录（默认 <json 文件名>.kgc/），每列一个 .npy 文件：
+  meta.json                  格式版本、节点/实体/边数、类型表、关系表、实体属性列
+  names.npy                  节点名：UTF-8 编码、以 \\0 分隔后拼接的字节 (uint8)
+  name_offsets.npy           每个节点名在 names.npy 中的起始字节 (int64, 节点数 + 1)
+  node_type.npy              节点类型编码 (int16，类型超过 32767 种时为 int32；对应 meta.types，-1 为只在三元组中出现的节点)
+  indptr.npy                 CSR 行指针 (int32, 节点数 + 1)：头节点 i 的边为 [indptr[i], indptr[i+1])
+  indices.npy                CSR 列：每条边的尾节点 (int32)
+  relation.npy               每条边的关系编码 (int16，关系超过 32767 种时为 int32；对应 meta.relations)
+  count.npy                  每条边的出现次数 (int32)
+  weight.npy                 每条边的权重 (float64，NaN 为无权重)：仅当有三元组带 weight（如相似度边）时存在，
+                             meta.weighted 记录原值为 int 还是 float；weight 必须是数值
+  triple_order.npy           原三元组顺序 -> CSR 中的位置 (int32)，to_json() 按它还原顺序
+  attr_<列名>[...].npy       实体附加属性（arxiv_id 等）：字符串列同 names 的布局，数值列为 int64 / float64，
+                             其余（列表、字典、布尔或类型混杂的列）逐值 JSON 编码后按字符串列存放、加载时解码
+                             (meta.attributes 中记为 "json")；有缺失值时另存 attr_<列名>_present.npy (bool)
+
+节点 id 的顺序：先是 entities 中的实体（按原顺序），再是只出现在三元组中的节点（按首次出现顺序）。
+没有采用 .npz：np.load 对 .npz 中的数组不能内存映射，而单个 .npy 可以（mmap_mode="r"）。
+
+用法：
+  python kg_columnar.py export recursive_kg_1706.03762_k5_d4.json      # 导出并对比加载耗时
+  python kg_columnar.py info recursive_kg_1706.03762_k5_d4.kgc
+
+  from kg_columnar import load_columnar
+  g = load_columnar("recursive_kg_1706.03762_k5_d4.kgc")
+  src, dst = g.edges("cites")                # int32 数组
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+
+try:
+    import numpy as np
+except ImportError:  # 仅列式导出/加载需要
+    np = None
+
+FORMAT_VERSION = 1
+SUFFIX = ".kgc"
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("列式导出/加载需要 numpy：pip install numpy")
+
+
+def _knowledge_graph(data):
+    """接受完整的输出 JSON（含 knowledge_graph）或 {"entities", "triples"} 本身。"""
+    if isinstance(data, dict) and "knowledge_graph" in data:
+        return data["knowledge_graph"]
+    return data
+
+
+def default_columnar_path(json_path):
+    return os.path.splitext(json_path)[0] + SUFFIX
+
+
+# ---------- 字符串列 ----------
+
+def _encode_strings(values):
+    """字符串列表 -> (uint8 字节数组, int64 起始偏移数组)；名字中的 \\0 会被去掉。"""
+    encoded = [(v or "").replace("\0", "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) + 1 for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"\0".join(encoded) + b"\0", dtype=np.uint8) if encoded else np.zeros(0, np.uint8)
+    return blob, offsets
+
+
+def _decode_all(blob):
+    if not len(blob):
+        return []
+    return blob.tobytes().decode("utf-8").split("\0")[:-1]
+
+
+def _decode_one(blob, offsets, i):
+    return blob[offsets[i]:offsets[i + 1] - 1].tobytes().decode("utf-8")
+
+
+# ---------- 导出 ----------
+
+def _attribute_columns(entities):
+    """收集实体的附加属性列（name、type 以外），按首次出现顺序。"""
+    columns = {}
+    for e in entities:
+        for k in e:
+            if k not in ("name", "type"):
+                columns.setdefault(k, None)
+    return list(columns)
+
+
+def _column_kind(values):
+    """列类型：int / float / str；列表、字典、布尔或类型混杂的列为 json（逐值 JSON 编码，原样还原）。"""
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return "int"
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return "float"
+    if all(isinstance(v, str) for v in present):
+        return "str"
+    return "json"
+
+
+def _code_dtype(size):
+    """类型 / 关系编码的整数类型：能放进 int16 时用 int16，否则 int32。"""
+    return np.int16 if size <= np.iinfo(np.int16).max else np.int32
+
+
+def save_columnar(data, path):
+    """把图谱 JSON（或其 knowledge_graph 部分）写成列式目录 path，返回 meta。"""
+    _require_numpy()
+    kg = _knowledge_graph(data)
+    entities = [e for e in kg.get("entities", []) if e.get("name")]
+
+    node_ids = {}
+    names = []
+    type_codes = {}
+    node_types = []
+    entity_rows = []
+    for e in entities:
+        name = e["name"]
+        if name in node_ids:
+            continue
+        node_ids[name] = len(names)
+        names.append(name)
+        node_types.append(type_codes.setdefault(e.get("type") or "", len(type_codes)))
+        entity_rows.append(e)
+    num_entities = len(names)
+
+    relation_codes = {}
+    heads, tails, relations, counts, weights = [], [], [], [], []
+    for t in kg.get("triples", []):
+        head = t.get("head") or t.get("subject")
+        tail = t.get("tail") or t.get("object")
+        if not head or not tail:
+            continue
+        for name in (head, tail):
+            if name not in node_ids:
+                node_ids[name] = len(names)
+                names.append(name)
+                node_types.append(-1)
+        heads.append(node_ids[head])
+        tails.append(node_ids[tail])
+        relations.append(relation_codes.setdefault(t.get("relation") or "", len(relation_codes)))
+        counts.append(t.get("count") or 1)
+        weights.append(t.get("weight"))
+
+    weight_kind = _column_kind(weights) if any(w is not None for w in weights) else None
+    if weight_kind not in (None, "int", "float"):
+        bad = next(w for w in weights if w is not None and _column_kind([w]) not in ("int", "float"))
+        raise ValueError(f"三元组的 weight 必须是数值，遇到 {bad!r}")
+
+    n = len(names)
+    heads = np.asarray(heads, dtype=np.int32)
+    order = np.argsort(heads, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(np.bincount(heads, minlength=n), out=indptr[1:])
+    triple_order = np.empty(len(order), dtype=np.int32)
+    triple_order[order] = np.arange(len(order), dtype=np.int32)
+
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+    def _save(name, array):
+        np.save(os.path.join(path, name + ".npy"), array)
+
+    blob, offsets = _encode_strings(names)
+    _save("names", blob)
+    _save("name_offsets", offsets)
+    _save("node_type", np.asarray(node_types, dtype=_code_dtype(len(type_codes))))
+    _save("indptr", indptr)
+    _save("indices", np.asarray(tails, dtype=np.int32)[order])
+    _save("relation", np.asarray(relations, dtype=_code_dtype(len(relation_codes)))[order])
+    _save("count", np.asarray(counts, dtype=np.int32)[order])
+    _save("triple_order", triple_order)
+    if weight_kind is not None:
+        _save("weight", np.asarray([np.nan if w is None else w for w in weights], dtype=np.float64)[order])
+
+    attributes = {}
+    for col in _attribute_columns(entity_rows):
+        values = [e.get(col) for e in entity_rows]
+        kind = _column_kind(values)
+        if kind == "json":
+            blob, offsets = _encode_strings(["" if v is None else json.dumps(v, ensure_ascii=False) for v in values])
+            _save(f"attr_{col}", blob)
+            _save(f"attr_{col}_offsets", offsets)
+        elif kind == "str":
+            blob, offsets = _encode_strings(["" if v is None else v for v in values])
+            _save(f"attr_{col}", blob)
+            _save(f"attr_{col}_offsets", offsets)
+        else:
+            dtype, missing = (np.int64, 0) if kind == "int" else (np.float64, np.nan)
+            _save(f"attr_{col}", np.asarray([missing if v is None else v for v in values], dtype=dtype))
+        if any(v is None for v in values):
+            _save(f"attr_{col}_present", np.asarray([v is not None for v in values], dtype=bool))
+        attributes[col] = kind
+
+    meta = {
+        "format": "kg-columnar",
+        "version": FORMAT_VERSION,
+        "num_nodes": n,
+        "num_entities": num_entities,
+        "num_edges": int(len(heads)),
+        "types": list(type_codes),
+        "relations": list(relation_codes),
+        "attributes": attributes,
+        "weighted": weight_kind,
+    }
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+# ---------- 加载 ----------
+
+class ColumnarGraph:
+    """列式图谱的只读视图；数组默认内存映射，节点名按需解码。"""
+
+    def __init__(self, path, mmap=True):
+        _require_numpy()
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != "kg-columnar" or self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的列式图谱格式: {path}")
+        self._mmap = "r" if mmap else None
+        self.types = self.meta["types"]
+        self.relations = self.meta["relations"]
+        self.num_nodes = self.meta["num_nodes"]
+        self.num_entities = self.meta["num_entities"]
+        self.num_edges = self.meta["num_edges"]
+        self._names_blob = self._load("names")
+        self._name_offsets = self._load("name_offsets")
+        self.node_type = self._load("node_type")
+        self.indptr = self._load("indptr")
+        self.indices = self._load("indices")
+        self.relation = self._load("relation")
+        self.count = self._load("count")
+        self.weight = self._load("weight") if self.meta.get("weighted") else None
+        self._names = None
+        self._node_ids = None
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, name + ".npy"), mmap_mode=self._mmap)
+
+    # ---------- 节点 ----------
+
+    def name(self, i):
+        if self._names is not None:
+            return self._names[i]
+        return _decode_one(self._names_blob, self._name_offsets, i)
+
+    def names(self):
+        """全部节点名（一次性解码并缓存）。"""
+        if self._names is None:
+            self._names = _decode_all(self._names_blob)
+        return self._names
+
+    def node_id(self, name):
+        """节点名 -> id；不存在返回 None。"""
+        if self._node_ids is None:
+            self._node_ids = {n: i for i, n in enumerate(self.names())}
+        return self._node_ids.get(name)
+
+    def type_of(self, i):
+        code = int(self.node_type[i])
+        return self.types[code] if code >= 0 else None
+
+    def attribute(self, col):
+        """
+        实体属性列：字符串列返回 list（缺失为 None），json 列返回解码后的值 list，
+        数值列返回数组（缺失为 0 / NaN，见 attribute_present）。
+        """
+        kind = self.meta["attributes"][col]
+        if kind not in ("str", "json"):
+            return self._load(f"attr_{col}")
+        values = _decode_all(self._load(f"attr_{col}"))
+        present = self.attribute_present(col)
+        if present is not None:
+            values = [v if p else None for v, p in zip(values, present)]
+        if kind == "json":
+            values = [None if v is None else json.loads(v) for v in values]
+        return values
+
+    def attribute_present(self, col):
+        path = os.path.join(self.path, f"attr_{col}_present.npy")
+        return np.load(path, mmap_mode=self._mmap) if os.path.exists(path) else None
+
+    # ---------- 边 ----------
+
+    def sources(self):
+        """每条边的头节点 (int32)，与 indices 对齐。"""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+
+    def edges(self, relation=None):
+        """(头节点数组, 尾节点数组)；relation 为关系名时只返回该关系的边。"""
+        src, dst = self.sources(), np.asarray(self.indices)
+        if relation is None:
+            return src, dst
+        if relation not in self.relations:
+            return src[:0], dst[:0]
+        mask = np.asarray(self.relation) == self.relations.index(relation)
+        return src[mask], dst[mask]
+
+    def successors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    # ---------- 还原 ----------
+
+    def to_json(self):
+        """还原为 {"entities": [...], "triples": [...]}（顺序与导出时一致）。"""
+        names = self.names()
+        columns = {col: self.attribute(col) for col in self.meta["attributes"]}
+        numeric = {col for col, kind in self.meta["attributes"].items() if kind in ("int", "float")}
+        presents = {col: self.attribute_present(col) for col in self.meta["attributes"]}
+        entities = []
+        for i in range(self.num_entities):
+            e = {"name": names[i], "type": self.types[self.node_type[i]]}
+            for col, values in columns.items():
+                present = presents[col]
+                if present is not None and not present[i]:
+                    continue
+                v = values[i]
+                e[col] = v.item() if col in numeric else v
+            entities.append(e)
+        src = self.sources().tolist()
+        dst = self.indices.tolist()
+        rel = self.relation.tolist()
+        cnt = self.count.tolist()
+        wgt = self.weight.tolist() if self.weight is not None else None
+        as_int = self.meta.get("weighted") == "int"
+        triples = []
+        for pos in np.load(os.path.join(self.path, "triple_order.npy"), mmap_mode=self._mmap).tolist():
+            t = {"head": names[src[pos]], "relation": self.relations[rel[pos]], "tail": names[dst[pos]]}
+            if cnt[pos] > 1:
+                t["count"] = cnt[pos]
+            if wgt is not None and wgt[pos] == wgt[pos]:
+                t["weight"] = int(wgt[pos]) if as_int else wgt[pos]
+            triples.append(t)
+        return {"entities": entities, "triples": triples}
+
+
+def load_columnar(path, mmap=True):
+    """加载列式图谱目录；mmap 为 True 时数组以只读内存映射打开，只有访问到的部分才读入内存。"""
+    return ColumnarGraph(path, mmap=mmap)
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="图谱 JSON 与紧凑列式格式 (.kgc) 互转")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="把图谱 JSON 导出为列式目录")
+    p_export.add_argument("json_file", help="图谱 JSON，如 recursive_kg_1706.03762_k5_d4.json")
+    p_export.add_argument("-o", "--output", default=None, help="输出目录 (默认 <json 文件名>.kgc)")
+    p_info = sub.add_parser("info", help="查看列式图谱的概况")
+    p_info.add_argument("path", help="列式目录")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        out = args.output or default_columnar_path(args.json_file)
+        t0 = time.perf_counter()
+        with open(args.json_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        json_seconds = time.perf_counter() - t0
+        meta = save_columnar(data, out)
+        t0 = time.perf_counter()
+        g = load_columnar(out)
+        g.names()
+        load_seconds = time.perf_counter() - t0
+        json_size, kgc_size = os.path.getsize(args.json_file), _dir_size(out)
+        print(f"✅ 已导出: {out}（节点 {meta['num_nodes']}，边 {meta['num_edges']}）")
+        print(f"   大小: JSON {json_size / 1024:.0f} KB -> 列式 {kgc_size / 1024:.0f} KB")
+        print(f"   加载: json.load {json_seconds * 1000:.1f} ms，列式 {load_seconds * 1000:.1f} ms（含解码全部节点名）")
+    else:
+        g = load_columnar(args.path)
+        print(f"[*] {args.path}: 节点 {g.num_nodes}（实体 {g.num_entities}），边 {g.num_edges}")
+        rel_counts = np.bincount(np.asarray(g.relation), minlength=len(g.relations))
+        for name, c in zip(g.relations, rel_counts.tolist()):
+            print(f"    {name}: {c}")
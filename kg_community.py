@@ -0,0 +1,372 @@
+"""
+社区发现：在引用与署名边（cites、author_of）构成的无向图上划分社区（Louvain / 标签传播），给每个实体写入 community 属性，
+可视化据此给节点着色，或把每个社区折叠成一个节点（大图谱不再是一团乱麻）。
+
+邻接矩阵为 kg_analytics.CitationGraph 的 A + Aᵀ（CSR，无向、去重、无自环）；署名边把作者与论文相连，
+合作作者与其论文自然落在同一社区。只有出现在这些关系（--relation，默认 cites / author_of）边上的节点
+参与划分、写入 community；模型、数据集等只经 LLM 三元组相连的节点没有 community，折叠时保持原样。
+默认方法为 Louvain（模块度优化），全部按轮向量化执行：
+  标签传播（--method lpa 单独可用）：每轮把所有边按 (节点, 邻居标签) 排序聚合出各标签的邻居数，
+    每个节点取邻居最多的标签（当前标签在并列时优先，其余并列随机打破）；
+  局部移动：同样的聚合给出各节点到每个邻居社区的边权，节点移到模块度增益最大的社区；
+  两者每轮都只随机更新一半想改变的节点（半同步），避免二部图（作者-论文）上同步更新来回振荡。
+Louvain 先用标签传播得到细粒度社区，再逐层聚合成社区图做局部移动，最后回到原图微调一遍。
+每轮的开销与边数成线性（一次排序），60 万条边的图约数秒完成；结束后社区按规模从大到小编号（0 为最大），
+并报告模块度 Q 以衡量划分质量。
+
+用法：
+  python kg_community.py recursive_kg_1706.03762_k5_d4.json --html                  # 写回原文件，按社区着色
+  python kg_community.py merged_kg.kg.jsonl -o merged_comm.kg.jsonl --html --collapse
+  python visualize.py recursive_kg_1706.03762_k5_d4.json --collapse-communities       # 已写入社区的图谱折叠显示
+"""
+
+import argparse
+import os
+import time
+
+try:
+    import numpy as np
+    import scipy.sparse as sp
+except ImportError:  # 仅社区发现需要（缺失时由 kg_analytics 报错）
+    np = sp = None
+
+from kg_analytics import CitationGraph, annotate_entities, graph_records, html_path_for, load_graph, write_graph
+
+DEFAULT_RELATIONS = ("cites", "author_of")
+DEFAULT_METHOD = "louvain"
+MAX_ITER = 100
+UPDATE_FRACTION = 0.5
+MODULARITY_TOL = 1e-4
+SEED = 0
+# 按社区编号（规模从大到小）取色，超出调色板的小社区统一为灰色
+PALETTE = (
+    "#5470c6", "#91cc75", "#fac858", "#ee6666", "#73c0de", "#3ba272", "#fc8452", "#9a60b4", "#ea7ccc", "#1f77b4",
+    "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#17becf", "#bcbd22", "#7f7f7f", "#aec7e8",
+)
+OTHER_COLOR = "#cccccc"
+
+
+def community_color(entity):
+    """实体的社区颜色；没有 community 属性时返回 None（沿用类别颜色）。"""
+    c = entity.get("community")
+    if c is None:
+        return None
+    return PALETTE[c] if c < len(PALETTE) else OTHER_COLOR
+
+
+def undirected_adjacency(graph):
+    """CitationGraph 的 A + Aᵀ，0/1 权重。"""
+    S = (graph.A + graph.A.T).tocsr()
+    S.data[:] = 1.0
+    return S
+
+
+def _label_weights(rows, cols, weights, labels, n):
+    """
+    按 (节点, 邻居标签) 聚合边权：返回 (行, 标签, 权重和, 各行在结果中的起点)，结果按行、标签排序。
+    借 CSR 构造完成聚合（按行计数排序 + 行内合并重复列），开销与边数成线性。
+    """
+    M = sp.csr_matrix((weights, (rows, labels[cols])), shape=(n, n))
+    M.sum_duplicates()
+    counts = np.diff(M.indptr)
+    key_rows = np.repeat(np.arange(n, dtype=np.int64), counts)
+    starts = M.indptr[:-1][counts > 0]
+    return key_rows, M.indices.astype(np.int64), M.data, starts
+
+
+def _row_argmax(key_rows, score, starts):
+    """每行 score 最大的那一项在结果中的位置（并列取第一个），以及该最大值；没有任何边时均为空数组。"""
+    if not len(score):
+        return np.zeros(0, dtype=np.int64), score
+    best = np.maximum.reduceat(score, starts)
+    hit = np.flatnonzero(score == np.repeat(best, np.diff(np.r_[starts, len(score)])))
+    hit = hit[np.r_[True, key_rows[hit][1:] != key_rows[hit][:-1]]]
+    return hit, best
+
+
+def _edge_arrays(S):
+    """CSR 的非对角元素 (行, 列, 权重) 与对角线（自环权重）。"""
+    rows = np.repeat(np.arange(S.shape[0], dtype=np.int64), np.diff(S.indptr))
+    cols = S.indices.astype(np.int64)
+    off = rows != cols
+    return rows[off], cols[off], S.data[off], S.diagonal()
+
+
+def label_propagation(S, max_iter=MAX_ITER, update_fraction=UPDATE_FRACTION, seed=SEED):
+    """对称 CSR 邻接 S 上的半同步标签传播，返回 (标签数组, 轮数)。标签为某个成员的节点下标。"""
+    n = S.shape[0]
+    rows, cols, weights, _ = _edge_arrays(S)
+    labels = np.arange(n, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    it = 0
+    for it in range(1, max_iter + 1):
+        key_rows, key_labels, score, starts = _label_weights(rows, cols, weights, labels, n)
+        # 权重为整数：当前标签加 0.5、随机扰动不足 0.5，只在并列时起作用
+        score = score + 0.5 * (key_labels == labels[key_rows]) + 0.25 * rng.random(len(score))
+        hit, _ = _row_argmax(key_rows, score, starts)
+        best = labels.copy()
+        best[key_rows[hit]] = key_labels[hit]
+        pending = best != labels
+        if not pending.any():
+            break
+        update = pending & (rng.random(n) < update_fraction)
+        labels[update] = best[update]
+    return labels, it
+
+
+def _local_moves(S, comm, max_iter, update_fraction, rng, tol=MODULARITY_TOL):
+    """
+    Louvain 的局部移动（向量化）：从划分 comm 出发，每个节点移到使模块度增益最大的邻居社区，返回 (社区数组, 轮数)。
+    节点 i 从社区 a 移到 c 的增益（乘以 m 后）为 k_i,c − k_i · tot_c / 2m，其中 a 的 tot 与 k_i,a 都不含 i 自身；
+    自环（上一层聚合出的社区内部边权）计入度数，不计入 k_i,c。
+    每轮随机更新一部分想移动的节点；一轮的模块度提升不足 tol 时停止（收尾的零星移动几乎不改变划分）。
+    """
+    n = S.shape[0]
+    rows, cols, weights, self_loops = _edge_arrays(S)
+    degree = np.asarray(S.sum(axis=1)).ravel()
+    two_m = degree.sum()
+    comm = comm.copy()
+    if two_m == 0:  # 没有边：模块度无定义，保持输入划分
+        return comm, 0
+    prev_q = None
+    it = 0
+    for it in range(1, max_iter + 1):
+        tot = np.bincount(comm, weights=degree, minlength=n)
+        key_rows, key_comm, k_ic, starts = _label_weights(rows, cols, weights, comm, n)
+        own = key_comm == comm[key_rows]
+        q = ((k_ic[own].sum() + self_loops.sum()) / two_m) - ((tot / two_m) ** 2).sum()
+        if prev_q is not None and q - prev_q < tol:
+            break
+        prev_q = q
+        ki = degree[key_rows]
+        score = k_ic - ki * (tot[key_comm] - own * ki) / two_m
+        # 留在原社区的得分：原社区中没有邻居时 k_i,a = 0
+        stay = -degree * (tot[comm] - degree) / two_m
+        stay[key_rows[own]] = score[own]
+        hit, best = _row_argmax(key_rows, score, starts)
+        better = best > stay[key_rows[hit]] + 1e-12
+        target = comm.copy()
+        target[key_rows[hit][better]] = key_comm[hit][better]
+        pending = target != comm
+        if not pending.any():
+            break
+        update = pending & (rng.random(n) < update_fraction)
+        comm[update] = target[update]
+    return comm, it
+
+
+def louvain(S, max_iter=MAX_ITER, update_fraction=UPDATE_FRACTION, seed=SEED, max_levels=10):
+    """
+    Louvain 式模块度优化：第一层用标签传播得到细粒度的初始社区（比从单点出发的局部移动快，且很少跨真实社区），
+    此后每层把社区聚合成一个节点（Pᵀ S P，稀疏）并在聚合图上做局部移动，直到某一层不再合并；
+    达到 max_levels 时最后一层的划分同样并入结果；
+    最后在原图上从所得划分出发再做一遍局部移动，让被早期聚合错分的节点归位。
+    返回 (社区数组（原节点下标）, 各层轮数之和)。
+    """
+    rng = np.random.default_rng(seed)
+    S0 = S
+    membership = np.arange(S.shape[0], dtype=np.int64)
+    comm, iterations = label_propagation(S, max_iter, update_fraction, seed)
+    for _ in range(max_levels):
+        _, comm = np.unique(comm, return_inverse=True)
+        k = int(comm.max()) + 1 if len(comm) else 0
+        if k == S.shape[0]:
+            break
+        membership = comm[membership]
+        P = sp.csr_matrix((np.ones(len(comm)), (np.arange(len(comm)), comm)), shape=(len(comm), k))
+        S = (P.T @ S @ P).tocsr()
+        comm, it = _local_moves(S, np.arange(k, dtype=np.int64), max_iter, update_fraction, rng)
+        iterations += it
+    # 并入最后一层的划分：break 时 comm 是当前聚合节点的一一重编号（无合并），用尽 max_levels 时是最后一层局部移动的结果
+    membership = comm[membership]
+    membership, it = _local_moves(S0, membership, max_iter, update_fraction, rng)
+    return membership, iterations + it
+
+
+METHODS = {"louvain": louvain, "lpa": label_propagation}
+
+
+def relabel_by_size(labels):
+    """把标签重新编号为 0..k-1，0 为成员最多的社区（同规模按首次出现），返回 (新标签, 各社区规模)。"""
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    sizes = np.bincount(inverse)
+    order = np.lexsort((first, -sizes))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank[inverse], sizes[order]
+
+
+def modularity(S, labels):
+    """无向图划分的模块度 Q = Σ_c [内部边权 / 2m − (度和_c / 2m)²]。"""
+    two_m = S.data.sum()
+    if two_m == 0:
+        return 0.0
+    rows = np.repeat(np.arange(S.shape[0]), np.diff(S.indptr))
+    internal = S.data[labels[rows] == labels[S.indices]].sum()
+    degree_sums = np.bincount(labels, weights=np.asarray(S.sum(axis=1)).ravel())
+    return float(internal / two_m - ((degree_sums / two_m) ** 2).sum())
+
+
+def detect_communities(graph, method=DEFAULT_METHOD, max_iter=MAX_ITER, seed=SEED):
+    """对 CitationGraph 做社区发现（method 为 louvain 或 lpa），返回 (社区编号数组（下标对应 graph.names）, 统计)。"""
+    S = undirected_adjacency(graph)
+    labels, iterations = METHODS[method](S, max_iter=max_iter, seed=seed)
+    communities, sizes = relabel_by_size(labels)
+    stats = {
+        "method": method,
+        "nodes": graph.num_nodes,
+        "edges": S.nnz // 2,
+        "communities": len(sizes),
+        "largest": sizes[:10].tolist(),
+        "singletons": int((sizes == 1).sum()),
+        "iterations": iterations,
+        "modularity": round(modularity(S, communities), 4),
+    }
+    return communities, stats
+
+
+def annotate_communities(kg, relations=DEFAULT_RELATIONS):
+    """对 KnowledgeGraph 做社区发现并把 community 写进其实体记录，返回统计。"""
+    graph = CitationGraph.from_triples(kg.iter_triples(), relations)
+    communities, stats = detect_communities(graph)
+    for _ in annotate_entities(kg.iter_entities(), graph, {"community": communities}):
+        pass
+    return stats
+
+
+def print_community_stats(stats):
+    print(
+        f"   社区 {stats['communities']} 个（单节点 {stats['singletons']} 个），"
+        f"最大的规模 {stats['largest']}，模块度 Q = {stats['modularity']}（{stats['method']}，{stats['iterations']} 轮）"
+    )
+
+
+def collapse_communities(data):
+    """
+    把带 community 属性的实体按社区折叠：每个多于一个成员的社区成为一个节点，没有 community 的实体原样保留
+    （名称取社区内连边最多的成员，类型取其类型，带 community 与 members），
+    连线映射到折叠后的节点，社区内部的连线丢弃，同一 (头, 关系, 尾) 只保留一条并记 count。
+    返回与图谱 JSON 结构相同的新 dict，可直接交给 visualize.generate_html。
+    """
+    kg = graph_records(data)
+    member_of, members, order = {}, {}, []
+    for e in kg["entities"]:
+        name = (e.get("name") or "").strip()
+        c = e.get("community")
+        if not name or c is None or name in member_of:
+            continue
+        member_of[name] = c
+        if c not in members:
+            members[c] = []
+            order.append(c)
+        members[c].append(e)
+    collapsed = {c for c in order if len(members[c]) > 1}
+
+    degree = {}
+    links = {}
+    for t in kg["triples"]:
+        head = (t.get("head") or t.get("subject") or "").strip()
+        tail = (t.get("tail") or t.get("object") or "").strip()
+        if not head or not tail:
+            continue
+        h, tl = member_of.get(head), member_of.get(tail)
+        for name, c in ((head, h), (tail, tl)):
+            if c in collapsed:
+                degree[name] = degree.get(name, 0) + 1
+        h = ("community", h) if h in collapsed else head
+        tl = ("community", tl) if tl in collapsed else tail
+        if h == tl:
+            continue
+        key = (h, t.get("relation", ""), tl)
+        links[key] = links.get(key, 0) + 1
+
+    node_name = {}
+    entities = []
+    for e in kg["entities"]:
+        name = (e.get("name") or "").strip()
+        c = member_of.get(name)
+        if c not in collapsed:
+            entities.append(e)
+        elif c not in node_name:
+            group = members[c]
+            rep = max(group, key=lambda m: degree.get(m["name"].strip(), 0))
+            node_name[c] = f"{rep['name'].strip()} 等 {len(group)} 个"
+            entities.append({"name": node_name[c], "type": rep.get("type", ""), "community": c, "members": len(group)})
+
+    def _name(end):
+        return node_name[end[1]] if isinstance(end, tuple) else end
+
+    triples = []
+    for (h, relation, tl), count in links.items():
+        record = {"head": _name(h), "relation": relation, "tail": _name(tl)}
+        if count > 1:
+            record["count"] = count
+        triples.append(record)
+    out = {k: v for k, v in data.items() if k not in ("knowledge_graph", "related_papers")}
+    seed = out.get("paper_metadata") or {}
+    if seed.get("authors"):  # 已折叠进社区的种子作者不再单独成点
+        out["paper_metadata"] = dict(seed, authors=[a for a in seed["authors"] if member_of.get(a) not in collapsed])
+    out["knowledge_graph"] = {"entities": entities, "triples": triples}
+    return out
+
+
+def community_file(path, output=None, relations=DEFAULT_RELATIONS, method=DEFAULT_METHOD, max_iter=MAX_ITER,
+                   seed=SEED, write=True):
+    """
+    对 path（.json / .kg.jsonl / .kgc 目录）做社区发现并把 community 写回 output（默认覆盖 path），
+    返回写出的路径；write 为 False 时只计算并打印统计。
+    """
+    output = output or path
+    start = time.time()
+    data, graph = load_graph(path, relations)
+    load_seconds = time.time() - start
+
+    start = time.time()
+    communities, stats = detect_communities(graph, method=method, max_iter=max_iter, seed=seed)
+    print(
+        f"[*] [社区] {path}: 节点 {stats['nodes']}，边 {stats['edges']}（{'/'.join(relations)}），"
+        f"读取 {load_seconds:.2f} 秒，计算 {time.time() - start:.2f} 秒"
+    )
+    print_community_stats(stats)
+    if not write:
+        return None
+
+    kg = graph_records(data)
+    write_graph(data, output, entities=annotate_entities(kg["entities"], graph, {"community": communities}))
+    print(f"✅ community 已写回: {output}")
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="社区发现：在引用与署名边上做 Louvain / 标签传播，给实体写入 community 属性")
+    parser.add_argument("path", help="图谱 JSON、流式 .kg.jsonl 或列式 .kgc 目录")
+    parser.add_argument("-o", "--output", default=None, help="写出路径 (默认覆盖输入文件)")
+    parser.add_argument(
+        "--relation", action="append", default=None,
+        help="参与计算的关系，可重复 (默认 " + ", ".join(DEFAULT_RELATIONS) + ")",
+    )
+    parser.add_argument(
+        "--method", choices=list(METHODS), default=DEFAULT_METHOD,
+        help="louvain：模块度优化（默认，划分质量高）；lpa：标签传播（更快，稀疏图上社区偏碎）",
+    )
+    parser.add_argument("--max-iter", type=int, default=MAX_ITER, help=f"每层最多迭代轮数 (默认 {MAX_ITER})")
+    parser.add_argument("--seed", type=int, default=SEED, help=f"打破并列用的随机种子 (默认 {SEED})")
+    parser.add_argument("--no-write", action="store_true", help="只计算并打印，不写回")
+    parser.add_argument("--html", action="store_true", help="写回后重新生成可视化 HTML（节点按社区着色）")
+    parser.add_argument(
+        "--collapse", action="store_true",
+        help="与 --html 同用：每个社区折叠为一个节点（不在 --relation 边上的节点没有 community，不折叠）",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"❌ 找不到文件: {args.path}")
+        raise SystemExit(1)
+    written = community_file(
+        args.path, args.output, relations=tuple(args.relation or DEFAULT_RELATIONS),
+        method=args.method, max_iter=args.max_iter, seed=args.seed, write=not args.no_write,
+    )
+    if args.html and written and not os.path.isdir(written):
+        from visualize import generate_html  # 仅 --html 时需要
+
+        generate_html(written, html_path_for(written), collapse=args.collapse)
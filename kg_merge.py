@@ -0,0 +1,279 @@
+"""
+把多份图谱输出（recursive_kg_*.json、top_citations_kg_*.json、流式 .kg.jsonl、corpus_kg_*.json …）合并成一份去重的图谱，
+并报告各文件之间的重合情况。
+
+- 实体统一：带身份键的论文实体按 paper_identity.identity_keys（S2 id、去版本号的 arXiv id、DOI）识别，
+  任一身份键相同即为同一实体（各文件里重名论文的 "[arxiv:…]" 后缀不影响）；没有身份键的实体才按
+  规范化名称（忽略大小写与多余空白）识别；同一实体取第一次出现的名称与类型，属性只补缺；
+  不同实体恰好同名时，后出现者的名称附加身份键区分；
+- 三元组去重：两端映射到合并后的节点后按 (头, 关系, 尾) 哈希去重，count 与 weight（相似度边）取各文件中的最大值；
+- 相关论文经 paper_identity.PaperIndex 去重。
+逐个文件读取（.kg.jsonl 逐行读取），每条记录只做常数次字典操作，总耗时与输入总量成线性，
+常驻内存只有合并结果本身。
+
+用法：
+  python kg_merge.py recursive_kg_*.json top_citations_kg_*.json -o merged_kg.json
+  python kg_merge.py -o merged_kg --stream --html      # 不给文件时合并当前目录下的默认图谱输出
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from kg_stream import STREAM_SUFFIX, is_kg_stream, open_kg, stream_path_for, write_kg_stream
+from paper_identity import PaperIndex, identity_keys, merge_paper
+
+DEFAULT_MERGE_GLOBS = ("top_citations_kg_*.json", "recursive_kg_*.json", "corpus_kg_*.json", "*.kg.jsonl")
+DEFAULT_OUTPUT = "merged_kg.json"
+# 三元组覆盖文件数的分桶（报告用）：(下限, 上限, 标签)
+SUPPORT_BUCKETS = ((1, 1, "1"), (2, 2, "2"), (3, 4, "3-4"), (5, 9, "5-9"), (10, None, "10+"))
+
+
+def _name_key(name):
+    return "name:" + " ".join(name.split()).casefold()
+
+
+def _support_label(n_files):
+    for lo, hi, label in SUPPORT_BUCKETS:
+        if n_files >= lo and (hi is None or n_files <= hi):
+            return label
+
+
+class KGMerger:
+    def __init__(self):
+        self._keys = {}        # s2:… / arxiv:… / doi:… / name:… -> 节点 id
+        self._names = []       # 节点 id -> 输出名称
+        self._name_owner = {}  # 输出名称 -> 节点 id（保证输出名称唯一）
+        self._entities = {}    # 节点 id -> 实体记录，按首次出现顺序
+        self._triples = {}     # (头 id, 关系, 尾 id) -> [三元组记录, 覆盖文件数, 最后出现的文件序号]
+        self.papers = PaperIndex()
+        self.seed = None
+        self.files = []        # 每个文件的统计
+
+    def _node(self, name, id_keys=()):
+        """名称（及可选的身份键列表）对应的合并后节点 id；有身份键时只按身份键识别，任一键命中即为同一节点。"""
+        name_key = _name_key(name)
+        if id_keys:
+            nid = next((self._keys[k] for k in id_keys if k in self._keys), None)
+        else:
+            nid = self._keys.get(name_key)
+        if nid is None:
+            nid = len(self._names)
+            out = name
+            if out in self._name_owner:
+                out = f"{name} [{id_keys[0] if id_keys else nid}]"
+            self._names.append(out)
+            self._name_owner[out] = nid
+        for key in id_keys or (name_key,):
+            self._keys.setdefault(key, nid)
+        self._keys.setdefault(name_key, nid)
+        return nid
+
+    def add(self, data, label=""):
+        """合并一份图谱（json.load 或 open_kg 的结果），返回该文件的统计。"""
+        fidx = len(self.files)
+        kg = data.get("knowledge_graph") or {}
+        seed = data.get("paper_metadata")
+        if seed:
+            if self.seed is None:
+                self.seed = seed
+            self.papers.add(dict(seed))
+        for p in data.get("related_papers") or []:
+            self.papers.add(p)
+
+        local = {}  # 本文件中的名称 -> 节点 id
+        stats = {"file": label, "entities": 0, "new_entities": 0, "triples": 0, "new_triples": 0}
+        entities = self._entities
+        for e in kg.get("entities") or []:
+            name = (e.get("name") or "").strip()
+            if not name:
+                continue
+            nid = local[name] = self._node(name, identity_keys(e))
+            stats["entities"] += 1
+            record = entities.get(nid)
+            if record is None:
+                record = entities[nid] = {"name": self._names[nid], "type": e.get("type", "")}
+                record.update((k, v) for k, v in e.items() if k not in ("name", "type"))
+                stats["new_entities"] += 1
+            else:
+                merge_paper(record, e)
+
+        names, triples = self._names, self._triples
+        for t in kg.get("triples") or []:
+            head = (t.get("head") or t.get("subject") or "").strip()
+            tail = (t.get("tail") or t.get("object") or "").strip()
+            if not head or not tail:
+                continue
+            h = local.get(head)
+            if h is None:
+                h = local[head] = self._node(head)
+            tl = local.get(tail)
+            if tl is None:
+                tl = local[tail] = self._node(tail)
+            relation = t.get("relation", "")
+            count = t.get("count") or 1
+            weight = t.get("weight")
+            stats["triples"] += 1
+            entry = triples.get((h, relation, tl))
+            if entry is None:
+                record = {"head": names[h], "relation": relation, "tail": names[tl]}
+                if count > 1:
+                    record["count"] = count
+                if weight is not None:
+                    record["weight"] = weight
+                triples[h, relation, tl] = [record, 1, fidx]
+                stats["new_triples"] += 1
+                continue
+            if entry[2] != fidx:
+                entry[1] += 1
+                entry[2] = fidx
+            if count > entry[0].get("count", 1):
+                entry[0]["count"] = count
+            if weight is not None and weight > entry[0].get("weight", weight - 1):
+                entry[0]["weight"] = weight
+        self.files.append(stats)
+        return stats
+
+    def add_file(self, path):
+        if is_kg_stream(path):
+            data = open_kg(path)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        return self.add(data, label=path)
+
+    # ---------- 输出 ----------
+
+    def iter_entities(self):
+        return iter(self._entities.values())
+
+    def iter_triples(self):
+        return (entry[0] for entry in self._triples.values())
+
+    def related_papers(self):
+        seed_pid = self.papers.find(self.seed) if self.seed else None
+        return [self.papers.get(pid) for pid in self.papers.ids() if pid != seed_pid]
+
+    def stats(self):
+        """合并统计：输入 / 去重后的实体与三元组数、三元组覆盖文件数分布、各文件新增比例。"""
+        n_in_entities = sum(f["entities"] for f in self.files)
+        n_in_triples = sum(f["triples"] for f in self.files)
+        support = {label: 0 for _, _, label in SUPPORT_BUCKETS}
+        relations = {}
+        for record, n_files, _ in self._triples.values():
+            support[_support_label(n_files)] += 1
+            relations[record["relation"]] = relations.get(record["relation"], 0) + 1
+        return {
+            "files": len(self.files),
+            "input_entities": n_in_entities,
+            "unique_entities": len(self._entities),
+            "input_triples": n_in_triples,
+            "unique_triples": len(self._triples),
+            "duplicate_triple_rate": round(1 - len(self._triples) / n_in_triples, 4) if n_in_triples else 0.0,
+            "shared_triples": sum(1 for _, n_files, _ in self._triples.values() if n_files > 1),
+            "triples_by_file_support": support,
+            "triples_by_relation": dict(sorted(relations.items(), key=lambda kv: -kv[1])),
+            "per_file": self.files,
+        }
+
+    def output_data(self):
+        return {
+            "paper_metadata": self.seed or {},
+            "related_papers": None,
+            "merged_from": [f["file"] for f in self.files],
+            "merge_stats": None,
+            "knowledge_graph": None,
+        }
+
+
+def default_merge_paths(directory=".", exclude=()):
+    paths = []
+    for pattern in DEFAULT_MERGE_GLOBS:
+        paths.extend(sorted(glob.glob(os.path.join(directory, pattern))))
+    skip = {os.path.abspath(p) for p in exclude}
+    return [p for p in dict.fromkeys(paths) if os.path.abspath(p) not in skip]
+
+
+def output_path_for(output, stream=False):
+    """实际写出的路径与不含扩展名的基础名：stream 时 merged_kg.json -> merged_kg.kg.jsonl。"""
+    for suffix in (STREAM_SUFFIX, ".json"):
+        if output.endswith(suffix):
+            output = output[:-len(suffix)]
+            break
+    return (stream_path_for(output) if stream else output + ".json"), output
+
+
+def merge_files(paths, output=DEFAULT_OUTPUT, stream=False, html=False):
+    """合并 paths 中的图谱并写出（stream 为 True 时写 .kg.jsonl），返回合并统计。"""
+    output, base_name = output_path_for(output, stream)
+    start = time.time()
+    merger = KGMerger()
+    for i, path in enumerate(paths, 1):
+        stats = merger.add_file(path)
+        if len(paths) <= 20 or i % 100 == 0 or i == len(paths):
+            print(
+                f"[*] [合并] ({i}/{len(paths)}) {path}: 三元组 {stats['triples']}，新增 {stats['new_triples']}"
+            )
+    stats = merger.stats()
+    stats["seconds"] = round(time.time() - start, 3)
+
+    output_data = merger.output_data()
+    output_data["merge_stats"] = stats
+    if stream:
+        write_kg_stream(output, output_data, merger.iter_entities(), merger.iter_triples(), merger.related_papers())
+    else:
+        output_data["related_papers"] = merger.related_papers()
+        output_data["knowledge_graph"] = {
+            "entities": list(merger.iter_entities()),
+            "triples": list(merger.iter_triples()),
+        }
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(output_data, f, ensure_ascii=False, indent=2)
+
+    print(
+        f"\n✅ 已合并 {stats['files']} 个文件 -> {output}（{stats['seconds']} 秒）\n"
+        f"   实体 {stats['input_entities']} -> {stats['unique_entities']}，"
+        f"三元组 {stats['input_triples']} -> {stats['unique_triples']}"
+        f"（重复 {stats['duplicate_triple_rate']:.1%}，出现在多个文件中的 {stats['shared_triples']} 条）"
+    )
+    print(f"   三元组按覆盖文件数: {stats['triples_by_file_support']}")
+    least_new = sorted(stats["per_file"], key=lambda f: f["new_triples"] / f["triples"] if f["triples"] else 1)
+    for f in least_new[:5]:
+        if f["triples"]:
+            print(f"   与先前文件重合 {1 - f['new_triples'] / f['triples']:.0%}: {f['file']}")
+    if html:
+        from visualize import generate_html  # 仅 --html 时需要
+
+        generate_html(output, base_name + ".html")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="合并多份图谱 JSON / .kg.jsonl 为一份去重图谱，并报告重合统计")
+    parser.add_argument(
+        "files", nargs="*",
+        help="要合并的图谱文件（支持通配符；不给时合并当前目录下的 " + " ".join(DEFAULT_MERGE_GLOBS) + "）",
+    )
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help=f"输出文件 (默认 {DEFAULT_OUTPUT})")
+    parser.add_argument("--stream", action="store_true", help="输出流式 JSONL（.kg.jsonl）而不是缩进 JSON")
+    parser.add_argument("--html", action="store_true", help="同时生成可视化 HTML")
+    parser.add_argument("--stats-json", default=None, help="把合并统计另存为 JSON")
+    args = parser.parse_args()
+
+    paths = []
+    for pattern in args.files:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    paths = list(dict.fromkeys(paths)) or default_merge_paths(exclude=[output_path_for(args.output, args.stream)[0]])
+    if not paths:
+        print("❌ 没有可合并的图谱文件")
+        raise SystemExit(1)
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ 找不到文件: {', '.join(missing)}")
+        raise SystemExit(1)
+    merge_stats = merge_files(paths, args.output, stream=args.stream, html=args.html)
+    if args.stats_json:
+        with open(args.stats_json, "w", encoding="utf-8") as f:
+            json.dump(merge_stats, f, ensure_ascii=False, indent=2)
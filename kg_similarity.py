@@ -0,0 +1,200 @@
+"""
+引用相似度：从 cites 边找出彼此没有直接引用、但关系紧密的论文，写成带权重的三元组。
+
+A 为 kg_analytics.CitationGraph 的邻接矩阵（A[i, j] = 1 表示 i 引用 j）：
+  co_cited_with   同被引（AᵀA）：(j, k) 的权重为同时引用 j 与 k 的论文数
+  coupled_with    文献耦合（AAᵀ）：(i, l) 的权重为 i 与 l 共同引用的论文数
+乘积按行分块计算：每块先用出入度估算乘积规模（每块约 block_nnz 个非零元），
+块内去掉对角线、低于 min_weight 的元素并只保留每行前 top_n 个，从不构造完整（更不会是稠密的）乘积矩阵。
+被引（或引用）超过 max_degree 篇的论文作为共同邻居时不计入：这类论文几乎与所有论文都“相关”，
+却让乘积规模按其度数的平方膨胀（一篇被引 5 万次的论文单独就贡献 25 亿个论文对）。
+measure="cosine" 时权重为 Salton 余弦：共同数 / sqrt(deg_j · deg_k)，排序与阈值仍按共同数。
+每个无序论文对只输出一条三元组 {"head", "relation", "tail", "weight"}，
+头尾按节点在图中出现的先后排列；重复运行时先移除旧的相似度三元组。
+
+用法：
+  python kg_similarity.py recursive_kg_1706.03762_k5_d4.json                    # 写回原文件
+  python kg_similarity.py merged_kg.kg.jsonl --kind co-citation --top 10 --min-weight 3
+  python kg_similarity.py recursive_kg_1706.03762_k5_d4.kgc -o similar.json --measure cosine --html
+"""
+
+import argparse
+import itertools
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:  # 仅相似度计算需要（scipy 由 kg_analytics 检查）
+    np = None
+
+from kg_analytics import DEFAULT_RELATIONS, graph_records, html_path_for, load_graph, write_graph
+
+CO_CITED = "co_cited_with"
+COUPLED = "coupled_with"
+SIMILARITY_RELATIONS = (CO_CITED, COUPLED)
+KINDS = {"co-citation": (CO_CITED,), "coupling": (COUPLED,), "both": (CO_CITED, COUPLED)}
+DEFAULT_TOP_N = 5
+DEFAULT_MIN_WEIGHT = 2
+DEFAULT_MAX_DEGREE = 1000
+BLOCK_NNZ = 2_000_000  # 每块乘积的估算非零元数
+
+
+def _row_blocks(cost, budget):
+    """按每行的估算开销把行切成连续块，每块开销约不超过 budget（单行超出时独占一块）。"""
+    ends = np.cumsum(cost)
+    start = 0
+    while start < len(cost):
+        base = ends[start - 1] if start else 0
+        stop = max(int(np.searchsorted(ends, base + budget, side="right")), start + 1)
+        yield start, stop
+        start = stop
+
+
+def _top_per_row(block, offset, top_n, min_weight):
+    """块内每行去对角线、按阈值过滤后保留权重最大的 top_n 个，返回 (行, 列, 权重) 数组（行为全局下标）。"""
+    block = block.tocoo()
+    rows = block.row.astype(np.int64) + offset
+    cols = block.col.astype(np.int64)
+    weights = block.data
+    keep = (rows != cols) & (weights >= min_weight)
+    rows, cols, weights = rows[keep], cols[keep], weights[keep]
+    order = np.lexsort((cols, -weights, rows))  # 行内按权重降序，同权重按列
+    rows, cols, weights = rows[order], cols[order], weights[order]
+    starts = np.searchsorted(rows, rows, side="left")
+    keep = np.arange(len(rows)) - starts < top_n
+    return rows[keep], cols[keep], weights[keep]
+
+
+def similar_pairs(M, top_n=DEFAULT_TOP_N, min_weight=DEFAULT_MIN_WEIGHT, max_degree=DEFAULT_MAX_DEGREE,
+                  block_nnz=BLOCK_NNZ):
+    """
+    对 S = M · Mᵀ（M 为 CSR 0/1 矩阵）求每行前 top_n 个非对角元素，
+    返回无序对 (i, j, 共同数)：i < j，两端任一方的前 top_n 中出现即保留。
+    M 中非零元多于 max_degree 的列（共同邻居）不参与计算；max_degree 为 None 时不限。
+    """
+    n = M.shape[0]
+    col_deg = np.bincount(M.indices, minlength=M.shape[1]).astype(np.int64)
+    if max_degree is not None and (col_deg > max_degree).any():
+        M = M.copy()
+        M.data[col_deg[M.indices] > max_degree] = 0
+        M.eliminate_zeros()
+        col_deg[col_deg > max_degree] = 0
+    if n == 0 or M.nnz == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    MT = M.T.tocsr()
+    # 第 i 行乘积的非零元不超过 sum(第 i 行各列的列度数)
+    cost = np.asarray(M @ col_deg, dtype=np.int64) + 1
+    parts = []
+    for start, stop in _row_blocks(cost, block_nnz):
+        block = M[start:stop] @ MT
+        parts.append(_top_per_row(block, start, top_n, min_weight))
+    rows = np.concatenate([p[0] for p in parts])
+    cols = np.concatenate([p[1] for p in parts])
+    weights = np.concatenate([p[2] for p in parts])
+    lo, hi = np.minimum(rows, cols), np.maximum(rows, cols)
+    _, first = np.unique(lo * n + hi, return_index=True)
+    return lo[first], hi[first], weights[first]
+
+
+def co_citation(graph, **kwargs):
+    """同被引对：S = AᵀA。"""
+    return similar_pairs(graph.A.T.tocsr(), **kwargs)
+
+
+def coupling(graph, **kwargs):
+    """文献耦合对：S = AAᵀ。"""
+    return similar_pairs(graph.A, **kwargs)
+
+
+def similarity_triples(graph, kinds=(CO_CITED, COUPLED), measure="count", **kwargs):
+    """计算并逐条产出相似度三元组；kwargs 传给 similar_pairs（top_n、min_weight、max_degree、block_nnz）。"""
+    in_deg, out_deg = graph.degrees()
+    for relation in kinds:
+        if relation == CO_CITED:
+            heads, tails, shared = co_citation(graph, **kwargs)
+            deg = in_deg
+        else:
+            heads, tails, shared = coupling(graph, **kwargs)
+            deg = out_deg
+        if measure == "cosine":
+            weights = np.round(shared / np.sqrt(deg[heads] * deg[tails]), 4)
+        else:
+            weights = shared.astype(np.int64)
+        names = graph.names
+        for h, t, w in zip(heads.tolist(), tails.tolist(), weights.tolist()):
+            yield {"head": names[h], "relation": relation, "tail": names[t], "weight": w}
+
+
+def similarity_file(path, output=None, kinds=(CO_CITED, COUPLED), measure="count", top_n=DEFAULT_TOP_N,
+                    min_weight=DEFAULT_MIN_WEIGHT, max_degree=DEFAULT_MAX_DEGREE, block_nnz=BLOCK_NNZ, write=True):
+    """
+    对 path（.json / .kg.jsonl / .kgc 目录）计算相似度三元组并写回 output（默认覆盖 path），返回写出的路径。
+    原有的 co_cited_with / coupled_with 三元组会被替换；write 为 False 时只计算并打印统计。
+    """
+    output = output or path
+    start = time.time()
+    data, graph = load_graph(path, DEFAULT_RELATIONS)
+    load_seconds = time.time() - start
+
+    start = time.time()
+    new_triples = list(similarity_triples(
+        graph, kinds, measure, top_n=top_n, min_weight=min_weight, max_degree=max_degree, block_nnz=block_nnz
+    ))
+    counts = {relation: 0 for relation in kinds}
+    for t in new_triples:
+        counts[t["relation"]] += 1
+    print(
+        f"[*] [相似度] {path}: 论文 {graph.num_nodes}，引用边 {graph.num_edges}，"
+        f"读取 {load_seconds:.2f} 秒，计算 {time.time() - start:.2f} 秒；"
+        + "，".join(f"{relation} {c} 条" for relation, c in counts.items())
+        + f"（每篇前 {top_n}，共同数 ≥ {min_weight}）"
+    )
+    for t in sorted(new_triples, key=lambda t: -t["weight"])[:5]:
+        print(f"   {t['weight']}  {t['head']}  ~{t['relation']}~  {t['tail']}")
+    if not write:
+        return None
+
+    kg = graph_records(data)
+    kept = (t for t in kg["triples"] if t.get("relation") not in SIMILARITY_RELATIONS)
+    write_graph(data, output, triples=itertools.chain(kept, new_triples))
+    print(f"✅ 相似度三元组已写回: {output}")
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="同被引 / 文献耦合相似度：稀疏矩阵乘积求每篇论文最相似的前 N 篇")
+    parser.add_argument("path", help="图谱 JSON、流式 .kg.jsonl 或列式 .kgc 目录")
+    parser.add_argument("-o", "--output", default=None, help="写出路径 (默认覆盖输入文件)")
+    parser.add_argument("--kind", choices=list(KINDS), default="both", help="相似度类型 (默认 both)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_N, help=f"每篇论文最多保留的相似论文数 (默认 {DEFAULT_TOP_N})")
+    parser.add_argument(
+        "--min-weight", type=int, default=DEFAULT_MIN_WEIGHT,
+        help=f"最少共同引用 / 被引论文数 (默认 {DEFAULT_MIN_WEIGHT})",
+    )
+    parser.add_argument(
+        "--measure", choices=["count", "cosine"], default="count",
+        help="weight 取共同数 (count，默认) 或 Salton 余弦 (cosine)",
+    )
+    parser.add_argument(
+        "--max-degree", type=int, default=DEFAULT_MAX_DEGREE,
+        help=f"共同邻居的度数上限，超过的论文不计入共同数 (默认 {DEFAULT_MAX_DEGREE}，0 为不限)",
+    )
+    parser.add_argument("--block-nnz", type=int, default=BLOCK_NNZ, help=f"分块乘积的每块规模 (默认 {BLOCK_NNZ})")
+    parser.add_argument("--no-write", action="store_true", help="只计算并打印，不写回")
+    parser.add_argument("--html", action="store_true", help="写回后重新生成可视化 HTML")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"❌ 找不到文件: {args.path}")
+        raise SystemExit(1)
+    written = similarity_file(
+        args.path, args.output, kinds=KINDS[args.kind], measure=args.measure, top_n=args.top,
+        min_weight=args.min_weight, max_degree=args.max_degree or None, block_nnz=args.block_nnz,
+        write=not args.no_write,
+    )
+    if args.html and written and not os.path.isdir(written):
+        from visualize import generate_html  # 仅 --html 时需要
+
+        generate_html(written, html_path_for(written))
@@ -0,0 +1,188 @@
+"""
+图谱输出的流式格式（JSON Lines）：边生成边写，消费方逐行读取，内存占用不随图谱规模增长。
+
+文件（默认 <名称>.kg.jsonl）逐行为一个 JSON 值：
+  第 1 行    清单 manifest：{"format": "kg-jsonl", "version": 1, "paper_metadata": ..., 其他标量字段}
+  分节标记   {"__section__": "related_papers" | "entities" | "triples"}，其后每行一条记录
+  最后一行   {"__section__": "end", "counts": {"related_papers": N, "entities": N, "triples": N}}
+分节顺序固定为 related_papers、entities、triples（可视化要求节点先于连线）。
+清单之外的字段与普通图谱 JSON 相同，open_kg 返回的结构也与 json.load 的结果用法一致：
+  data["paper_metadata"]、data["knowledge_graph"]["triples"] ...
+只是各分节是可重复遍历的迭代器（每次遍历重新读文件），不会整体载入内存。
+
+用法：
+  with KGStreamWriter("x.kg.jsonl", {"paper_metadata": seed, "top_k": 5}) as w:
+      w.write_section("related_papers", papers)
+      w.write_section("entities", kg.iter_entities())
+      w.write_section("triples", kg.iter_triples())
+
+  data = open_kg("x.kg.jsonl")
+  for t in data["knowledge_graph"]["triples"]: ...
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+FORMAT = "kg-jsonl"
+FORMAT_VERSION = 1
+STREAM_SUFFIX = ".kg.jsonl"
+SECTIONS = ("related_papers", "entities", "triples")
+SECTION_KEY = "__section__"
+SECTION_PREFIX = '{"%s": ' % SECTION_KEY
+
+
+def stream_path_for(base_name):
+    return base_name + STREAM_SUFFIX
+
+
+def is_kg_stream(path):
+    """path 是否为流式图谱文件（按后缀或首行清单判断）。"""
+    if path.endswith(STREAM_SUFFIX):
+        return True
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            first = f.readline()
+        return json.loads(first).get("format") == FORMAT
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+class KGStreamWriter:
+    """逐条写入流式图谱；先写到临时文件，close() 时写结束标记并替换目标文件。"""
+
+    def __init__(self, path, manifest):
+        self.path = path
+        self._tmp = path + ".tmp"
+        self._f = open(self._tmp, "w", encoding="utf-8")
+        self.counts = {}
+        self._write(dict(manifest, format=FORMAT, version=FORMAT_VERSION))
+
+    def _write(self, value):
+        self._f.write(json.dumps(value, ensure_ascii=False))
+        self._f.write("\n")
+
+    def write_section(self, name, records):
+        """写一个分节；records 可以是任意可迭代对象（生成器即可），返回写入条数。"""
+        if name not in SECTIONS:
+            raise ValueError(f"unknown section: {name}")
+        self._write({SECTION_KEY: name})
+        n = 0
+        for record in records:
+            self._write(record)
+            n += 1
+        self.counts[name] = self.counts.get(name, 0) + n
+        return n
+
+    def close(self):
+        if self._f is None:
+            return
+        self._write({SECTION_KEY: "end", "counts": self.counts})
+        self._f.close()
+        self._f = None
+        os.replace(self._tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
+            self._f = None
+            os.remove(self._tmp)
+
+
+def read_manifest(path):
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.loads(f.readline())
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"不是流式图谱文件: {path}")
+    return manifest
+
+
+def iter_section(path, name):
+    """逐条产出某一分节的记录；文件中途截断时在截断处停止。"""
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()
+        inside = False
+        for line in f:
+            if line.startswith(SECTION_PREFIX):
+                if inside:
+                    return
+                inside = json.loads(line).get(SECTION_KEY) == name
+                continue
+            if inside:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+
+
+class StreamSection:
+    """可重复遍历的分节：每次 for 循环都重新从文件读取。"""
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+
+    def __iter__(self):
+        return iter_section(self.path, self.name)
+
+
+def open_kg(path):
+    """
+    以与 json.load 结果相同的结构打开流式图谱：清单字段直接可用，
+    related_papers 与 knowledge_graph.entities / triples 为 StreamSection。
+    """
+    data = read_manifest(path)
+    data["related_papers"] = StreamSection(path, "related_papers")
+    data["knowledge_graph"] = {
+        "entities": StreamSection(path, "entities"),
+        "triples": StreamSection(path, "triples"),
+    }
+    return data
+
+
+def write_json_array(f, items):
+    """把可迭代对象逐条写成 JSON 数组（与 json.dumps(list(items)) 输出相同），返回条数。"""
+    f.write("[")
+    n = 0
+    for item in items:
+        if n:
+            f.write(", ")
+        f.write(json.dumps(item))
+        n += 1
+    f.write("]")
+    return n
+
+
+def spool_json_array(items):
+    """把 items 逐条写成 JSON 数组存入临时文件，返回 (临时文件, 条数)；配合 write_spliced 拼进 HTML 模板。"""
+    buf = tempfile.TemporaryFile("w+", encoding="utf-8")
+    return buf, write_json_array(buf, items)
+
+
+def write_spliced(path, template, parts):
+    """按 parts 中依次出现的占位符切开 template，写出模板片段并在占位处拷入对应临时文件的内容。"""
+    with open(path, "w", encoding="utf-8") as f:
+        rest = template
+        for placeholder, buf in parts:
+            head, rest = rest.split(placeholder, 1)
+            f.write(head)
+            with buf:
+                buf.seek(0)
+                shutil.copyfileobj(buf, f)
+        f.write(rest)
+
+
+def write_kg_stream(path, output_data, entities, triples, related_papers=()):
+    """把生成器的输出写成流式文件：output_data 中除图谱与相关论文外的字段进入清单。"""
+    manifest = {k: v for k, v in output_data.items() if k not in ("knowledge_graph", "related_papers")}
+    with KGStreamWriter(path, manifest) as w:
+        w.write_section("related_papers", related_papers)
+        w.write_section("entities", entities)
+        w.write_section("triples", triples)
+    return w.counts
@@ -0,0 +1,246 @@
+"""
+知识图谱构建器：top_citations_kg 与 recursive_citations_kg 共用。
+
+- 实体名与关系名驻留为整数 id（_intern），实体与三元组去重都是 O(1) 的字典查找；
+- 重复出现的三元组只保留一条并记录出现次数（多次 LLM 抽取、作者列表重叠等），
+  输出时次数大于 1 的三元组带 "count" 字段；
+- 按关系类型的出边 / 入边邻接索引（首次查询时构建，写入后失效），便于后续查询与分析；
+- 输出记录在加入时一次建好，to_json() 只是按加入顺序收集，
+  结构与原先一致：{"entities": [...], "triples": [...]}。
+
+实体类型沿用“先到先得”：同名实体第一次加入时的类型即为最终类型。
+"""
+
+from class_schema import get_all_type_names, normalize_entity_type
+
+ALLOWED_TYPES = get_all_type_names()
+
+
+class KnowledgeGraph:
+    def __init__(self, allowed_types=None):
+        self.allowed_types = ALLOWED_TYPES if allowed_types is None else allowed_types
+        self._node_ids = {}       # 名称 -> 节点 id
+        self._names = []          # 节点 id -> 名称
+        self._entities = {}       # 节点 id -> 实体记录 {"name", "type", ...}；仅显式加入的实体，按加入顺序
+        self._relation_ids = {}   # 关系名 -> 关系 id
+        self._relations = []      # 关系 id -> 关系名
+        self._triples = {}        # (头 id, 关系 id, 尾 id) -> 三元组记录 {"head", "relation", "tail"[, "count"]}
+        self._out = None          # 关系 id -> {头 id: [尾 id, ...]}，首次查询时构建
+        self._in = None           # 关系 id -> {尾 id: [头 id, ...]}
+        self._type_cache = {}     # 原始类型 -> 规范化类型
+
+    # ---------- 驻留 ----------
+
+    def _intern(self, name):
+        nid = self._node_ids.get(name)
+        if nid is None:
+            nid = self._node_ids[name] = len(self._names)
+            self._names.append(name)
+        return nid
+
+    def node_id(self, name):
+        """返回名称对应的节点 id（不存在则新建）。"""
+        return self._intern(name)
+
+    def relation_id(self, relation):
+        rid = self._relation_ids.get(relation)
+        if rid is None:
+            rid = self._relation_ids[relation] = len(self._relations)
+            self._relations.append(relation)
+        return rid
+
+    def name_of(self, nid):
+        return self._names[nid]
+
+    def _normalize(self, etype):
+        norm = self._type_cache.get(etype)
+        if norm is None:
+            norm = self._type_cache[etype] = normalize_entity_type(etype, allowed=self.allowed_types)
+        return norm
+
+    # ---------- 写入 ----------
+
+    def add_entity(self, name, etype, attrs=None):
+        """加入实体（类型按 classes.json 规范化）；已存在时不覆盖类型，只补充缺失的属性。返回是否新增。"""
+        if not name:
+            return False
+        nid = self.node_id(name)
+        record = self._entities.get(nid)
+        if record is not None:
+            for k, v in (attrs or {}).items():
+                record.setdefault(k, v)
+            return False
+        record = {"name": name, "type": self._normalize(etype)}
+        if attrs:
+            record.update(attrs)
+        self._entities[nid] = record
+        return True
+
+    def _count_triple(self, h, rid, t, head, relation, tail, count=1):
+        """按 (头 id, 关系 id, 尾 id) 加入三元组记录，已存在时只累加次数。返回是否新增。"""
+        record = self._triples.get((h, rid, t))
+        if record is not None:
+            record["count"] = record.get("count", 1) + count
+            return False
+        record = {"head": head, "relation": relation, "tail": tail}
+        if count > 1:
+            record["count"] = count
+        self._triples[h, rid, t] = record
+        return True
+
+    def add_triple(self, head, relation, tail, count=1):
+        """加入三元组；重复时只累加次数。返回是否新增。"""
+        if not head or not tail:
+            return False
+        relation = relation or ""
+        added = self._count_triple(
+            self._intern(head), self.relation_id(relation), self._intern(tail), head, relation, tail, count
+        )
+        self._out = self._in = None
+        return added
+
+    def add_triples(self, relation, pairs):
+        """批量加入同一关系的 (头, 尾) 三元组，如引用边。"""
+        rid = self.relation_id(relation)
+        intern, count_triple = self._intern, self._count_triple
+        for head, tail in pairs:
+            if head and tail:
+                count_triple(intern(head), rid, intern(tail), head, relation, tail)
+        self._out = self._in = None
+
+    def add_papers(self, papers, titles=None):
+        """
+        加入论文实体、作者实体及 author_of 三元组：先按顺序加入全部论文，再加入各论文的作者
+        （实体顺序为全部论文在前、作者在后）。
+        titles 与 papers 一一对应时用作论文实体名（如 PaperIndex.display_title 区分的重名论文），默认取标题。
+        """
+        paper_type = self._normalize("AIPaper")
+        author_type = self._normalize("Researcher")
+        rid = self.relation_id("author_of")
+        intern, count_triple, entities = self._intern, self._count_triple, self._entities
+        papers = list(papers)
+        titles = [(t or "") for t in titles] if titles is not None else [p.get("title") or "" for p in papers]
+        for paper, title in zip(papers, titles):
+            if title:
+                arxiv_id = paper.get("arxiv_id") or paper.get("id", "")
+                pid = intern(title)
+                record = entities.get(pid)
+                if record is None:
+                    entities[pid] = {"name": title, "type": paper_type, "arxiv_id": arxiv_id}
+                else:
+                    record.setdefault("arxiv_id", arxiv_id)
+        for paper, title in zip(papers, titles):
+            for a in paper.get("authors", []):
+                a = (a or "").strip()
+                if not a:
+                    continue
+                aid = intern(a)
+                if aid not in entities:
+                    entities[aid] = {"name": a, "type": author_type}
+                if title:
+                    count_triple(aid, rid, intern(title), a, "author_of", title)
+        self._out = self._in = None
+
+    def add_paper(self, paper):
+        """加入一篇论文的实体、作者及 author_of 三元组。"""
+        self.add_papers((paper,))
+
+    def add_llm_result(self, llm_data):
+        """
+        合并一篇论文的 LLM 抽取结果：兼容 head/tail 与 subject/object，
+        并把三元组里的实体 ID（E1、E2 …）解析为实体名。
+        """
+        id_to_name = {}
+        ids, entities = self._node_ids, self._entities
+        for e in llm_data.get("entities", []):
+            n = e.get("name")
+            if n:
+                nid = ids.get(n)
+                if nid is None or nid not in entities:
+                    self.add_entity(n, e.get("type", "Thesis"))
+                if e.get("id"):
+                    id_to_name[e["id"]] = n
+        for t in llm_data.get("triples", []):
+            head = t.get("head") or t.get("subject")
+            tail = t.get("tail") or t.get("object")
+            if head and tail:
+                self.add_triple(id_to_name.get(head, head), t.get("relation", ""), id_to_name.get(tail, tail))
+
+    # ---------- 查询 ----------
+
+    def has_entity(self, name):
+        nid = self._node_ids.get(name)
+        return nid is not None and nid in self._entities
+
+    def entity_type(self, name):
+        nid = self._node_ids.get(name)
+        record = self._entities.get(nid) if nid is not None else None
+        return record["type"] if record else None
+
+    def triple_count(self, head, relation, tail):
+        """三元组出现次数（不存在为 0）。"""
+        try:
+            key = (self._node_ids[head], self._relation_ids[relation], self._node_ids[tail])
+        except KeyError:
+            return 0
+        record = self._triples.get(key)
+        return record.get("count", 1) if record else 0
+
+    def _build_index(self):
+        out, inc = {}, {}
+        for h, r, t in self._triples:
+            out.setdefault(r, {}).setdefault(h, []).append(t)
+            inc.setdefault(r, {}).setdefault(t, []).append(h)
+        self._out, self._in = out, inc
+
+    def successors(self, name, relation):
+        """name 经 relation 指向的节点名列表。"""
+        nid, rid = self._node_ids.get(name), self._relation_ids.get(relation)
+        if nid is None or rid is None:
+            return []
+        if self._out is None:
+            self._build_index()
+        return [self._names[t] for t in self._out.get(rid, {}).get(nid, [])]
+
+    def predecessors(self, name, relation):
+        """经 relation 指向 name 的节点名列表。"""
+        nid, rid = self._node_ids.get(name), self._relation_ids.get(relation)
+        if nid is None or rid is None:
+            return []
+        if self._in is None:
+            self._build_index()
+        return [self._names[h] for h in self._in.get(rid, {}).get(nid, [])]
+
+    @property
+    def num_entities(self):
+        return len(self._entities)
+
+    @property
+    def num_triples(self):
+        return len(self._triples)
+
+    # ---------- 序列化 ----------
+
+    def iter_entities(self):
+        """按加入顺序逐条产出实体记录（流式写出用）。"""
+        return iter(self._entities.values())
+
+    def iter_triples(self):
+        return iter(self._triples.values())
+
+    def to_json(self):
+        """输出 {"entities": [...], "triples": [...]}（记录与图谱共享，序列化前不要修改）。"""
+        return {"entities": list(self._entities.values()), "triples": list(self._triples.values())}
+
+    @classmethod
+    def from_json(cls, kg, allowed_types=None):
+        """从 {"entities", "triples"} 结构重建（读取已生成的图谱 JSON）。"""
+        graph = cls(allowed_types)
+        for e in kg.get("entities", []):
+            attrs = {k: v for k, v in e.items() if k not in ("name", "type")}
+            graph.add_entity(e.get("name"), e.get("type", ""), attrs)
+        for t in kg.get("triples", []):
+            head = t.get("head") or t.get("subject")
+            tail = t.get("tail") or t.get("object")
+            graph.add_triple(head, t.get("relation", ""), tail, count=t.get("count") or 1)
+        return graph
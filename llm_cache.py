@@ -0,0 +1,106 @@
+"""
+LLM 抽取结果的持久化缓存（内容哈希为键）。
+
+键为 (模型名, 系统提示词, 标题, 摘要) 的 SHA-256：论文内容与提示词都没变时，
+重跑 --llm 直接复用上次解析好的 entities/triples，不再调用大模型；
+提示词或模型一改，键随之变化，旧结果自然不再命中。
+需要强制重新抽取时用 --refresh-llm-cache 清空缓存。
+
+用法：
+  from llm_cache import configure_llm_cache, get_llm_cache, extraction_cache_key
+  cache = get_llm_cache()
+  hit, value = cache.get(extraction_cache_key(model, system_prompt, title, abstract))
+"""
+
+import hashlib
+import json
+import os
+
+from api_cache import SQLiteCache, DEFAULT_CACHE_DIR
+
+# 抽取结果只随输入变化，TTL 设得很长；缓存格式变化时递增版本号使旧记录失效
+LLM_EXTRACTION_TTL = 365 * 24 * 3600
+LLM_CACHE_VERSION = 1
+
+
+def extraction_cache_key(model, system_prompt, title, abstract):
+    """(模型, 提示词, 标题, 摘要) 的内容哈希。"""
+    payload = json.dumps(
+        [LLM_CACHE_VERSION, model, system_prompt, title or "", abstract or ""],
+        ensure_ascii=False,
+    )
+    return "llm:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMExtractionCache:
+    """包装 SQLiteCache：值为 {"result": 抽取结果, "tokens": 当次消耗 token 数}，并统计节省的 token。"""
+
+    def __init__(self, path):
+        self._cache = SQLiteCache(path, default_ttl=LLM_EXTRACTION_TTL)
+        self.tokens_saved = 0
+
+    def get(self, key):
+        """返回 (是否命中, 抽取结果)。"""
+        hit, value = self._cache.get(key)
+        if not hit or not isinstance(value, dict):
+            return False, None
+        self.tokens_saved += value.get("tokens") or 0
+        return True, value.get("result")
+
+    def set(self, key, result, tokens=0):
+        self._cache.set(key, {"result": result, "tokens": tokens})
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return dict(self._cache.stats(), tokens_saved=self.tokens_saved)
+
+    def close(self):
+        self._cache.close()
+
+
+# ---------- 进程内共享的 LLM 抽取缓存 ----------
+
+_llm_cache = None
+_llm_cache_enabled = True
+_llm_cache_dir = DEFAULT_CACHE_DIR
+_llm_cache_refresh = False
+
+
+def configure_llm_cache(cache_dir=None, enabled=True, refresh=False):
+    """设置 LLM 抽取缓存目录与开关；refresh=True 时首次使用前清空已有记录。"""
+    global _llm_cache, _llm_cache_enabled, _llm_cache_dir, _llm_cache_refresh
+    if _llm_cache is not None:
+        _llm_cache.close()
+        _llm_cache = None
+    _llm_cache_enabled = enabled
+    _llm_cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    _llm_cache_refresh = refresh
+
+
+def get_llm_cache():
+    """返回共享的 LLM 抽取缓存；已通过 --no-llm-cache 关闭时返回 None。"""
+    global _llm_cache, _llm_cache_refresh
+    if not _llm_cache_enabled:
+        return None
+    if _llm_cache is None:
+        _llm_cache = LLMExtractionCache(os.path.join(_llm_cache_dir, "llm_extractions.sqlite"))
+        if _llm_cache_refresh:
+            _llm_cache.clear()
+            _llm_cache_refresh = False
+            print("[*] [LLM 缓存] 已清空，本次全部重新抽取")
+    return _llm_cache
+
+
+def print_llm_cache_stats():
+    """打印本次运行的 LLM 抽取缓存命中率与节省的 token 数。"""
+    if _llm_cache is None:
+        return
+    s = _llm_cache.stats()
+    if not s["hits"] and not s["misses"]:
+        return
+    print(
+        f"[*] [LLM 缓存] 命中 {s['hits']} 篇, 未命中 {s['misses']} 篇, 命中率 {s['hit_rate']:.0%}, "
+        f"节省约 {s['tokens_saved']} tokens"
+    )
@@ -0,0 +1,137 @@
+"""
+统一的 LLM 调用入口：main.py、top_citations_kg.py、app_qa.py 的对话补全都经过这里。
+
+- 进程内共享一个 OpenAI 客户端（配置来自 config.py），底层 HTTP 连接池在线程间复用；
+- 所有调用共用两个令牌桶：每分钟请求数（LLM_RPM）与每分钟 token 数（LLM_TPM），
+  并发抽取时总速率不超过配额；
+- 遇 429 时按 Retry-After（或指数退避）暂停并降速，再加随机抖动错开各线程的重试；
+- 每次调用的耗时、token 用量与重试次数记入 llm_metrics；
+- 调用经 transport 发出，支持录制/回放与故障注入，离线环境也能复现 LLM 交互。
+"""
+
+import random
+import time
+
+import openai
+from openai import OpenAI
+
+from config import API_KEY, BASE_URL, MODEL_NAME, LLM_RPM, LLM_TPM
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from transport import call_recorded, TransportRateLimited
+from llm_metrics import get_llm_metrics
+from text_utils import estimate_tokens
+
+# 估算 token 时为回复预留的数量（实际用量返回后再补扣差额）
+LLM_COMPLETION_RESERVE = 512
+
+_client = None
+_limiters = None
+
+
+def get_llm_client():
+    """返回共享的 OpenAI 兼容客户端（首次调用时创建）。重试由本模块统一处理。"""
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=API_KEY, base_url=BASE_URL, max_retries=0)
+    return _client
+
+
+def get_llm_limiters():
+    """返回共享的 (请求数限流器, token 限流器)，按 LLM_RPM / LLM_TPM 创建。"""
+    global _limiters
+    if _limiters is None:
+        rpm = AdaptiveRateLimiter(LLM_RPM / 60.0, capacity=max(1, LLM_RPM // 6), name="LLM 请求")
+        tpm = AdaptiveRateLimiter(LLM_TPM / 60.0, capacity=max(1, LLM_TPM // 6), name="LLM token")
+        _limiters = (rpm, tpm)
+    return _limiters
+
+
+def _usage_to_dict(usage):
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+    }
+
+
+def _retry_after_if_throttled(exc):
+    """429 时返回 (True, Retry-After 秒数或 None)，否则返回 (False, None)。"""
+    if isinstance(exc, TransportRateLimited):
+        return True, exc.retry_after
+    if isinstance(exc, openai.RateLimitError):
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        return True, parse_retry_after(headers.get("retry-after"))
+    return False, None
+
+
+def _is_transient(exc):
+    return isinstance(exc, (openai.APIConnectionError, openai.InternalServerError))
+
+
+def chat_completion_with_usage(
+    messages, temperature=0.1, response_format=None, model=None, max_retries=4, base_delay=2
+):
+    """
+    发送一次对话补全请求，返回 (回复文本, token 用量)。
+    用量为 {"prompt_tokens", "completion_tokens", "total_tokens"}，服务端未返回时为 None。
+    response_format 如 {"type": "json_object"}；model 为空时使用 config.MODEL_NAME。
+    429、连接错误与 5xx 最多重试 max_retries 次，其余异常直接抛出。
+    """
+    request = {
+        "model": model or MODEL_NAME,
+        "messages": messages,
+        "temperature": temperature,
+    }
+    if response_format:
+        request["response_format"] = response_format
+
+    def _live():
+        response = get_llm_client().chat.completions.create(**request)
+        return {
+            "content": response.choices[0].message.content,
+            "usage": _usage_to_dict(getattr(response, "usage", None)),
+        }
+
+    rpm, tpm = get_llm_limiters()
+    reserved = min(
+        tpm.capacity,
+        estimate_tokens("".join(m.get("content") or "" for m in messages)) + LLM_COMPLETION_RESERVE,
+    )
+    metrics = get_llm_metrics()
+    for attempt in range(max_retries + 1):
+        rpm.acquire()
+        tpm.acquire(reserved)
+        start = time.monotonic()
+        try:
+            result = call_recorded("llm", request, _live)
+        except Exception as e:
+            throttled, retry_after = _retry_after_if_throttled(e)
+            if attempt >= max_retries or not (throttled or _is_transient(e)):
+                metrics.record_call(
+                    request["model"], time.monotonic() - start, retries=attempt, ok=False, error=type(e).__name__
+                )
+                raise
+            delay = base_delay * (2 ** attempt)
+            if throttled:
+                delay = rpm.on_throttle(retry_after if retry_after is not None else delay)
+                print(f"   ⚠️ LLM 速率限制 (429)，暂停 {delay:.1f} 秒并降速后重试 ({attempt + 1}/{max_retries + 1})...")
+            else:
+                print(f"   ⚠️ LLM 请求异常: {e}，{delay} 秒后重试...")
+            # 随机抖动：避免多个线程在同一时刻一起重试
+            time.sleep(delay + random.uniform(0, delay / 2 + 0.1))
+            continue
+        rpm.on_success()
+        usage = result.get("usage")
+        metrics.record_call(request["model"], time.monotonic() - start, usage, retries=attempt)
+        if usage and usage.get("total_tokens"):
+            tpm.consume(usage["total_tokens"] - reserved)
+        return result["content"], usage
+    raise RuntimeError("LLM 请求重试次数用尽")
+
+
+def chat_completion(messages, temperature=0.1, response_format=None, model=None):
+    """发送一次对话补全请求，返回回复文本（choices[0].message.content）。"""
+    content, _ = chat_completion_with_usage(messages, temperature, response_format, model)
+    return content
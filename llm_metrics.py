@@ -0,0 +1,149 @@
+"""
+LLM 调用埋点：记录每次对话补全的耗时、token 用量、重试次数与 JSON 解析失败，
+运行结束时打印 p50/p95 耗时与按模型估算的费用，并写入本次运行的指标文件。
+
+llm_client.chat_completion_with_usage 自动记录每次调用；解析回复的一方
+（如 extract_knowledge_with_llm）在 JSON 解析失败时调用 record_parse_failure。
+
+用法：
+  from llm_metrics import report_llm_metrics
+  report_llm_metrics()        # 脚本结束时调用；本次没有 LLM 调用则什么都不做
+"""
+
+import json
+import math
+import threading
+import time
+
+from config import LLM_PRICE
+
+# 每百万 token 的美元单价 (输入, 输出)，仅用于估算；未列出的模型可用 LLM_PRICE 配置
+MODEL_PRICES = {
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+def _parse_price(spec):
+    """'0.27/1.10' -> (0.27, 1.10)；非法时返回 None。"""
+    try:
+        prompt, completion = spec.split("/", 1)
+        return float(prompt), float(completion)
+    except (AttributeError, ValueError):
+        return None
+
+
+def model_price(model):
+    """返回模型的 (输入, 输出) 单价；LLM_PRICE 优先，未知模型返回 None。"""
+    return _parse_price(LLM_PRICE) or MODEL_PRICES.get(model)
+
+
+def percentile(values, q):
+    """最近秩法分位数；values 为空时返回 0。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LLMMetrics:
+    """线程安全的调用记录器。"""
+
+    def __init__(self):
+        self.calls = []
+        self.parse_failures = 0
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def record_call(self, model, latency, usage=None, retries=0, ok=True, error=None):
+        usage = usage or {}
+        entry = {
+            "model": model,
+            "latency": round(latency, 4),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "retries": retries,
+            "ok": ok,
+        }
+        if error:
+            entry["error"] = error
+        with self._lock:
+            self.calls.append(entry)
+
+    def record_parse_failure(self, count=1):
+        with self._lock:
+            self.parse_failures += count
+
+    def summary(self):
+        with self._lock:
+            calls = list(self.calls)
+            parse_failures = self.parse_failures
+        latencies = [c["latency"] for c in calls if c["ok"]]
+        models = {}
+        for c in calls:
+            m = models.setdefault(c["model"], {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            m["calls"] += 1
+            m["prompt_tokens"] += c["prompt_tokens"]
+            m["completion_tokens"] += c["completion_tokens"]
+        total_cost = 0.0
+        for name, m in models.items():
+            price = model_price(name)
+            m["cost_usd"] = (
+                round((m["prompt_tokens"] * price[0] + m["completion_tokens"] * price[1]) / 1e6, 6)
+                if price else None
+            )
+            total_cost += m["cost_usd"] or 0.0
+        return {
+            "calls": len(calls),
+            "failed": sum(1 for c in calls if not c["ok"]),
+            "retries": sum(c["retries"] for c in calls),
+            "parse_failures": parse_failures,
+            "latency_p50": round(percentile(latencies, 50), 4),
+            "latency_p95": round(percentile(latencies, 95), 4),
+            "latency_total": round(sum(latencies), 4),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+            "cost_usd": round(total_cost, 6),
+            "models": models,
+        }
+
+    def write(self, path):
+        data = {"started_at": self.started_at, "summary": self.summary(), "calls": list(self.calls)}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+_metrics = LLMMetrics()
+
+
+def get_llm_metrics():
+    """返回进程内共享的记录器。"""
+    return _metrics
+
+
+def record_parse_failure(count=1):
+    _metrics.record_parse_failure(count)
+
+
+def report_llm_metrics(path=None):
+    """打印本次运行的 LLM 指标并写入 path（默认 llm_metrics_<时间>.json）；没有调用时不输出。"""
+    s = _metrics.summary()
+    if not s["calls"]:
+        return None
+    print(
+        f"[*] [LLM 指标] 调用 {s['calls']} 次 (失败 {s['failed']}，重试 {s['retries']}，JSON 解析失败 {s['parse_failures']})，"
+        f"耗时 p50 {s['latency_p50']:.2f}s / p95 {s['latency_p95']:.2f}s，"
+        f"token 输入 {s['prompt_tokens']} / 输出 {s['completion_tokens']}"
+    )
+    for name, m in s["models"].items():
+        cost = f"约 ${m['cost_usd']:.4f}" if m["cost_usd"] is not None else "单价未知（可设置 LLM_PRICE）"
+        print(f"    {name}: {m['calls']} 次，{m['prompt_tokens']} + {m['completion_tokens']} tokens，{cost}")
+    path = path or time.strftime("llm_metrics_%Y%m%d_%H%M%S.json", time.localtime(_metrics.started_at))
+    _metrics.write(path)
+    print(f"    指标已写入: {path}")
+    return path
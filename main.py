@@ -1,11 +1,12 @@
 import arxiv
 import json
 import os
-import requests
 import time
-from openai import OpenAI
 
-from config import API_KEY, BASE_URL, MODEL_NAME, is_api_configured
+from config import is_api_configured
+from transport import http_request, call_recorded
+from llm_client import chat_completion
+from llm_metrics import record_parse_failure, report_llm_metrics
 def fetch_citations_via_semantic_scholar(arxiv_id):
     """
     通过 Semantic Scholar API 获取引用关系
@@ -21,7 +22,7 @@ def fetch_citations_via_semantic_scholar(arxiv_id):
     try:
         # ⚠️ 注意：如果没有 API Key，S2 限制每秒 1-2 次请求。
         # 作业演示不需要 Key，但请不要并发太快。
-        r = requests.get(url, timeout=10)
+        r = http_request("GET", url, timeout=10)
         
         if r.status_code == 200:
             data = r.json()
@@ -70,23 +71,29 @@ def fetch_arxiv_paper(paper_id):
     这是结构化数据的来源。
     """
     print(f"[*] 正在下载 ArXiv 论文元数据: {paper_id} ...")
-    client = arxiv.Client()
-    search = arxiv.Search(id_list=[paper_id])
-    
-    try:
-        paper = next(client.results(search))
-        paper_info = {
+
+    def _query():
+        client = arxiv.Client()
+        search = arxiv.Search(id_list=[paper_id])
+        try:
+            paper = next(client.results(search))
+        except StopIteration:
+            return None
+        return {
             "title": paper.title,
             "abstract": paper.summary,
             "published_date": paper.published.strftime("%Y-%m-%d"),
             "pdf_url": paper.pdf_url,
             "authors": [author.name for author in paper.authors]
         }
-        print(f"✅ 成功获取: {paper.title}")
+
+    try:
+        paper_info = call_recorded("arxiv", {"id_list": [paper_id]}, _query)
+        if paper_info is None:
+            print("❌ 未找到该 ID 的论文，请检查 ID 是否正确。")
+            return None
+        print(f"✅ 成功获取: {paper_info['title']}")
         return paper_info
-    except StopIteration:
-        print("❌ 未找到该 ID 的论文，请检查 ID 是否正确。")
-        return None
     except Exception as e:
         print(f"❌ 网络或解析错误: {e}")
         return None
@@ -97,8 +104,6 @@ def extract_knowledge_with_llm(paper_info):
     这里是作业得分的核心：利用 NLP 理解文本，提取出正则无法匹配的 'baseline_model' 等复杂关系。
     """
     print("[*] 正在调用大模型进行深度抽取 (Schema Mapping)...")
-    
-    client = OpenAI(api_key=API_KEY, base_url=BASE_URL)
 
     # 构造 Prompt：严格遵循我们定义的 cnSchema 扩展结构
     system_prompt = """
@@ -134,17 +139,19 @@ def extract_knowledge_with_llm(paper_info):
     """
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
+        result = chat_completion(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
             temperature=0.1,
             response_format={"type": "json_object"}
         )
-        result = response.choices[0].message.content
         return json.loads(result)
+    except json.JSONDecodeError as e:
+        record_parse_failure()
+        print(f"❌ LLM 返回无法解析为 JSON: {e}")
+        return None
     except Exception as e:
         print(f"❌ LLM 调用失败: {e}")
         return None
@@ -214,4 +221,5 @@ if __name__ == "__main__":
                     })
 
             # 4. 保存最终结果
-            save_result(paper_data, kg_result)
\ No newline at end of file
+            save_result(paper_data, kg_result)
+    report_llm_metrics()
@@ -0,0 +1,225 @@
+"""
+本地 OpenAI 兼容替身服务器：在没有真实大模型接口的机器上压测 LLM 抽取与问答。
+
+实现项目用到的 POST /chat/completions（含 response_format=json_object），回复完全由输入文本决定：
+  - 抽取请求（json_object）：从标题与摘要中取专有名词（BERT、ImageNet、BLEU 之类），
+    生成符合 schema 的 entities / triples；打包请求（[P编号] 分段）按编号返回 {"papers": {...}}；
+  - 问答请求：从系统提示词的事实列表中挑与问题重合最多的一条作为回答，没有则回答未包含。
+可配置延迟与错误率（429 带 Retry-After / 500），用于检验并发、限流、重试与缓存。
+
+运行：
+  python mock_llm_server.py --port 8765 --latency 0.1-0.3 --error-rate 0.05
+然后把 BASE_URL 指向它（Key 任意非空值）：
+  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-local python recursive_citations_kg.py 1706.03762 --llm
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from class_schema import TYPE_ALIASES
+from text_utils import estimate_tokens, overlap_tokens, parse_latency
+
+# 专有名词：至少含两个大写字母或数字的词，如 BERT、ImageNet、WMT 2014、GPT-2
+TERM_PATTERN = re.compile(r"\b[A-Z][A-Za-z0-9\-]*[A-Z0-9][A-Za-z0-9\-]*(?: 20\d\d)?\b")
+# 实体类型取 classes.json 中的规范类型（与 class_schema 的映射一致）
+PAPER_TYPE = TYPE_ALIASES["AIPaper"]
+MODEL_TYPE = TYPE_ALIASES["AIModel"]
+METRIC_TYPE = TYPE_ALIASES["Metric"]
+ENTITY_KINDS = ((MODEL_TYPE, "baseline_model"), ("Dataset", "evaluated_on"), (METRIC_TYPE, "uses_metric"))
+METRIC_NAMES = {"BLEU", "ROUGE", "METEOR", "F1", "EM", "AUC", "MAP", "NDCG", "PPL", "WER", "FID", "IOU", "MRR"}
+DATASET_HINT = re.compile(r"\s+(?:dataset|benchmark|corpus|task)", re.I)
+PROPOSED_TERM = re.compile(r"(?:propose|introduce|present)\w*\s+(?:a |an |the )?(?:new |novel )?([A-Z][\w\-]+)")
+MAX_TERMS = 6
+PACKED_SECTION = re.compile(r"\[(P\d+)\]\n")
+
+
+def _stable_int(text):
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _classify(term, text, end):
+    """按上下文推断 (实体类型, 关系)；无线索时按词条哈希固定分配。"""
+    if term.upper() in METRIC_NAMES:
+        return METRIC_TYPE, "uses_metric"
+    if re.search(r"20\d\d$", term) or DATASET_HINT.match(text, end):
+        return "Dataset", "evaluated_on"
+    return ENTITY_KINDS[_stable_int(term) % len(ENTITY_KINDS)]
+
+
+def extract_from_text(text):
+    """对一篇论文（Title: ...\\nAbstract: ...）生成确定的抽取结果。"""
+    title = ""
+    for line in text.splitlines():
+        if line.startswith("Title:"):
+            title = line[len("Title:"):].strip()
+            break
+    found = {}
+    for m in PROPOSED_TERM.finditer(text):
+        found.setdefault(m.group(1), (MODEL_TYPE, "proposed_model"))
+    for m in TERM_PATTERN.finditer(text):
+        if len(found) >= MAX_TERMS:
+            break
+        if m.group(0) not in found:
+            found[m.group(0)] = _classify(m.group(0), text, m.end())
+    entities = [{"name": title, "type": PAPER_TYPE}] if title else []
+    triples = []
+    for term, (etype, relation) in list(found.items())[:MAX_TERMS]:
+        entities.append({"name": term, "type": etype})
+        if title:
+            triples.append({"head": title, "relation": relation, "tail": term})
+    return {"entities": entities, "triples": triples}
+
+
+def answer_from_facts(system_prompt, question):
+    """问答：在系统提示词的事实列表中返回与问题重合最多的一条。"""
+    facts = system_prompt.split("【已知知识图谱事实】：", 1)[-1].split("\n\n", 1)[0]
+    words = overlap_tokens(question)
+    best, best_score = None, 0
+    for line in facts.splitlines():
+        score = len(words & overlap_tokens(line))
+        if score > best_score:
+            best, best_score = line.strip(), score
+    return best or "知识图谱中未包含此信息"
+
+
+def build_reply(request):
+    """根据请求体生成回复文本。"""
+    messages = request.get("messages") or []
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    if (request.get("response_format") or {}).get("type") != "json_object":
+        return answer_from_facts(system, user)
+    parts = PACKED_SECTION.split(user)
+    if len(parts) > 1:
+        return json.dumps(
+            {"papers": {tag: extract_from_text(body) for tag, body in zip(parts[1::2], parts[2::2])}},
+            ensure_ascii=False,
+        )
+    return json.dumps(extract_from_text(user), ensure_ascii=False)
+
+
+class StandInState:
+    def __init__(self, latency=None, error_rate=0.0, error_status=429, retry_after=1, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def next_delay_and_error(self):
+        with self._lock:
+            self.requests += 1
+            delay = self._rng.uniform(*self.latency) if self.latency else 0.0
+            error = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if error:
+                self.errors += 1
+            return delay, error
+
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    state = StandInState()
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-llm", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        delay, error = self.state.next_delay_and_error()
+        if delay:
+            time.sleep(delay)
+        if error:
+            status = self.state.error_status
+            headers = {"Retry-After": str(self.state.retry_after)} if status == 429 else {}
+            self._send_json(
+                status,
+                {"error": {"message": "injected error", "type": "rate_limit_error" if status == 429 else "server_error"}},
+                headers,
+            )
+            return
+
+        content = build_reply(request)
+        prompt_tokens = estimate_tokens("".join(m.get("content") or "" for m in request.get("messages") or []))
+        completion_tokens = estimate_tokens(content)
+        self._send_json(200, {
+            "id": "chatcmpl-" + hashlib.md5(content.encode("utf-8")).hexdigest()[:12],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model") or "mock-llm",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8765, latency=None, error_rate=0.0, error_status=429, retry_after=1, seed=0):
+    ChatCompletionsHandler.state = StandInState(latency, error_rate, error_status, retry_after, seed)
+    server = ThreadingHTTPServer((host, port), ChatCompletionsHandler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容替身服务器（确定性回复，用于离线压测）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址 (默认 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口 (默认 8765)")
+    parser.add_argument("--latency", default=None, help="每次请求的延迟秒数，如 0.2 或区间 0.1-0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的概率 (默认 0)")
+    parser.add_argument("--error-status", type=int, default=429, choices=[429, 500, 503], help="注入错误的状态码 (默认 429)")
+    parser.add_argument("--retry-after", type=float, default=1, help="429 的 Retry-After 秒数 (默认 1)")
+    parser.add_argument("--seed", type=int, default=0, help="延迟与错误注入的随机种子 (默认 0)")
+    args = parser.parse_args()
+
+    server = serve(
+        args.host, args.port, parse_latency(args.latency), args.error_rate, args.error_status, args.retry_after, args.seed
+    )
+    print(f"🚀 替身 LLM 服务已启动: http://{args.host}:{args.port}/v1  (Ctrl-C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        s = ChatCompletionsHandler.state
+        print(f"\n[*] 共处理 {s.requests} 个请求，注入错误 {s.errors} 次")
+        server.server_close()
@@ -0,0 +1,158 @@
+"""
+论文身份索引：把 S2 paperId、arXiv id（去版本号，1706.03762v7 与 1706.03762 视为同一篇）和 DOI
+映射到同一个内部 id，取代按标题去重。
+
+- 同名但 id 不同的论文是两篇论文，不再互相覆盖；输出时用 display_title 给重名者加上 id 区分；
+- 同一篇论文经不同来源到达（arXiv 元数据、S2 引用列表、大小写不同的标题）只保存一份，
+  后到的记录只补充缺失字段；
+- 一条记录同时带有两条已知记录的 id（如先后以 S2 paperId 和 arXiv id 到达）时，两条记录合并；
+- 三种 id 都没有的论文才退回按规范化标题（大小写、空白不敏感）识别。
+
+用法：
+  index = PaperIndex()
+  pid = index.add(paper)          # 返回内部 id，重复论文返回同一个 id
+  index.papers()                  # 去重后的论文，按首次出现顺序
+"""
+
+import re
+
+ID_PREFIXES = ("s2", "arxiv", "doi")
+
+
+def canonical_arxiv_id(arxiv_id):
+    """'arXiv:1706.03762v7' -> '1706.03762'；空值返回空串。"""
+    aid = (arxiv_id or "").strip()
+    if aid.lower().startswith("arxiv:"):
+        aid = aid[len("arxiv:"):]
+    return re.sub(r"v\d+$", "", aid.strip()).lower()
+
+
+def normalize_doi(doi):
+    """'https://doi.org/10.1000/ABC' -> '10.1000/abc'（DOI 不区分大小写）。"""
+    d = (doi or "").strip().lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:"):
+        if d.startswith(prefix):
+            d = d[len(prefix):]
+    return d
+
+
+def title_key(title):
+    """标题的规范形式：忽略大小写与多余空白。"""
+    return "title:" + " ".join((title or "").split()).casefold()
+
+
+def identity_keys(paper):
+    """论文的身份键列表（如 ['s2:…', 'arxiv:1706.03762', 'doi:…']），都没有时为空。"""
+    keys = []
+    if paper.get("paper_id_s2"):
+        keys.append("s2:" + paper["paper_id_s2"])
+    aid = canonical_arxiv_id(paper.get("arxiv_id") or paper.get("id"))
+    if aid:
+        keys.append("arxiv:" + aid)
+    doi = normalize_doi(paper.get("doi"))
+    if doi:
+        keys.append("doi:" + doi)
+    return keys
+
+
+def paper_key(paper):
+    """论文的主身份键（写入爬取日志的边用它指代论文）。"""
+    keys = identity_keys(paper)
+    return keys[0] if keys else title_key(paper.get("title"))
+
+
+def _is_empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def merge_paper(target, source):
+    """把 source 中 target 缺失（或为空）的字段补到 target 上。"""
+    for k, v in source.items():
+        if not _is_empty(v) and _is_empty(target.get(k)):
+            target[k] = v
+    return target
+
+
+class PaperIndex:
+    def __init__(self):
+        self._ids = {}        # 身份键 -> 内部 id
+        self._papers = []     # 内部 id -> 论文字典
+        self._alias = {}      # 被合并的内部 id -> 合并到的内部 id
+        self._by_title = {}   # 规范化标题 -> 首个内部 id（仅供按标题查找，不参与去重）
+
+    def __len__(self):
+        return len(self._papers) - len(self._alias)
+
+    def resolve(self, pid):
+        """跟随合并关系返回最终的内部 id。"""
+        while pid in self._alias:
+            pid = self._alias[pid]
+        return pid
+
+    def lookup(self, key):
+        """按身份键（或旧日志中的标题）查找内部 id；不存在返回 None。"""
+        pid = self._ids.get(key)
+        if pid is None:
+            pid = self._by_title.get(key if key.startswith("title:") else title_key(key))
+        return None if pid is None else self.resolve(pid)
+
+    def find(self, paper):
+        """论文已在索引中时返回其内部 id，否则返回 None（不写入）。"""
+        for key in identity_keys(paper) or [title_key(paper.get("title"))]:
+            pid = self._ids.get(key)
+            if pid is not None:
+                return self.resolve(pid)
+        return None
+
+    def add(self, paper):
+        """
+        加入论文并返回内部 id。已存在时把新字段补到已有记录上（保存的是首次到达的字典对象），
+        并登记新出现的身份键；新记录桥接了两条已有记录时把它们合并。
+        """
+        keys = identity_keys(paper) or [title_key(paper.get("title"))]
+        pids = []
+        for key in keys:
+            pid = self._ids.get(key)
+            if pid is not None:
+                pid = self.resolve(pid)
+                if pid not in pids:
+                    pids.append(pid)
+        if not pids:
+            pid = len(self._papers)
+            self._papers.append(paper)
+        else:
+            pid = min(pids)
+            merge_paper(self._papers[pid], paper)
+            for other in pids:
+                if other != pid:
+                    merge_paper(self._papers[pid], self._papers[other])
+                    self._alias[other] = pid
+        for key in keys:
+            self._ids[key] = pid
+        if paper.get("title"):
+            self._by_title.setdefault(title_key(paper["title"]), pid)
+        return pid
+
+    def get(self, pid):
+        return self._papers[self.resolve(pid)]
+
+    def ids(self):
+        """去重后的内部 id，按首次出现顺序。"""
+        return [pid for pid in range(len(self._papers)) if pid not in self._alias]
+
+    def papers(self):
+        """去重后的论文，按首次出现顺序。"""
+        return [self._papers[pid] for pid in self.ids()]
+
+    def display_title(self, pid):
+        """
+        图谱中使用的论文名：标题唯一时就是标题；不同论文同名时，
+        首个保留原标题，其余加上 arXiv id / S2 paperId 区分。
+        """
+        pid = self.resolve(pid)
+        paper = self._papers[pid]
+        title = paper.get("title") or ""
+        first = self._by_title.get(title_key(title))
+        if first is None or self.resolve(first) == pid:
+            return title
+        return f"{title} [{paper_key(paper)}]"
@@ -0,0 +1,154 @@
+"""
+进程内共享的自适应令牌桶限流器（用于 Semantic Scholar 等有配额的 API）。
+
+- 令牌桶：按当前速率补充令牌，容量即允许的突发请求数；
+- AIMD：成功时速率加性回升（不超过配额），遇 429 时速率减半；
+- Retry-After：服务端给出等待时间时，所有请求统一暂停到该时刻。
+
+S2 配额：无 Key 时约 100 次/5 分钟；配置 S2_API_KEY 后默认 1 次/秒，
+可通过 S2_RATE_LIMIT（如 "10/1" 表示 10 次/1 秒）按实际配额调整。
+"""
+
+import asyncio
+import email.utils
+import threading
+import time
+
+from config import S2_API_KEY, S2_RATE_LIMIT
+
+# (请求数, 时间窗口秒数, 突发容量)
+S2_QUOTA_UNAUTHENTICATED = (100, 300.0, 5)
+S2_QUOTA_API_KEY = (1, 1.0, 1)
+
+
+class AdaptiveRateLimiter:
+    """
+    线程安全的令牌桶，速率按 AIMD 自适应。
+    rate 为每秒令牌数；min_rate 为 429 连续减半的下限。
+    """
+
+    def __init__(self, rate, capacity=1, min_rate=None, increase_step=None, name="rate"):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate / 20
+        self.increase_step = float(increase_step) if increase_step else self.max_rate / 20
+        self.capacity = max(1.0, float(capacity))
+        self.name = name
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def _reserve(self, tokens):
+        """尝试取令牌：成功返回 0，否则返回还需等待的秒数。"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """阻塞直到拿到 tokens 个令牌。"""
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=1):
+        """acquire 的协程版本：等待时让出事件循环，与同步调用方共用同一个桶。"""
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def consume(self, tokens):
+        """直接扣除令牌（可扣成负数），用于事后按实际用量补扣。"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+
+    def on_success(self):
+        """请求成功：速率加性回升。"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self, retry_after=None):
+        """
+        遇到 429：速率减半并清空令牌；有 Retry-After 时所有请求暂停到该时刻，
+        否则至少等待一个新速率下的令牌间隔。返回本次暂停秒数。
+        """
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            now = time.monotonic()
+            self._last = now
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._blocked_until = max(self._blocked_until, now + pause)
+            return pause
+
+    def describe(self):
+        per_min = self.rate * 60
+        return f"{self.name}: 当前 {per_min:.1f} 次/分钟 (上限 {self.max_rate * 60:.1f})，429 共 {self.throttled} 次"
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头：秒数或 HTTP 日期；无法解析时返回 None。"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt is None:
+        return None
+    return max(0.0, dt.timestamp() - time.time())
+
+
+def _parse_rate_limit(spec):
+    """'10/1' -> (10, 1.0)；非法时返回 None。"""
+    try:
+        count, window = spec.split("/", 1)
+        count, window = int(count), float(window)
+    except (AttributeError, ValueError):
+        return None
+    if count <= 0 or window <= 0:
+        return None
+    return count, window
+
+
+_s2_limiter = None
+
+
+def get_s2_limiter():
+    """返回全进程共享的 S2 限流器（首次调用时按 S2_API_KEY / S2_RATE_LIMIT 创建）。"""
+    global _s2_limiter
+    if _s2_limiter is None:
+        count, window, burst = S2_QUOTA_API_KEY if S2_API_KEY else S2_QUOTA_UNAUTHENTICATED
+        custom = _parse_rate_limit(S2_RATE_LIMIT)
+        if custom:
+            count, window = custom
+            burst = count if S2_API_KEY else min(count, burst)
+        _s2_limiter = AdaptiveRateLimiter(count / window, capacity=burst, name="S2")
+    return _s2_limiter
+
+
+def s2_headers():
+    """S2 请求头：配置了 S2_API_KEY 时带 x-api-key。"""
+    return {"x-api-key": S2_API_KEY} if S2_API_KEY else {}
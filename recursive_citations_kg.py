@@ -8,125 +8,307 @@
   python recursive_citations_kg.py 1706.03762 -k 3 -d 2 --llm
 """
 
-import json
-import os
+import heapq
 import argparse
-from collections import deque
 
 # 复用 top_citations_kg 的拉取、元数据补全与可视化
 from top_citations_kg import (
     fetch_arxiv_paper,
+    fetch_arxiv_papers,
     fetch_related_papers_via_semantic_scholar,
     batch_ensure_metadata,
-    generate_html,
+    has_full_metadata,
+    write_kg_output,
     ALLOWED_TYPES,
 )
-from top_citations_kg import extract_knowledge_with_llm  # 可选 --llm
-from class_schema import normalize_entity_type
+from top_citations_kg import extract_knowledge_for_papers, LLM_WORKERS  # 可选 --llm
+from gazetteer import load_gazetteer, GAZETTEER_MIN_HITS  # 可选 --gazetteer
+from async_crawl import fetch_related_papers_concurrently  # 可选 --concurrency
+from kg_analytics import annotate_knowledge_graph, print_top  # 可选 --analytics
+from kg_community import annotate_communities, print_community_stats  # 可选 --communities
+from api_cache import configure_s2_cache, print_s2_cache_stats
+from corpus_store import DEFAULT_STORE_PATH, configure_corpus_store, print_corpus_store_stats, save_to_corpus_store
+from llm_cache import configure_llm_cache, print_llm_cache_stats
+from transport import get_transport
+from rate_limiter import get_s2_limiter
+from llm_client import get_llm_limiters
+from llm_metrics import report_llm_metrics
+from knowledge_graph import KnowledgeGraph
+from paper_identity import canonical_arxiv_id, paper_key
+from crawl_journal import CrawlJournal, read_journal, replay_journal, apply_node
+from crawl_scheduler import SCORERS, CrawlBudget
 
 
-def run_recursive_citations(arxiv_id, top_k=5, depth=2, run_llm=False):
+def _expand_node_record(aid, paper, rel, expanded_arxiv):
+    """
+    展开一篇论文：按顺序收集加入身份索引的论文、引用边（两端为 paper_key）与待展开的邻居。
+    已带摘要与作者的邻居（rich_fields）记入 meta：只记 arxiv_id -> paper_key，论文本身已在 assign 中。
+    返回 (node 记录, {邻居 arxiv_id: 邻居论文})；node 记录即写入日志的内容。
+    """
+    node = {"type": "node", "aid": aid, "assign": [paper], "edges": [], "next": [], "meta": {}}
+    neighbours = {}
+    key = paper_key(paper)
+    if rel:
+        for r in rel["references"]:
+            if r.get("title"):
+                node["assign"].append(r)
+                node["edges"].append((key, paper_key(r)))
+                rid = canonical_arxiv_id(r.get("arxiv_id"))
+                if rid and rid not in expanded_arxiv:
+                    node["next"].append(rid)
+                    neighbours.setdefault(rid, r)
+                    if has_full_metadata(r):
+                        node["meta"].setdefault(rid, paper_key(r))
+        for c in rel["citations"]:
+            if c.get("title"):
+                node["assign"].append(c)
+                node["edges"].append((paper_key(c), key))
+                cid = canonical_arxiv_id(c.get("arxiv_id"))
+                if cid and cid not in expanded_arxiv:
+                    node["next"].append(cid)
+                    neighbours.setdefault(cid, c)
+                    if has_full_metadata(c):
+                        node["meta"].setdefault(cid, paper_key(c))
+    return node, neighbours
+
+
+def _fetch_relations(aids, concurrency, fetch_opts, budget):
+    """
+    并发模式下并发拉取 aids 开头的一批论文的引用/被引，批大小不超过剩余请求预算能展开的篇数；
+    串行模式返回空表，由调用方逐篇拉取（拉完一篇即写日志）。
+    """
+    limit = budget.expansions_left()
+    if limit is not None:
+        aids = aids[:limit]
+    if concurrency > 1 and len(aids) > 1:
+        return dict(zip(aids, fetch_related_papers_concurrently(aids, concurrency=concurrency, **fetch_opts)))
+    return {}
+
+
+def _crawl_bfs(state, journal, depth, concurrency, fetch_opts, budget):
+    """逐层 BFS。返回因预算停止的原因，爬完返回 None。"""
+    expanded_arxiv = state["expanded_arxiv"]
+    arxiv_meta = state["arxiv_meta"]
+    frontier = state["frontier"]  # 当前层待展开的 arxiv_id（按 BFS 顺序）
+    level = state["level"]
+    level_open = state["level_open"]
+
+    # 每层先批量拉取本层缺元数据论文的 ArXiv 记录，再展开引用/被引；每步写入日志
+    while frontier:
+        if not level_open:
+            stop = budget.exhausted()
+            if stop:
+                return stop
+            frontier = [a for a in dict.fromkeys(frontier) if a not in expanded_arxiv]
+            expanded_arxiv.update(frontier)
+            new_meta = fetch_arxiv_papers([a for a in frontier if a not in arxiv_meta])
+            arxiv_meta.update(new_meta)
+            journal.append({"type": "level", "level": level, "frontier": frontier, "meta": new_meta})
+            state["done"], state["next_frontier"] = set(), []
+        todo = [aid for aid in frontier if aid not in state["done"]]
+        expandable = [aid for aid in todo if aid in arxiv_meta] if level < depth else []
+        rel_by_aid = {}
+
+        # 按本层顺序合并，保证串行与并发得到相同的图谱；每次拉取（逐篇或并发一批）前检查预算，
+        # 已并发拉到的结果照常合并
+        for aid in todo:
+            paper = arxiv_meta.get(aid)
+            if not paper:
+                continue
+            if aid not in rel_by_aid:
+                stop = budget.exhausted()
+                if stop:
+                    return stop
+            rel = None
+            if level < depth:
+                if concurrency > 1 and aid not in rel_by_aid:
+                    rel_by_aid = _fetch_relations(expandable[expandable.index(aid):], concurrency, fetch_opts, budget)
+                rel = rel_by_aid.get(aid) or fetch_related_papers_via_semantic_scholar(aid, **fetch_opts)
+            node, _ = _expand_node_record(aid, paper, rel, expanded_arxiv)
+            apply_node(state, node)
+            journal.append(node)
+        frontier = state["next_frontier"]
+        level += 1
+        level_open = False
+    return None
+
+
+def _crawl_best_first(state, journal, arxiv_id, depth, concurrency, fetch_opts, budget, score_fn):
+    """
+    best-first：优先队列按 score_fn 分数从高到低展开（仍受深度 depth 限制），
+    每轮取出 max(1, concurrency) 篇（不超过剩余请求预算能展开的篇数），批量拉取 ArXiv 元数据、并发展开。
+    返回因预算停止的原因。
+    """
+    expanded_arxiv = state["expanded_arxiv"]
+    arxiv_meta = state["arxiv_meta"]
+    heap = []  # (-分数, 入队序号, arxiv_id, 层)
+    if arxiv_id not in expanded_arxiv:
+        heapq.heappush(heap, (float("-inf"), -1, arxiv_id, 0))
+    for seq, (score, aid, level) in enumerate(state["heap_items"]):
+        if aid not in expanded_arxiv:
+            heapq.heappush(heap, (-score, seq, aid, level))
+    seq = len(state["heap_items"])
+
+    while heap:
+        stop = budget.exhausted()
+        if stop:
+            return stop
+        batch_size = max(1, concurrency)
+        if budget.expansions_left() is not None:
+            batch_size = min(batch_size, budget.expansions_left())
+        batch = []
+        while heap and len(batch) < batch_size:
+            _, _, aid, level = heapq.heappop(heap)
+            if aid not in expanded_arxiv and all(aid != b for b, _ in batch):
+                batch.append((aid, level))
+        if not batch:
+            break
+        new_meta = fetch_arxiv_papers([aid for aid, _ in batch if aid not in arxiv_meta])
+        arxiv_meta.update(new_meta)
+        expandable = [aid for aid, level in batch if aid in arxiv_meta and level < depth]
+        stop = budget.exhausted()
+        if stop:
+            return stop
+        rel_by_aid = _fetch_relations(expandable, concurrency, fetch_opts, budget)
+
+        for aid, level in batch:
+            if aid not in rel_by_aid:
+                stop = budget.exhausted()
+                if stop:
+                    return stop
+            paper = arxiv_meta.get(aid)
+            if paper:
+                rel = None
+                if level < depth:
+                    rel = rel_by_aid.get(aid) or fetch_related_papers_via_semantic_scholar(aid, **fetch_opts)
+                node, neighbours = _expand_node_record(aid, paper, rel, expanded_arxiv)
+            else:
+                node, neighbours = {"type": "node", "aid": aid, "assign": [], "edges": [], "next": [], "meta": {}}, {}
+            if aid in new_meta:
+                node["meta"][aid] = paper_key(new_meta[aid])
+            node["push"] = [[score_fn(p, level + 1), nid, level + 1] for nid, p in neighbours.items()]
+            apply_node(state, node)
+            journal.append(node)
+            for score, nid, nlevel in node["push"]:
+                heapq.heappush(heap, (-score, seq, nid, nlevel))
+                seq += 1
+    return None
+
+
+def run_recursive_citations(
+    arxiv_id,
+    top_k=5,
+    depth=2,
+    run_llm=False,
+    concurrency=1,
+    max_scan=None,
+    rich_fields=False,
+    resume=False,
+    journal_path=None,
+    strategy="bfs",
+    score="citations",
+    max_requests=None,
+    max_seconds=None,
+    llm_workers=LLM_WORKERS,
+    llm_pack=1,
+    gazetteer=None,
+    gazetteer_min=GAZETTEER_MIN_HITS,
+    stream=False,
+    analytics=False,
+    communities=False,
+):
     """
     递归展开引用/被引：每层对当前论文取 top_k 引用 + top_k 被引，直到深度 depth。
     depth=1：仅种子论文 + 其 top_k 引用/被引（等价于不递归）。
     depth=2：再展开上述每篇的 top_k 引用/被引，不再递归。
+    concurrency > 1 时同层的 S2 请求经 async_crawl 并发发出（需 aiohttp），结果与串行一致。
+    max_scan 限制每篇论文引用/被引各最多扫描的条数（见 fetch_related_papers_via_semantic_scholar）。
+    rich_fields 为 True 时邻居论文随引用列表带回摘要与作者，展开时不再逐层拉取 ArXiv，也不再补全元数据。
+    爬取过程逐步写入日志 journal_path（默认 recursive_kg_<id>_k<k>_d<d>.journal.jsonl）；
+    resume 为 True 时先回放该日志恢复状态，从中断处继续。
+    strategy="best-first" 时按 score（citations / recency / distance，见 crawl_scheduler）优先展开价值高的论文；
+    max_requests、max_seconds 为爬取预算，用尽即停止爬取并照常输出已抓到的图谱。
+    llm_workers 为 LLM 并发抽取线程数，llm_pack > 1 时每次请求打包抽取 llm_pack 篇；合并顺序与串行一致。
+    gazetteer 不为空时先用本地词典抽取，命中不足 gazetteer_min 个词条的论文才调用 LLM。
+    stream 为 True 时输出流式 JSONL（.kg.jsonl）而不是缩进 JSON。
+    analytics 为 True 时在输出前计算引用图的 PageRank / HITS / 出入度并写进论文实体（见 kg_analytics，需 scipy）。
+    communities 为 True 时在输出前按引用与署名边做社区发现，把 community 写进论文与作者实体（见 kg_community）。
+    启用语料库（configure_corpus_store）时已展开过的论文直接读库，结束后把论文与图谱写回库中。
     """
+    arxiv_id = canonical_arxiv_id(arxiv_id)
     print("\n" + "=" * 60)
     print("🚀 递归引用知识图谱 (Recursive Citations KG)")
     print("=" * 60)
     print(f"   ArXiv ID: {arxiv_id}, Top K: {top_k}, 深度: {depth}")
+    if strategy != "bfs":
+        print(f"   调度: {strategy} (评分: {score})")
 
-    seed = fetch_arxiv_paper(arxiv_id)
-    if not seed:
-        return False
-
-    papers_by_title = {seed["title"]: seed}
-    edges = []  # (head_title, tail_title)
-    expanded_arxiv = set()
-    to_expand = deque([(arxiv_id, 0)])  # (arxiv_id, level)
-
-    while to_expand:
-        aid, level = to_expand.popleft()
-        if aid in expanded_arxiv:
-            continue
-        expanded_arxiv.add(aid)
-        paper = fetch_arxiv_paper(aid) if aid else None
-        if not paper:
-            continue
-        papers_by_title[paper["title"]] = paper
-
-        if level >= depth:
-            continue
-        rel = fetch_related_papers_via_semantic_scholar(aid, top_n=top_k)
-        for r in rel["references"]:
-            if r.get("title"):
-                papers_by_title[r["title"]] = r
-                edges.append((paper["title"], r["title"]))
-                rid = r.get("arxiv_id")
-                if rid and rid not in expanded_arxiv:
-                    to_expand.append((rid, level + 1))
-        for c in rel["citations"]:
-            if c.get("title"):
-                papers_by_title[c["title"]] = c
-                edges.append((c["title"], paper["title"]))
-                cid = c.get("arxiv_id")
-                if cid and cid not in expanded_arxiv:
-                    to_expand.append((cid, level + 1))
+    base_name = f"recursive_kg_{arxiv_id}_k{top_k}_d{depth}"
+    journal_path = journal_path or f"{base_name}.journal.jsonl"
+    journal = CrawlJournal(journal_path)
+    state = replay_journal(read_journal(journal_path)) if resume else None
+    if state is not None:
+        header = state["header"]
+        if (header["arxiv_id"], header["top_k"], header["depth"]) != (arxiv_id, top_k, depth) or (
+            header.get("strategy", "bfs"), header.get("score", "citations")
+        ) != (strategy, score):
+            print(f"❌ 日志 {journal_path} 的参数 (id/k/d/调度) 与本次运行不一致，无法续爬")
+            return False
+        print(f"[*] 从日志续爬: {journal_path}（已展开 {len(state['expanded_arxiv'])} 篇）")
+        seed = header["seed"]
+        journal.reopen()
+    else:
+        if resume:
+            print(f"   ⚠️ 未找到可用的日志 {journal_path}，从头开始")
+        seed = fetch_arxiv_paper(arxiv_id)
+        if not seed:
+            return False
+        journal.start({
+            "arxiv_id": arxiv_id, "top_k": top_k, "depth": depth,
+            "strategy": strategy, "score": score, "seed": seed,
+        })
+        state = replay_journal(read_journal(journal_path))
+
+    fetch_opts = {"top_n": top_k, "max_scan": max_scan, "rich_fields": rich_fields}
+    budget = CrawlBudget(max_requests=max_requests, max_seconds=max_seconds)
+    stop_reason = None
+    if not state["finished"]:
+        if strategy == "best-first":
+            stop_reason = _crawl_best_first(
+                state, journal, arxiv_id, depth, concurrency, fetch_opts, budget, SCORERS[score]
+            )
+        else:
+            stop_reason = _crawl_bfs(state, journal, depth, concurrency, fetch_opts, budget)
+        if stop_reason:
+            print(f"\n[*] 爬取预算已用尽（{stop_reason}），停止展开，输出已抓取部分（可 --resume 继续）")
+        else:
+            journal.append({"type": "crawl_done"})
+    journal.close()
+    index = state["papers"]
+    seed_pid = index.find(seed)
+    pids = index.ids()
+    edges = [(index.resolve(h), index.resolve(t)) for h, t in state["edges"]]  # (头论文 id, 尾论文 id)
 
-    all_papers = list(papers_by_title.values())
+    all_papers = [index.get(pid) for pid in pids]
     batch_ensure_metadata(all_papers)
 
-    seen_names = set()
-    entities = []
-    triples = []
-
-    for p in all_papers:
-        name = p.get("title") or ""
-        if name and name not in seen_names:
-            entities.append({
-                "name": name,
-                "type": normalize_entity_type("AIPaper", allowed=ALLOWED_TYPES),
-                "arxiv_id": p.get("arxiv_id") or p.get("id", ""),
-            })
-            seen_names.add(name)
-    for p in all_papers:
-        for a in p.get("authors", []):
-            a = (a or "").strip()
-            if a and a not in seen_names:
-                entities.append({"name": a, "type": normalize_entity_type("Researcher", allowed=ALLOWED_TYPES)})
-                seen_names.add(a)
-
-    for p in all_papers:
-        for a in p.get("authors", []):
-            a = (a or "").strip()
-            if a and p.get("title"):
-                triples.append({"head": a, "relation": "author_of", "tail": p["title"]})
-    for h, t in edges:
-        if h and t:
-            triples.append({"head": h, "relation": "cites", "tail": t})
+    titles = {pid: index.display_title(pid) for pid in pids}
+    kg = KnowledgeGraph(ALLOWED_TYPES)
+    kg.add_papers(all_papers, titles=[titles[pid] for pid in pids])
+    kg.add_triples("cites", [(titles[h], titles[t]) for h, t in edges if h != t])
 
     if run_llm:
-        for p in all_papers:
-            llm_data = extract_knowledge_with_llm(p)
-            id_to_name = {}
-            for e in llm_data.get("entities", []):
-                n = e.get("name")
-                if n:
-                    if n not in seen_names:
-                        raw_type = e.get("type", "Thesis")
-                        entities.append({"name": n, "type": normalize_entity_type(raw_type, allowed=ALLOWED_TYPES)})
-                        seen_names.add(n)
-                    if e.get("id"):
-                        id_to_name[e["id"]] = n
-                    id_to_name[n] = n
-            for t in llm_data.get("triples", []):
-                head = t.get("head") or t.get("subject")
-                tail = t.get("tail") or t.get("object")
-                if not head or not tail:
-                    continue
-                head = id_to_name.get(head, head)
-                tail = id_to_name.get(tail, tail)
-                triples.append({"head": head, "relation": t.get("relation", ""), "tail": tail})
+        llm_results = extract_knowledge_for_papers(all_papers, llm_workers, llm_pack, gazetteer, gazetteer_min)
+        for llm_data in llm_results:
+            kg.add_llm_result(llm_data)
+    save_to_corpus_store(all_papers, kg)
+    if analytics:
+        graph, scores = annotate_knowledge_graph(kg)
+        print(f"\n[*] [图分析] 引用图: 节点 {graph.num_nodes}，边 {graph.num_edges}")
+        print_top(graph, scores, k=min(top_k, 10))
+    if communities:
+        print("\n[*] [社区] 按引用与署名边划分社区")
+        print_community_stats(annotate_communities(kg))
 
     def _paper_meta(p):
         return {
@@ -140,25 +322,28 @@ def run_recursive_citations(arxiv_id, top_k=5, depth=2, run_llm=False):
             "year": p.get("year"),
         }
 
-    ref_count = sum(1 for h, t in edges if h == seed["title"])
-    cite_count = sum(1 for h, t in edges if t == seed["title"])
+    ref_count = sum(1 for h, t in edges if h == seed_pid)
+    cite_count = sum(1 for h, t in edges if t == seed_pid)
     output_data = {
         "paper_metadata": seed,
         "related_papers_count": {"references": ref_count, "citations": cite_count},
-        "related_papers": [_paper_meta(p) for p in all_papers if p["title"] != seed["title"]],
+        "related_papers": None,
         "top_k": top_k,
         "depth": depth,
-        "knowledge_graph": {"entities": entities, "triples": triples},
+        "knowledge_graph": None,
     }
+    if strategy != "bfs" or max_requests is not None or max_seconds is not None:
+        output_data["crawl"] = {
+            "strategy": strategy,
+            "score": score if strategy != "bfs" else None,
+            "expanded": len(state["expanded_arxiv"]),
+            "requests": budget.requests_used,
+            "seconds": round(budget.seconds_used, 1),
+            "stopped_by_budget": stop_reason,
+        }
 
-    base_name = f"recursive_kg_{arxiv_id}_k{top_k}_d{depth}"
-    json_path = f"{base_name}.json"
-    html_path = f"{base_name}.html"
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
-    print(f"\n✅ JSON 已保存: {json_path}")
-
-    generate_html(json_path, html_path, output_data)
+    related = (_paper_meta(index.get(pid)) for pid in pids if pid != seed_pid)
+    write_kg_output(base_name, output_data, kg, related, stream)
     return True
 
 
@@ -170,5 +355,78 @@ if __name__ == "__main__":
     parser.add_argument("-k", "--top", type=int, default=5, help="每层引用/被引各取前 K 篇 (默认 5)")
     parser.add_argument("-d", "--depth", type=int, default=2, help="递归深度 (默认 2：本论文 + 一层邻接 + 二层邻接)")
     parser.add_argument("--llm", action="store_true", help="是否进行 LLM 深度抽取")
+    parser.add_argument("--llm-workers", type=int, default=LLM_WORKERS, help=f"LLM 并发抽取线程数 (默认 {LLM_WORKERS})")
+    parser.add_argument("--llm-pack", type=int, default=1, help="每次 LLM 请求打包抽取的论文篇数 (默认 1 即逐篇)")
+    parser.add_argument(
+        "--gazetteer", nargs="*", default=None, metavar="KG_JSON",
+        help="与 --llm 同用：先用本地词典抽取（词条取自给定的图谱 JSON，不给路径则读取当前目录下已生成的图谱）",
+    )
+    parser.add_argument(
+        "--gazetteer-min", type=int, default=GAZETTEER_MIN_HITS,
+        help=f"词典命中的不同专有词条数不少于此值时不再调用 LLM (默认 {GAZETTEER_MIN_HITS})",
+    )
+    parser.add_argument("--concurrency", type=int, default=1, help="同层并发请求数 (默认 1 即串行；>1 需 aiohttp)")
+    parser.add_argument("--max-scan", type=int, default=None, help="每篇论文引用/被引各最多扫描的条数 (默认全部扫描)")
+    parser.add_argument("--rich-fields", action="store_true", help="拉取引用/被引时一并取摘要与作者，省去逐篇补全请求")
+    parser.add_argument("--resume", action="store_true", help="从上次中断的爬取日志继续")
+    parser.add_argument("--journal", default=None, help="爬取日志路径 (默认 recursive_kg_<id>_k<k>_d<d>.journal.jsonl)")
+    parser.add_argument("--strategy", choices=["bfs", "best-first"], default="bfs", help="展开顺序 (默认 bfs)")
+    parser.add_argument(
+        "--score", choices=sorted(SCORERS), default="citations",
+        help="best-first 评分：citations 引用量 / recency 按年龄归一化的引用量 / distance 与种子距离",
+    )
+    parser.add_argument("--max-requests", type=int, default=None, help="最多发出的网络请求数（缓存命中不计）")
+    parser.add_argument("--max-seconds", type=float, default=None, help="最长爬取耗时（秒）")
+    parser.add_argument("--cache-dir", default=None, help="S2 响应缓存目录 (默认: 脚本目录下 .cache)")
+    parser.add_argument("--no-cache", action="store_true", help="不读写 S2 响应缓存")
+    parser.add_argument("--no-llm-cache", action="store_true", help="不读写 LLM 抽取结果缓存")
+    parser.add_argument("--refresh-llm-cache", action="store_true", help="清空 LLM 抽取缓存后重新抽取（提示词调整后使用）")
+    parser.add_argument("--stream", action="store_true", help="输出流式 JSONL（.kg.jsonl，逐条写出）而不是缩进 JSON")
+    parser.add_argument(
+        "--store", nargs="?", const=DEFAULT_STORE_PATH, default=None, metavar="SQLITE",
+        help=f"累积写入语料库并优先从库中读取已爬过的论文 (不给路径时为 {DEFAULT_STORE_PATH})",
+    )
+    parser.add_argument(
+        "--analytics", action="store_true",
+        help="输出前计算引用图 PageRank / HITS / 出入度并写进论文实体，HTML 节点大小随 PageRank (需 scipy)",
+    )
+    parser.add_argument(
+        "--communities", action="store_true",
+        help="输出前按引用与署名边做社区发现，HTML 节点按社区着色 (需 scipy)",
+    )
     args = parser.parse_args()
-    run_recursive_citations(args.arxiv_id, top_k=args.top, depth=args.depth, run_llm=args.llm)
\ No newline at end of file
+    configure_s2_cache(args.cache_dir, enabled=not args.no_cache)
+    configure_corpus_store(args.store)
+    configure_llm_cache(args.cache_dir, enabled=not args.no_llm_cache, refresh=args.refresh_llm_cache)
+    run_recursive_citations(
+        args.arxiv_id,
+        top_k=args.top,
+        depth=args.depth,
+        run_llm=args.llm,
+        concurrency=args.concurrency,
+        max_scan=args.max_scan,
+        rich_fields=args.rich_fields,
+        resume=args.resume,
+        journal_path=args.journal,
+        strategy=args.strategy,
+        score=args.score,
+        max_requests=args.max_requests,
+        max_seconds=args.max_seconds,
+        llm_workers=args.llm_workers,
+        llm_pack=args.llm_pack,
+        gazetteer=load_gazetteer(args.gazetteer) if args.gazetteer is not None else None,
+        gazetteer_min=args.gazetteer_min,
+        stream=args.stream,
+        analytics=args.analytics,
+        communities=args.communities,
+    )
+    print_s2_cache_stats()
+    print_llm_cache_stats()
+    print_corpus_store_stats()
+    report_llm_metrics()
+    print(f"[*] [S2 限流] {get_s2_limiter().describe()}")
+    if args.llm:
+        for limiter in get_llm_limiters():
+            print(f"[*] [LLM 限流] {limiter.describe()}")
+    if get_transport().mode != "live" or get_transport().injected_429:
+        print(f"[*] [传输层] {get_transport().describe()}")
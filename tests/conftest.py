@@ -0,0 +1,6 @@
+"""pytest 配置：项目模块都在仓库根目录，测试时把根目录加入导入路径。"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,89 @@
+"""
+测试用的离线 S2 / arXiv 网络：为一个小的合成引用网络生成 transport 的 replay 夹具，
+并把传输层、S2 限流器与缓存换成适合测试的配置（回放、不限速、不缓存）。
+"""
+
+import json
+
+import api_cache
+import rate_limiter
+import recursive_citations_kg
+import top_citations_kg
+import transport
+
+SEED = "2101.00000"
+N_PAPERS = 12
+
+
+def arxiv_id(i):
+    return f"2101.{i:05d}"
+
+
+def s2_paper(i):
+    return {
+        "paperId": f"s2-{i}",
+        "title": f"Paper {i}",
+        "externalIds": {"ArXiv": arxiv_id(i)},
+        "citationCount": (i * 37) % 101,
+        "year": 2000 + i,
+        "abstract": f"Abstract of paper {i}.",
+        "authors": [{"name": f"Author {i}"}, {"name": f"Author {(i + 1) % N_PAPERS}"}],
+    }
+
+
+def references(i):
+    """论文 i 引用编号更大的三篇论文（取模成环），每篇论文的引用与被引都不为空。"""
+    return [(i + d) % N_PAPERS for d in (1, 3, 5)]
+
+
+def write_fixtures(fixture_dir):
+    """写出每篇论文两个方向、普通与 rich 字段的分页响应，以及种子论文的 arXiv 元数据。"""
+    recorder = transport.Transport(mode="record", fixture_dir=str(fixture_dir))
+    cited_by = {i: [] for i in range(N_PAPERS)}
+    for i in range(N_PAPERS):
+        for j in references(i):
+            cited_by[j].append(i)
+    for i in range(N_PAPERS):
+        for direction, item_key, others in (
+            ("references", "citedPaper", references(i)),
+            ("citations", "citingPaper", cited_by[i]),
+        ):
+            for fields in (top_citations_kg.S2_RELATION_FIELDS, top_citations_kg.S2_RELATION_FIELDS_RICH):
+                url = (
+                    f"{top_citations_kg.S2_API_BASE}/paper/ARXIV:{arxiv_id(i)}/{direction}"
+                    f"?fields={fields}&offset=0&limit={top_citations_kg.S2_RELATION_PAGE_SIZE}"
+                )
+                names = set(fields.split(","))
+                body = {"offset": 0, "data": [
+                    {item_key: {k: v for k, v in s2_paper(j).items() if k in names}} for j in others
+                ]}
+                recorder._save("s2", transport.Transport._http_key("GET", url, None),
+                               {"status_code": 200, "headers": {}, "body": body})
+    seed = s2_paper(0)
+    recorder._save("arxiv", {"id_list": [SEED]}, {SEED: {
+        "id": SEED, "title": seed["title"], "abstract": seed["abstract"],
+        "authors": [a["name"] for a in seed["authors"]], "published_date": "2000-01-01", "pdf_url": "",
+    }})
+
+
+def use_replay_network(tmp_path, monkeypatch, faults=None):
+    """生成夹具并切换到 replay 传输层，返回该传输层（其 replayed 计数即回放的请求数）。"""
+    write_fixtures(tmp_path / "fixtures")
+    replay = transport.Transport(mode="replay", fixture_dir=str(tmp_path / "fixtures"), faults=faults)
+    monkeypatch.setattr(transport, "_transport", replay)
+    monkeypatch.setattr(rate_limiter, "_s2_limiter", rate_limiter.AdaptiveRateLimiter(1000, capacity=1000))
+    monkeypatch.setattr(api_cache, "_s2_cache_enabled", False)
+    return replay
+
+
+def run_crawl(tmp_path, monkeypatch, workdir, top_k=2, depth=3, **kwargs):
+    """在 tmp_path/workdir 下以 rich_fields 递归爬取种子论文，返回输出 JSON。"""
+    (tmp_path / workdir).mkdir(exist_ok=True)
+    monkeypatch.chdir(tmp_path / workdir)
+    assert recursive_citations_kg.run_recursive_citations(SEED, top_k=top_k, depth=depth, rich_fields=True, **kwargs)
+    with open(f"recursive_kg_{SEED}_k{top_k}_d{depth}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def graph_of(output):
+    return output["knowledge_graph"], output["related_papers"]
@@ -0,0 +1,34 @@
+from api_cache import SQLiteCache, normalize_s2_url
+
+BASE = "https://api.semanticscholar.org/graph/v1/paper/ARXIV:1706.03762/references"
+
+
+def test_field_order_and_duplicates_share_a_key():
+    a = normalize_s2_url(f"{BASE}?fields=title,year,title&offset=0&limit=1000")
+    b = normalize_s2_url(f"{BASE}?limit=1000&offset=0&fields=year, title")
+    assert a == b
+
+
+def test_scheme_and_host_case_do_not_matter():
+    assert normalize_s2_url(f"{BASE}?fields=title") == normalize_s2_url(
+        "http://API.SemanticScholar.org/graph/v1/paper/ARXIV:1706.03762/references?fields=title"
+    )
+
+
+def test_different_pages_get_different_keys():
+    assert normalize_s2_url(f"{BASE}?fields=title&offset=0") != normalize_s2_url(f"{BASE}?fields=title&offset=1000")
+
+
+def test_path_keeps_case_and_empty_query_has_no_question_mark():
+    key = normalize_s2_url("https://api.semanticscholar.org/graph/v1/paper/ARXIV:1706.03762")
+    assert key == "api.semanticscholar.org/graph/v1/paper/ARXIV:1706.03762"
+
+
+def test_cache_stores_none_and_expires(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite"))
+    cache.set("missing", None)
+    cache.set("stale", {"a": 1}, ttl=-1)
+    assert cache.get("missing") == (True, None)
+    assert cache.get("stale") == (False, None)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    cache.close()
@@ -0,0 +1,94 @@
+import pytest
+
+import top_citations_kg
+from async_crawl import aiohttp, fetch_related_papers_concurrently
+from rate_limiter import AdaptiveRateLimiter
+from s2_replay import N_PAPERS, arxiv_id, graph_of, run_crawl, use_replay_network
+from top_citations_kg import fetch_related_papers_via_semantic_scholar
+from transport import TransportResponse
+
+needs_aiohttp = pytest.mark.skipif(aiohttp is None, reason="需要 aiohttp")
+
+# 乱序且含重复的输入
+IDS = [arxiv_id(i) for i in (7, 2, 11, 2, 0, 5, 9, 3)]
+
+
+@needs_aiohttp
+@pytest.mark.parametrize("rich_fields", [False, True])
+def test_concurrent_results_match_serial_in_input_order(tmp_path, monkeypatch, rich_fields):
+    use_replay_network(tmp_path, monkeypatch)
+    serial = [fetch_related_papers_via_semantic_scholar(aid, top_n=2, rich_fields=rich_fields) for aid in IDS]
+    concurrent = fetch_related_papers_concurrently(IDS, top_n=2, concurrency=4, rich_fields=rich_fields)
+    assert concurrent == serial
+    assert all(rel["references"] and rel["citations"] for rel in concurrent)
+
+
+@needs_aiohttp
+def test_concurrent_fetch_retries_injected_429s(tmp_path, monkeypatch):
+    replay = use_replay_network(tmp_path, monkeypatch, faults={"every": 3, "retry_after": 0})
+    ids = [arxiv_id(i) for i in range(N_PAPERS)]
+    concurrent = fetch_related_papers_concurrently(ids, top_n=2, concurrency=4)
+    assert replay.injected_429 > 0
+    serial = [fetch_related_papers_via_semantic_scholar(aid, top_n=2) for aid in ids]
+    assert concurrent == serial
+
+
+@needs_aiohttp
+def test_crawl_with_concurrency_matches_serial_crawl(tmp_path, monkeypatch):
+    use_replay_network(tmp_path, monkeypatch)
+    serial = run_crawl(tmp_path, monkeypatch, "serial")
+    concurrent = run_crawl(tmp_path, monkeypatch, "concurrent", concurrency=4)
+    assert graph_of(concurrent) == graph_of(serial)
+    assert len(serial["knowledge_graph"]["triples"]) > 10
+
+
+# ---------- 同步与异步共用的 S2 请求步骤（_s2_request_steps） ----------
+
+@pytest.fixture
+def s2_steps_env(monkeypatch):
+    limiter = AdaptiveRateLimiter(10)
+    monkeypatch.setattr(top_citations_kg, "get_s2_cache", lambda: None)
+    monkeypatch.setattr(top_citations_kg, "get_s2_limiter", lambda: limiter)
+    return limiter
+
+
+def _run_request(responses, **kwargs):
+    """驱动 _s2_request_steps：http 步骤依次取 responses（异常实例会被 throw 进去），返回 (结果, 动作序列)。"""
+    steps = top_citations_kg._s2_request_steps("https://api.semanticscholar.org/graph/v1/paper/X", **kwargs)
+    actions = []
+    responses = list(responses)
+    try:
+        action = next(steps)
+        while True:
+            actions.append(action[0] if action[0] != "sleep" else ("sleep", action[1]))
+            if action[0] == "http":
+                r = responses.pop(0)
+                action = steps.throw(r) if isinstance(r, Exception) else steps.send(r)
+            else:
+                action = steps.send(None)
+    except StopIteration as stop:
+        return stop.value, actions
+
+
+def test_429_throttles_the_limiter_then_retries(s2_steps_env):
+    result, actions = _run_request([
+        TransportResponse(429, {"Retry-After": "0"}),
+        TransportResponse(200, body={"ok": 1}),
+    ])
+    assert result == {"ok": 1}
+    assert actions == ["acquire", "http", "acquire", "http"]
+    assert s2_steps_env.throttled == 1 and s2_steps_env.rate == 10 / 2 + 10 / 20
+
+
+def test_503_and_network_errors_back_off_exponentially(s2_steps_env):
+    result, actions = _run_request(
+        [TransportResponse(503), ConnectionError("reset"), TransportResponse(200, body=[1])], base_delay=1,
+    )
+    assert result == [1]
+    assert [a for a in actions if isinstance(a, tuple)] == [("sleep", 1), ("sleep", 2)]
+
+
+def test_404_returns_none_and_errors_propagate_after_retries(s2_steps_env):
+    assert _run_request([TransportResponse(404)])[0] is None
+    with pytest.raises(ConnectionError):
+        _run_request([ConnectionError("down")] * 2, max_retries=1, base_delay=0)
@@ -0,0 +1,79 @@
+import pytest
+
+from corpus_store import CorpusStore
+
+SEED = "2101.00001"
+
+
+def _paper(title, citations=0, **ids):
+    return dict(title=title, citation_count=citations, **ids)
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = CorpusStore(str(tmp_path / "corpus.sqlite"))
+    yield s
+    s.close()
+
+
+def test_rows_bridged_later_by_a_doi_are_merged(store):
+    by_s2 = _paper("Deep Nets", 5, paper_id_s2="s2-a")
+    by_doi = dict(_paper("Deep nets", doi="10.1000/DEEP"), abstract="An abstract.", authors=["Ann", "Bob"])
+    store.upsert_papers([by_s2, by_doi])
+    store.record_expansion(SEED, {"references": [by_s2], "citations": [by_doi]}, top_n=5)
+    assert store.counts()["papers"] == 3
+
+    # 后到的记录同时带 S2 id 与 DOI：两行合并为一行，边与作者改指保留的行
+    [kept] = store.upsert_papers([{"paper_id_s2": "s2-a", "doi": "https://doi.org/10.1000/deep", "arxiv_id": "2101.00002"}])
+    counts = store.counts()
+    assert (counts["papers"], counts["citations"], counts["authors"]) == (2, 2, 2)
+    merged = store.find_paper({"doi": "10.1000/deep"})
+    assert merged == store.find_paper({"paper_id_s2": "s2-a"}) == store.find_paper({"arxiv_id": "2101.00002"})
+    assert (merged["title"], merged["citation_count"], merged["abstract"], merged["authors"]) == (
+        "Deep Nets", 5, "An abstract.", ["Ann", "Bob"]
+    )
+
+    papers, edges = store.neighbourhood(SEED, top_k=5, depth=1)
+    assert [p.get("title") for p in papers] == [None, "Deep Nets"] and sorted(edges) == [(0, 1), (1, 0)]
+    rel = store.get_expansion(SEED, 5)
+    assert rel["references"] == rel["citations"] == [merged]
+    assert store._conn.execute("SELECT new_id FROM paper_alias").fetchall() == [(kept,)]
+
+
+def test_merge_keeps_first_seen_fields(store):
+    store.upsert_papers([_paper("Old title", 1, paper_id_s2="x")])
+    store.upsert_papers([_paper("New title", 9, paper_id_s2="x", arxiv_id="2101.00003")])
+    p = store.find_paper({"arxiv_id": "2101.00003"})
+    assert (p["title"], p["citation_count"], p["paper_id_s2"]) == ("Old title", 1, "x")
+
+
+def _expand(store, arxiv_id, **kwargs):
+    refs = [_paper(f"ref {i}", 10 - i, paper_id_s2=f"r{i}") for i in range(5)]
+    store.record_expansion(arxiv_id, {"references": refs, "citations": []}, **kwargs)
+
+
+def test_truncated_scan_misses_for_other_scan_limits(store):
+    _expand(store, SEED, top_n=5, max_scan=100)
+    assert store.get_expansion(SEED, 5, max_scan=100) is not None
+    assert store.get_expansion(SEED, 5, max_scan=200) is None
+    assert store.get_expansion(SEED, 5, max_scan=None) is None
+    assert store.get_expansion(SEED, 6, max_scan=100) is None
+    assert [p["title"] for p in store.get_expansion(SEED, 2, max_scan=100)["references"]] == ["ref 0", "ref 1"]
+
+    _expand(store, "2101.00009", top_n=5)  # 全量扫描的记录可供任何扫描范围复用
+    assert store.get_expansion("2101.00009", 5, max_scan=50) is not None
+    assert store.expansion_hits == 3
+
+
+def test_rich_runs_only_reuse_rich_records(store):
+    _expand(store, SEED, top_n=5)
+    assert store.get_expansion(SEED, 5, rich=True) is None
+    assert store.get_expansion(SEED, 5, rich=False) is not None
+    _expand(store, SEED, top_n=5, rich=True)
+    assert store.get_expansion(SEED, 5, rich=True) is not None
+    assert store.get_expansion(SEED, 5, rich=False) is not None
+
+
+def test_unknown_paper_misses(store):
+    assert store.get_expansion("2101.99999", 1) is None
+    assert store.neighbourhood("2101.99999") is None
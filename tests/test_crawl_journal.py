@@ -0,0 +1,82 @@
+from crawl_journal import CrawlJournal, apply_node, read_journal, replay_journal
+from paper_identity import paper_key
+
+SEED = {"id": "1000.00001", "title": "Seed", "abstract": "s", "authors": ["A"]}
+REF = {"title": "Ref", "arxiv_id": "1000.00002", "paper_id_s2": "r", "abstract": "r", "authors": ["B"]}
+CITER = {"title": "Citer", "arxiv_id": "1000.00003v2", "paper_id_s2": "c"}
+
+
+def _write(path, records):
+    journal = CrawlJournal(str(path))
+    journal.start({"arxiv_id": "1000.00001", "top_k": 2, "depth": 2, "seed": SEED})
+    for rec in records:
+        journal.append(rec)
+    journal.close()
+
+
+def _seed_node():
+    return {
+        "type": "node", "aid": "1000.00001", "assign": [SEED, REF, CITER],
+        "edges": [[paper_key(SEED), paper_key(REF)], [paper_key(CITER), paper_key(SEED)]],
+        "next": ["1000.00002", "1000.00003"],
+        "meta": {"1000.00002": paper_key(REF)},
+    }
+
+
+def test_replay_rebuilds_bfs_state(tmp_path):
+    path = tmp_path / "crawl.journal.jsonl"
+    _write(path, [{"type": "level", "level": 0, "frontier": ["1000.00001"], "meta": {}}, _seed_node()])
+    state = replay_journal(read_journal(str(path)))
+    papers = state["papers"]
+    assert [p["title"] for p in papers.papers()] == ["Seed", "Ref", "Citer"]
+    seed, ref, citer = papers.ids()
+    assert state["edges"] == [(seed, ref), (citer, seed)]
+    assert state["next_frontier"] == ["1000.00002", "1000.00003"]
+    assert state["expanded_arxiv"] == {"1000.00001"} and state["done"] == {"1000.00001"}
+    assert state["level_open"] and not state["finished"]
+    # meta 只记主身份键，回放时解析回索引中的论文记录
+    assert state["arxiv_meta"]["1000.00002"] is papers.get(ref)
+
+
+def test_half_written_last_line_is_ignored(tmp_path):
+    path = tmp_path / "crawl.journal.jsonl"
+    _write(path, [{"type": "level", "level": 0, "frontier": ["1000.00001"], "meta": {}}, _seed_node()])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "node", "aid": "1000.000')
+    records = read_journal(str(path))
+    assert [r["type"] for r in records] == ["start", "level", "node"]
+    assert replay_journal(records)["done"] == {"1000.00001"}
+
+
+def test_resume_after_reopen_appends(tmp_path):
+    path = tmp_path / "crawl.journal.jsonl"
+    _write(path, [{"type": "level", "level": 0, "frontier": ["1000.00001"], "meta": {}}])
+    journal = CrawlJournal(str(path))
+    journal.reopen()
+    journal.append(_seed_node())
+    journal.append({"type": "crawl_done"})
+    journal.close()
+    state = replay_journal(read_journal(str(path)))
+    assert state["finished"] and len(state["edges"]) == 2
+
+
+def test_old_journal_format_with_titles_and_full_meta():
+    state = replay_journal([
+        {"type": "start", "arxiv_id": "1000.00001", "seed": SEED},
+        {"type": "node", "aid": "1000.00001", "assign": [SEED, REF],
+         "edges": [["Seed", "Ref"]], "next": ["1000.00002"], "meta": {"1000.00002": dict(REF)}},
+    ])
+    assert len(state["edges"]) == 1
+    assert state["arxiv_meta"]["1000.00002"]["title"] == "Ref"
+
+
+def test_unknown_meta_key_is_skipped_and_best_first_pushes_kept():
+    state = replay_journal([{"type": "start", "arxiv_id": "1000.00001", "seed": SEED}])
+    apply_node(state, {"aid": "1000.00009", "meta": {"1000.00009": "arxiv:9999.99999"}, "push": [[5.0, "x", 1]]})
+    assert "1000.00009" not in state["arxiv_meta"]
+    assert state["heap_items"] == [[5.0, "x", 1]]
+
+
+def test_missing_start_record():
+    assert replay_journal([]) is None
+    assert replay_journal([{"type": "node", "aid": "x"}]) is None
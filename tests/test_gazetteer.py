@@ -0,0 +1,86 @@
+from gazetteer import MIN_DF_DOCS, AhoCorasick, Gazetteer
+
+
+def _kg(triples, entities=(), related=()):
+    return {
+        "paper_metadata": {},
+        "related_papers": list(related),
+        "knowledge_graph": {"entities": list(entities), "triples": list(triples)},
+    }
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    matcher = AhoCorasick()
+    for word in ("he", "she", "his", "hers"):
+        matcher.add(word, word)
+    assert sorted(matcher.iter_matches("ushers")) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+    assert list(matcher.iter_matches("xyz")) == []
+
+
+def test_aho_corasick_rebuilds_after_add():
+    matcher = AhoCorasick()
+    matcher.add("ab", 1)
+    assert [v for _, _, v in matcher.iter_matches("abc")] == [1]
+    matcher.add("bc", 2)
+    assert [v for _, _, v in matcher.iter_matches("abc")] == [1, 2]
+
+
+def test_match_respects_word_boundaries_and_prefers_longest():
+    g = Gazetteer()
+    g.add_kg(_kg([
+        {"head": "P", "relation": "baseline_model", "tail": "BERT"},
+        {"head": "P", "relation": "baseline_model", "tail": "BERT-Large"},
+        {"head": "P", "relation": "evaluated_on", "tail": "SQuAD"},
+    ]))
+    names = [info["name"] for info in g.match("We fine-tune BERT-Large on SQuAD and compare with RoBERTa and BERT.")]
+    assert names == ["BERT-Large", "SQuAD", "BERT"]
+
+
+def test_generic_terms_are_not_collected():
+    g = Gazetteer()
+    g.add_kg(_kg([
+        {"head": "P", "relation": "uses_metric", "tail": "accuracy"},
+        {"head": "P", "relation": "uses_metric", "tail": "Accuracy"},
+        {"head": "P", "relation": "baseline_model", "tail": "CNN"},
+        {"head": "P", "relation": "baseline_model", "tail": "neural network"},
+        {"head": "P", "relation": "uses_metric", "tail": "BLEU"},
+    ]))
+    assert set(g.terms) == {"bleu"}
+
+
+def test_extract_relations_and_confidence_counts_only_specific_terms():
+    g = Gazetteer()
+    g.add_kg(_kg([
+        {"head": "Transformer Paper", "relation": "proposed_model", "tail": "Transformer"},
+        {"head": "Other", "relation": "evaluated_on", "tail": "WMT 2014"},
+        {"head": "Other", "relation": "uses_metric", "tail": "BLEU"},
+    ]))
+    paper = {"title": "Transformer Paper", "abstract": "The Transformer reaches 28.4 BLEU on WMT 2014."}
+    result = g.extract(paper)
+    assert {(t["relation"], t["tail"]) for t in result["triples"]} == {
+        ("proposed_model", "Transformer"), ("uses_metric", "BLEU"), ("evaluated_on", "WMT 2014"),
+    }
+    # Transformer 只有首字母大写，不算专有词条：专有命中只有 BLEU 与 WMT 2014
+    assert g.extract_if_confident(paper, min_hits=2) == result
+    assert g.extract_if_confident(paper, min_hits=3) is None
+    # 在其他论文中出现时按基线处理
+    assert g.extract({"title": "Later", "abstract": "We compare with the Transformer."})["triples"] == [
+        {"head": "Later", "relation": "baseline_model", "tail": "Transformer"}
+    ]
+
+
+def test_terms_found_in_too_many_abstracts_are_dropped():
+    related = [{"title": f"Paper {i}", "abstract": f"Results on ImageNet, variant {i}."} for i in range(MIN_DF_DOCS)]
+    related[0]["abstract"] += " Also CIFAR-10."
+    g = Gazetteer()
+    g.add_kg(_kg(
+        [{"head": "P", "relation": "evaluated_on", "tail": "ImageNet"},
+         {"head": "P", "relation": "evaluated_on", "tail": "CIFAR-10"}],
+        related=related,
+    ))
+    g.prepare()
+    assert "imagenet" in g.common and "imagenet" not in g.terms
+    assert "cifar-10" in g.terms
+    # 已判为泛称的词条之后也不再收录
+    g.add_entity("ImageNet", "Dataset", "evaluated_on")
+    assert "imagenet" not in g.terms
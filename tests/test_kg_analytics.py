@@ -0,0 +1,69 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from kg_analytics import CitationGraph, annotate_entities, symbol_size  # noqa: E402
+from kg_columnar import load_columnar, save_columnar  # noqa: E402
+
+GOLDEN = (1 + 5 ** 0.5) / 2
+
+
+def _cites(*edges):
+    return [{"head": h, "relation": "cites", "tail": t} for h, t in edges]
+
+
+def test_pagerank_of_a_cycle_is_uniform():
+    g = CitationGraph.from_triples(_cites(("A", "B"), ("B", "C"), ("C", "A")))
+    pr, _ = g.pagerank()
+    assert pr == pytest.approx([1 / 3] * 3)
+
+
+def test_pagerank_with_a_dangling_node():
+    # B、C 都只引用 A，A 无出边（得分均匀回流）：x_B = x_C = 1 / (3 + 2d)，x_A = (1 + 2d) / (3 + 2d)
+    g = CitationGraph.from_triples(_cites(("B", "A"), ("C", "A")))
+    pr, iterations = g.pagerank(damping=0.85)
+    ranks = dict(zip(g.names, pr))
+    assert ranks["A"] == pytest.approx(2.7 / 4.7)
+    assert ranks["B"] == ranks["C"] == pytest.approx(1 / 4.7)
+    assert 1 < iterations < 200
+
+
+def test_hits_converges_to_golden_ratio_split():
+    # B -> A，C -> A，C -> D：AᵀA = [[2, 1], [1, 1]]，主特征向量按黄金比例分配
+    g = CitationGraph.from_triples(_cites(("B", "A"), ("C", "A"), ("C", "D")))
+    hub, authority, _ = g.hits()
+    hub, authority = dict(zip(g.names, hub)), dict(zip(g.names, authority))
+    assert (authority["A"], authority["D"]) == pytest.approx((1 / GOLDEN, 1 / GOLDEN ** 2))
+    assert (authority["B"], authority["C"]) == (0, 0)
+    assert (hub["C"], hub["B"]) == pytest.approx((1 / GOLDEN, 1 / GOLDEN ** 2))
+    assert (hub["A"], hub["D"]) == (0, 0)
+
+
+def test_duplicates_self_loops_and_other_relations_are_ignored():
+    triples = _cites(("A", "B"), ("A", "B"), ("B", "B")) + [{"head": "X", "relation": "author_of", "tail": "A"}]
+    g = CitationGraph.from_triples(triples)
+    assert (g.names, g.num_edges) == (["A", "B"], 1)
+    in_deg, out_deg = g.degrees()
+    assert (in_deg.tolist(), out_deg.tolist()) == ([0, 1], [1, 0])
+
+
+def test_scores_annotate_entities_and_drive_symbol_size():
+    g = CitationGraph.from_triples(_cites(("B", "A"), ("C", "A")))
+    scores = g.scores()
+    entities = [{"name": "A"}, {"name": "B"}, {"name": "Someone", "type": "Person"}]
+    out = list(annotate_entities(entities, g, scores))
+    assert out[0]["pagerank"] == pytest.approx(0.574468) and out[0]["in_degree"] == 2
+    assert (out[0]["pagerank_percentile"], out[1]["pagerank_percentile"]) == (1.0, pytest.approx(2 / 3, abs=1e-4))
+    assert "pagerank" not in out[2]
+    assert symbol_size(out[0], 20) == 60 and symbol_size(out[2], 20) == 20
+
+
+def test_columnar_graph_gives_same_scores(tmp_path):
+    triples = _cites(("B", "A"), ("C", "A"), ("C", "D"), ("D", "B"))
+    save_columnar({"entities": [{"name": "Author", "type": "Person"}], "triples": triples}, str(tmp_path / "g.kgc"))
+    from_json = CitationGraph.from_triples(triples)
+    from_kgc = CitationGraph.from_columnar(load_columnar(str(tmp_path / "g.kgc")))
+    a, b = from_json.scores(), from_kgc.scores()
+    for col in a:
+        assert dict(zip(from_json.names, a[col].tolist())) == dict(zip(from_kgc.names, b[col].tolist()))
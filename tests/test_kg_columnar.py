@@ -0,0 +1,77 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from kg_columnar import load_columnar, save_columnar  # noqa: E402
+
+KG = {
+    "entities": [
+        {"name": "A", "type": "AIPaper", "arxiv_id": "1", "aliases": ["a", "α"], "extra": {"k": [1, 2]},
+         "flag": True, "mixed": 1, "year": 2017, "score": 0.5},
+        {"name": "B", "type": "AIPaper", "aliases": [], "flag": False, "mixed": "x", "year": 2018},
+        {"name": "C", "type": "Researcher", "arxiv_id": "", "score": 2.5},
+    ],
+    "triples": [
+        {"head": "A", "relation": "cites", "tail": "B", "count": 2},
+        {"head": "C", "relation": "author_of", "tail": "A"},
+        {"head": "B", "relation": "co_cited", "tail": "Z", "weight": 0.25},
+    ],
+}
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip_is_exact(tmp_path, mmap):
+    meta = save_columnar({"knowledge_graph": KG}, str(tmp_path / "g.kgc"))
+    assert meta["attributes"] == {
+        "arxiv_id": "str", "aliases": "json", "extra": "json", "flag": "json", "mixed": "json",
+        "year": "int", "score": "float",
+    }
+    assert load_columnar(str(tmp_path / "g.kgc"), mmap=mmap).to_json() == KG
+
+
+def test_columns_and_edges(tmp_path):
+    save_columnar(KG, str(tmp_path / "g.kgc"))
+    g = load_columnar(str(tmp_path / "g.kgc"))
+    assert g.attribute("aliases") == [["a", "α"], [], None]
+    assert g.attribute("arxiv_id") == ["1", None, ""]
+    assert g.type_of(g.node_id("Z")) is None
+    src, dst = g.edges("cites")
+    assert [g.name(i) for i in src] == ["A"] and [g.name(i) for i in dst] == ["B"]
+
+
+def test_many_relations_and_types_widen_code_columns(tmp_path):
+    n = 40000
+    kg = {
+        "entities": [{"name": f"n{i}", "type": f"T{i}"} for i in range(n)],
+        "triples": [{"head": f"n{i}", "relation": f"r{i}", "tail": f"n{(i + 1) % n}"} for i in range(n)],
+    }
+    save_columnar(kg, str(tmp_path / "wide.kgc"))
+    g = load_columnar(str(tmp_path / "wide.kgc"))
+    assert g.relation.dtype == np.int32 and g.node_type.dtype == np.int32
+    assert g.type_of(n - 1) == f"T{n - 1}"
+    src, dst = g.edges(f"r{n - 1}")
+    assert (g.name(int(src[0])), g.name(int(dst[0]))) == (f"n{n - 1}", "n0")
+    assert g.to_json() == kg
+
+    save_columnar(KG, str(tmp_path / "small.kgc"))
+    small = load_columnar(str(tmp_path / "small.kgc"))
+    assert small.relation.dtype == np.int16 and small.node_type.dtype == np.int16
+
+
+@pytest.mark.parametrize("weight", ["0.5", True, [1]])
+def test_non_numeric_weight_is_rejected(tmp_path, weight):
+    kg = {"entities": [], "triples": [
+        {"head": "A", "relation": "co_cited", "tail": "B", "weight": 1},
+        {"head": "B", "relation": "co_cited", "tail": "C", "weight": weight},
+    ]}
+    with pytest.raises(ValueError, match="weight"):
+        save_columnar(kg, str(tmp_path / "g.kgc"))
+
+
+def test_integer_weights_round_trip_as_int(tmp_path):
+    kg = {"entities": [], "triples": [
+        {"head": "A", "relation": "coupled", "tail": "B", "weight": 3},
+        {"head": "A", "relation": "cites", "tail": "C"},
+    ]}
+    assert save_columnar(kg, str(tmp_path / "g.kgc"))["weighted"] == "int"
+    assert load_columnar(str(tmp_path / "g.kgc")).to_json() == kg
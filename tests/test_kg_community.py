@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sp = pytest.importorskip("scipy.sparse")
+
+import kg_community  # noqa: E402
+
+
+def _two_cliques(size=5):
+    """两个 size 个节点的完全子图，由一条边相连。"""
+    n = 2 * size
+    A = np.zeros((n, n))
+    for block in (range(size), range(size, n)):
+        for i in block:
+            for j in block:
+                if i != j:
+                    A[i, j] = 1
+    A[size - 1, size] = A[size, size - 1] = 1
+    return sp.csr_matrix(A)
+
+
+@pytest.mark.parametrize("n", [0, 1, 4])
+def test_edgeless_graph_keeps_every_node_apart(n):
+    S = sp.csr_matrix((n, n))
+    for method in (kg_community.louvain, kg_community.label_propagation):
+        labels, _ = method(S)
+        assert len(np.unique(labels)) == n
+
+
+def _planted(k=10, size=30, m=900, seed=1):
+    """k 个大小为 size 的社区，m 条随机边中约 90% 落在社区内部。"""
+    rng = np.random.default_rng(seed)
+    n = k * size
+    src = rng.integers(0, n, m)
+    same = rng.random(m) < 0.9
+    dst = np.where(same, (src // size) * size + rng.integers(0, size, m), rng.integers(0, n, m))
+    S = sp.csr_matrix((np.ones(m), (src, dst)), shape=(n, n))
+    S = (S + S.T).tocsr()
+    S.setdiag(0)
+    S.eliminate_zeros()
+    S.data[:] = 1.0
+    return S
+
+
+def test_louvain_separates_two_cliques():
+    S = _two_cliques()
+    labels, _ = kg_community.louvain(S)
+    communities, sizes = kg_community.relabel_by_size(labels)
+    assert sizes.tolist() == [5, 5]
+    assert len(set(communities[:5].tolist())) == 1 and len(set(communities[5:].tolist())) == 1
+
+
+@pytest.mark.parametrize("max_levels", [1, 2])
+def test_last_level_is_kept_when_level_cap_is_reached(max_levels):
+    S = _planted()
+    full, _ = kg_community.louvain(S)
+    capped, _ = kg_community.louvain(S, max_levels=max_levels)
+    assert len(np.unique(capped)) <= 15
+    assert kg_community.modularity(S, capped) > kg_community.modularity(S, full) - 0.05
+
+
+def test_only_nodes_on_community_relations_get_a_community(tmp_path):
+    papers = [f"P{i}" for i in range(6)]
+    triples = [{"head": a, "relation": "cites", "tail": b} for a in papers[:3] for b in papers[:3] if a != b]
+    triples += [{"head": a, "relation": "cites", "tail": b} for a in papers[3:] for b in papers[3:] if a != b]
+    triples += [{"head": "Ann", "relation": "author_of", "tail": "P0"}]
+    triples += [{"head": p, "relation": "evaluated_on", "tail": "ImageNet"} for p in papers]
+    entities = [{"name": n, "type": "Thesis"} for n in papers]
+    entities += [{"name": "Ann", "type": "Person"}, {"name": "ImageNet", "type": "Dataset"}]
+    path = tmp_path / "g.json"
+    path.write_text(json.dumps({"knowledge_graph": {"entities": entities, "triples": triples}}), encoding="utf-8")
+
+    kg_community.community_file(str(path))
+    data = json.loads(path.read_text(encoding="utf-8"))
+    community = {e["name"]: e.get("community") for e in data["knowledge_graph"]["entities"]}
+    assert community["ImageNet"] is None
+    assert community["Ann"] == community["P0"] == community["P1"] != community["P3"]
+
+    collapsed = kg_community.collapse_communities(data)
+    names = [e["name"] for e in collapsed["knowledge_graph"]["entities"]]
+    assert "ImageNet" in names and len(names) == 3
+    assert {t["relation"] for t in collapsed["knowledge_graph"]["triples"]} == {"evaluated_on"}
+
+    kg_community.community_file(str(path), relations=("cites", "author_of", "evaluated_on"))
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert all(e.get("community") is not None for e in data["knowledge_graph"]["entities"])
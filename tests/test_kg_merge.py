@@ -0,0 +1,104 @@
+from kg_merge import KGMerger
+
+
+def _graph(seed, entities, triples, related=()):
+    return {
+        "paper_metadata": seed,
+        "related_papers": list(related),
+        "knowledge_graph": {"entities": entities, "triples": triples},
+    }
+
+
+SEED = {"title": "Attention Is All You Need", "arxiv_id": "1706.03762"}
+
+
+def test_papers_identified_by_arxiv_id_and_triples_deduplicated():
+    merger = KGMerger()
+    merger.add(_graph(SEED, [
+        {"name": "Attention Is All You Need", "type": "AIPaper", "arxiv_id": "1706.03762"},
+        {"name": "BERT", "type": "AIPaper", "arxiv_id": "1810.04805"},
+        {"name": "Ashish Vaswani", "type": "Researcher"},
+    ], [
+        {"head": "BERT", "relation": "cites", "tail": "Attention Is All You Need"},
+        {"head": "Ashish Vaswani", "relation": "author_of", "tail": "Attention Is All You Need", "count": 2},
+    ]), label="a.json")
+    stats = merger.add(_graph(SEED, [
+        {"name": "Attention is all you need [arxiv:1706.03762]", "type": "AIPaper", "arxiv_id": "1706.03762v5"},
+        {"name": "BERT: Pre-training", "type": "AIPaper", "arxiv_id": "1810.04805v2", "year": 2018},
+        {"name": "ashish  vaswani", "type": "Researcher"},
+    ], [
+        {"head": "BERT: Pre-training", "relation": "cites", "tail": "Attention is all you need [arxiv:1706.03762]"},
+        {"head": "ashish  vaswani", "relation": "author_of", "tail": "Attention is all you need [arxiv:1706.03762]", "count": 3},
+        {"head": "BERT: Pre-training", "relation": "cites", "tail": "GPT"},
+    ]), label="b.json")
+
+    assert stats == {"file": "b.json", "entities": 3, "new_entities": 0, "triples": 3, "new_triples": 1}
+    entities = list(merger.iter_entities())
+    assert [e["name"] for e in entities] == ["Attention Is All You Need", "BERT", "Ashish Vaswani"]
+    assert entities[1]["year"] == 2018
+    triples = list(merger.iter_triples())
+    assert triples == [
+        {"head": "BERT", "relation": "cites", "tail": "Attention Is All You Need"},
+        {"head": "Ashish Vaswani", "relation": "author_of", "tail": "Attention Is All You Need", "count": 3},
+        {"head": "BERT", "relation": "cites", "tail": "GPT"},
+    ]
+    summary = merger.stats()
+    assert summary["input_triples"] == 5 and summary["unique_triples"] == 3
+    assert summary["shared_triples"] == 2
+    assert summary["triples_by_file_support"]["2"] == 2
+
+
+def test_same_name_different_papers_get_distinct_names():
+    merger = KGMerger()
+    merger.add(_graph({}, [{"name": "Deep Learning", "type": "AIPaper", "arxiv_id": "1111.00001"}], []))
+    merger.add(_graph({}, [{"name": "Deep Learning", "type": "AIPaper", "arxiv_id": "2222.00002"}], []))
+    assert [e["name"] for e in merger.iter_entities()] == ["Deep Learning", "Deep Learning [arxiv:2222.00002]"]
+
+
+def test_triple_seen_twice_in_one_file_counts_one_file_and_keeps_max_weight():
+    merger = KGMerger()
+    merger.add(_graph({}, [], [
+        {"head": "A", "relation": "co_cited", "tail": "B", "weight": 0.2},
+        {"head": "a", "relation": "co_cited", "tail": "b", "weight": 0.5},
+    ]))
+    (triple,) = merger.iter_triples()
+    assert triple["weight"] == 0.5
+    assert merger.stats()["shared_triples"] == 0
+
+
+def test_entities_identified_by_s2_id_or_doi_before_name():
+    merger = KGMerger()
+    merger.add(_graph({}, [
+        {"name": "Deep Residual Learning", "type": "AIPaper", "paper_id_s2": "s2-resnet"},
+        {"name": "Batch Norm", "type": "AIPaper", "doi": "10.5555/BN"},
+    ], [{"head": "Deep Residual Learning", "relation": "cites", "tail": "Batch Norm"}]))
+    merger.add(_graph({}, [
+        # 同一篇论文换了名字：S2 id 相同
+        {"name": "ResNet", "type": "AIPaper", "paper_id_s2": "s2-resnet", "doi": "10.1109/CVPR.2016.90"},
+        # 同一篇论文：DOI 大小写与前缀不同也视为相同
+        {"name": "Batch Normalization", "type": "AIPaper", "doi": "https://doi.org/10.5555/bn", "year": 2015},
+        # 名称相同但身份键不同：另一篇论文
+        {"name": "Deep Residual Learning", "type": "AIPaper", "paper_id_s2": "s2-other"},
+    ], [{"head": "ResNet", "relation": "cites", "tail": "Batch Normalization"}]))
+    merger.add(_graph({}, [
+        # 第二个文件把 S2 id 与 DOI 桥接起来，只给 DOI 的记录也归到同一节点
+        {"name": "Residual nets", "type": "AIPaper", "doi": "10.1109/cvpr.2016.90"},
+    ], [{"head": "Residual nets", "relation": "cites", "tail": "Batch Norm"}]))
+
+    entities = list(merger.iter_entities())
+    assert [e["name"] for e in entities] == [
+        "Deep Residual Learning", "Batch Norm", "Deep Residual Learning [s2:s2-other]"
+    ]
+    assert entities[0]["doi"] == "10.1109/CVPR.2016.90" and entities[1]["year"] == 2015
+    assert list(merger.iter_triples()) == [
+        {"head": "Deep Residual Learning", "relation": "cites", "tail": "Batch Norm"}
+    ]
+    assert merger.stats()["triples_by_file_support"]["3-4"] == 1
+
+
+def test_entities_without_identity_keys_fall_back_to_name():
+    merger = KGMerger()
+    merger.add(_graph({}, [{"name": "BLEU", "type": "Metric"}], []))
+    merger.add(_graph({}, [{"name": "bleu ", "type": "Metric", "aliases": ["BLEU-4"]}], []))
+    (entity,) = merger.iter_entities()
+    assert entity == {"name": "BLEU", "type": "Metric", "aliases": ["BLEU-4"]}
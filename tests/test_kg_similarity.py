@@ -0,0 +1,86 @@
+import itertools
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from kg_analytics import CitationGraph  # noqa: E402
+from kg_similarity import CO_CITED, COUPLED, similarity_triples  # noqa: E402
+
+
+def _graph(edges):
+    return CitationGraph.from_triples([{"head": h, "relation": "cites", "tail": t} for h, t in edges])
+
+
+def _pairs(graph, relation, **kwargs):
+    kwargs.setdefault("min_weight", 1)
+    return {
+        (t["head"], t["tail"]): t["weight"] for t in similarity_triples(graph, (relation,), **kwargs)
+    }
+
+
+EDGES = [("P1", "X"), ("P1", "Y"), ("P2", "X"), ("P2", "Y"), ("P3", "X"), ("P3", "Y"), ("P3", "Z"), ("P4", "Z")]
+
+
+def test_co_citation_counts_papers_citing_both():
+    assert _pairs(_graph(EDGES), CO_CITED) == {("X", "Y"): 3, ("X", "Z"): 1, ("Y", "Z"): 1}
+    assert _pairs(_graph(EDGES), CO_CITED, min_weight=2) == {("X", "Y"): 3}
+
+
+def test_coupling_counts_shared_references():
+    assert _pairs(_graph(EDGES), COUPLED) == {("P1", "P2"): 2, ("P1", "P3"): 2, ("P2", "P3"): 2, ("P3", "P4"): 1}
+
+
+def test_cosine_measure_normalises_by_degree():
+    # X、Y 各被引 3 次且总是一起被引；Z 被引 2 次
+    assert _pairs(_graph(EDGES), CO_CITED, measure="cosine") == {
+        ("X", "Y"): 1.0, ("X", "Z"): round(1 / 6 ** 0.5, 4), ("Y", "Z"): round(1 / 6 ** 0.5, 4)
+    }
+
+
+def test_high_degree_neighbours_are_skipped_and_pairs_stay_unique():
+    # H 被 P1..P5 引用；P1、P2 另外共同引用 X
+    edges = [(f"P{i}", "H") for i in range(1, 6)] + [("P1", "X"), ("P2", "X")]
+    g = _graph(edges)
+    everything = _pairs(g, COUPLED, max_degree=None)
+    assert len(everything) == 10 and everything[("P1", "P2")] == 2
+    assert _pairs(g, COUPLED, max_degree=3) == {("P1", "P2"): 1}
+
+    # 同被引时共同邻居是引用方：引用 5 篇的综述 R 超过上限后不再把被引论文两两连起来
+    survey = [("R", f"C{i}") for i in range(5)] + [("Q", "C0"), ("Q", "C1")]
+    assert len(_pairs(_graph(survey), CO_CITED, max_degree=None)) == 10
+    assert _pairs(_graph(survey), CO_CITED, max_degree=3) == {("C0", "C1"): 1}
+
+
+def test_matches_brute_force_for_any_block_size():
+    rng = random.Random(7)
+    papers = [f"p{i}" for i in range(40)]
+    edges = {(a, b) for a, b in (rng.sample(papers, 2) for _ in range(300))}
+    g = _graph(sorted(edges))
+    cites = {name: {b for a, b in edges if a == name} for name in g.names}
+    cited_by = {name: {a for a, b in edges if b == name} for name in g.names}
+    order = {name: i for i, name in enumerate(g.names)}
+
+    def brute(neighbours):
+        out = {}
+        for a, b in itertools.combinations(sorted(g.names, key=order.get), 2):
+            shared = len(neighbours[a] & neighbours[b])
+            if shared >= 2:
+                out[a, b] = shared
+        return out
+
+    for block_nnz in (1, 50, 10**9):
+        kwargs = dict(top_n=len(papers), min_weight=2, max_degree=None, block_nnz=block_nnz)
+        assert _pairs(g, COUPLED, **kwargs) == brute(cites)
+        assert _pairs(g, CO_CITED, **kwargs) == brute(cited_by)
+
+
+def test_top_n_keeps_pair_if_either_side_ranks_it():
+    # A 与 B、C、D 的共同引用数依次为 3、2、1；B、C、D 彼此没有共同引用
+    edges = [("A", f"r{i}") for i in range(6)]
+    edges += [("B", "r0"), ("B", "r1"), ("B", "r2"), ("C", "r3"), ("C", "r4"), ("D", "r5")]
+    pairs = _pairs(_graph(edges), COUPLED, top_n=1)
+    # A 只保留 B，但 C、D 各自的第一名都是 A
+    assert pairs == {("A", "B"): 3, ("A", "C"): 2, ("A", "D"): 1}
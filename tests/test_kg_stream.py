@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from kg_stream import (
+    KGStreamWriter,
+    is_kg_stream,
+    iter_section,
+    open_kg,
+    spool_json_array,
+    write_kg_stream,
+    write_spliced,
+)
+
+SEED = {"title": "Attention Is All You Need", "arxiv_id": "1706.03762"}
+PAPERS = [{"title": "Paper α", "citation_count": 3}, {"title": "Paper β", "citation_count": 1}]
+ENTITIES = [{"name": "Attention Is All You Need", "type": "Thesis"}, {"name": "BLEU", "type": "CreativeWork"}]
+TRIPLES = [
+    {"head": "Attention Is All You Need", "relation": "uses_metric", "tail": "BLEU"},
+    {"head": "Paper α", "relation": "cites", "tail": "Attention Is All You Need", "count": 2},
+]
+
+
+def test_writer_round_trips_through_open_kg(tmp_path):
+    path = str(tmp_path / "g.kg.jsonl")
+    with KGStreamWriter(path, {"paper_metadata": SEED, "top_k": 5}) as w:
+        w.write_section("related_papers", iter(PAPERS))
+        w.write_section("entities", (e for e in ENTITIES))
+        w.write_section("triples", TRIPLES)
+    assert w.counts == {"related_papers": 2, "entities": 2, "triples": 2}
+
+    data = open_kg(path)
+    assert (data["paper_metadata"], data["top_k"], data["format"]) == (SEED, 5, "kg-jsonl")
+    assert list(data["related_papers"]) == PAPERS
+    assert list(data["knowledge_graph"]["entities"]) == ENTITIES
+    triples = data["knowledge_graph"]["triples"]
+    # 分节可重复遍历
+    assert list(triples) == TRIPLES and list(triples) == TRIPLES
+    assert list(iter_section(path, "triples")) == TRIPLES
+    with open(path, encoding="utf-8") as f:
+        assert json.loads(f.readlines()[-1]) == {"__section__": "end", "counts": w.counts}
+
+
+def test_write_kg_stream_keeps_scalar_fields_in_manifest(tmp_path):
+    path = str(tmp_path / "g.kg.jsonl")
+    output = {"paper_metadata": SEED, "depth": 2, "knowledge_graph": {"entities": [], "triples": []}, "related_papers": []}
+    counts = write_kg_stream(path, output, iter(ENTITIES), iter(TRIPLES), iter(PAPERS))
+    assert counts == {"related_papers": 2, "entities": 2, "triples": 2}
+    data = open_kg(path)
+    assert data["depth"] == 2 and "knowledge_graph" in data
+    assert list(data["knowledge_graph"]["triples"]) == TRIPLES
+
+
+def test_truncated_file_stops_at_last_complete_record(tmp_path):
+    path = str(tmp_path / "g.kg.jsonl")
+    write_kg_stream(path, {"paper_metadata": SEED}, ENTITIES, TRIPLES)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    cut = text.index('"tail": "Attention')
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text[:cut])
+    assert list(iter_section(path, "entities")) == ENTITIES
+    assert list(iter_section(path, "triples")) == TRIPLES[:1]
+
+
+def test_failed_write_leaves_previous_file(tmp_path):
+    path = str(tmp_path / "g.kg.jsonl")
+    write_kg_stream(path, {"paper_metadata": SEED}, ENTITIES, TRIPLES)
+
+    def broken():
+        yield ENTITIES[0]
+        raise RuntimeError("generator failed")
+
+    with pytest.raises(RuntimeError):
+        write_kg_stream(path, {"paper_metadata": {}}, broken(), [])
+    assert open_kg(path)["paper_metadata"] == SEED
+    assert not (tmp_path / "g.kg.jsonl.tmp").exists()
+
+
+def test_unknown_section_is_rejected(tmp_path):
+    with KGStreamWriter(str(tmp_path / "g.kg.jsonl"), {}) as w:
+        with pytest.raises(ValueError):
+            w.write_section("nodes", [])
+
+
+def test_is_kg_stream_by_suffix_or_manifest(tmp_path):
+    stream = tmp_path / "graph.json"
+    write_kg_stream(str(stream), {}, [], [])
+    plain = tmp_path / "plain.json"
+    plain.write_text(json.dumps({"knowledge_graph": {}}), encoding="utf-8")
+    assert is_kg_stream(str(stream)) and not is_kg_stream(str(plain))
+    assert is_kg_stream("missing.kg.jsonl")
+
+
+def test_spliced_arrays_match_json_dumps(tmp_path):
+    nodes, n = spool_json_array(iter(ENTITIES))
+    edges, _ = spool_json_array([])
+    path = tmp_path / "page.html"
+    write_spliced(str(path), "<script>var n = NODES; var e = EDGES;</script>", [("NODES", nodes), ("EDGES", edges)])
+    assert n == 2
+    assert path.read_text(encoding="utf-8") == f"<script>var n = {json.dumps(ENTITIES)}; var e = [];</script>"
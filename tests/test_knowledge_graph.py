@@ -0,0 +1,24 @@
+from knowledge_graph import KnowledgeGraph
+
+
+def test_add_papers_lists_all_papers_then_authors():
+    kg = KnowledgeGraph()
+    kg.add_papers([
+        {"title": "P1", "arxiv_id": "1", "authors": ["A", "B"]},
+        {"title": "P2", "arxiv_id": "2", "authors": ["B", "C", " "]},
+        {"title": "", "authors": ["D"]},
+    ])
+    out = kg.to_json()
+    assert [e["name"] for e in out["entities"]] == ["P1", "P2", "A", "B", "C", "D"]
+    assert [(t["head"], t["tail"]) for t in out["triples"]] == [("A", "P1"), ("B", "P1"), ("B", "P2"), ("C", "P2")]
+
+
+def test_duplicate_triples_are_counted_once():
+    kg = KnowledgeGraph()
+    assert kg.add_triple("P1", "cites", "P2")
+    assert not kg.add_triple("P1", "cites", "P2")
+    kg.add_triples("cites", [("P1", "P2"), ("P2", "P3"), ("", "P3")])
+    assert kg.to_json()["triples"] == [
+        {"head": "P1", "relation": "cites", "tail": "P2", "count": 3},
+        {"head": "P2", "relation": "cites", "tail": "P3"},
+    ]
@@ -0,0 +1,46 @@
+import llm_cache
+from llm_cache import LLMExtractionCache, configure_llm_cache, extraction_cache_key, get_llm_cache
+
+RESULT = {"entities": [{"name": "BERT", "type": "SoftwareApplication"}], "triples": []}
+
+
+def test_hit_returns_result_and_counts_saved_tokens(tmp_path):
+    cache = LLMExtractionCache(str(tmp_path / "llm.sqlite"))
+    key = extraction_cache_key("m", "prompt", "Title", "Abstract")
+    assert cache.get(key) == (False, None)
+    cache.set(key, RESULT, tokens=120)
+    assert cache.get(key) == (True, RESULT)
+    assert cache.get(key) == (True, RESULT)
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["tokens_saved"]) == (2, 1, 240)
+    cache.close()
+
+
+def test_changed_abstract_prompt_or_model_misses(tmp_path):
+    cache = LLMExtractionCache(str(tmp_path / "llm.sqlite"))
+    cache.set(extraction_cache_key("m", "prompt", "Title", "Abstract"), RESULT, tokens=10)
+    assert cache.get(extraction_cache_key("m", "prompt", "Title", "Abstract"))[0]
+    assert cache.get(extraction_cache_key("m", "prompt", "Title", "Abstract v2")) == (False, None)
+    assert cache.get(extraction_cache_key("m", "prompt v2", "Title", "Abstract")) == (False, None)
+    assert cache.get(extraction_cache_key("m2", "prompt", "Title", "Abstract")) == (False, None)
+    cache.close()
+
+
+def test_missing_abstract_matches_empty_abstract():
+    assert extraction_cache_key("m", "p", "T", None) == extraction_cache_key("m", "p", "T", "")
+
+
+def test_shared_cache_persists_and_refresh_clears(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "_llm_cache", None)
+    key = extraction_cache_key("m", "p", "T", "A")
+    try:
+        configure_llm_cache(str(tmp_path))
+        get_llm_cache().set(key, RESULT)
+        configure_llm_cache(str(tmp_path))
+        assert get_llm_cache().get(key) == (True, RESULT)
+        configure_llm_cache(str(tmp_path), refresh=True)
+        assert get_llm_cache().get(key) == (False, None)
+        configure_llm_cache(str(tmp_path), enabled=False)
+        assert get_llm_cache() is None
+    finally:
+        configure_llm_cache()
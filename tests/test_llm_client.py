@@ -0,0 +1,179 @@
+import json
+import socket
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import llm_client
+import mock_llm_server
+import transport
+from llm_metrics import LLMMetrics
+from rate_limiter import AdaptiveRateLimiter
+from transport import Transport, TransportRateLimited
+
+MESSAGES = [{"role": "system", "content": "extract"}, {"role": "user", "content": "Title: T\nAbstract: BERT on GLUE"}]
+
+
+class FakeClient:
+    """按顺序抛出 errors 中的异常，之后返回固定回复。"""
+
+    def __init__(self, errors=(), total_tokens=700):
+        self.errors = list(errors)
+        self.total_tokens = total_tokens
+        self.calls = 0
+        self.chat = types.SimpleNamespace(completions=self)
+
+    def create(self, **request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        usage = types.SimpleNamespace(prompt_tokens=self.total_tokens - 100, completion_tokens=100, total_tokens=self.total_tokens)
+        message = types.SimpleNamespace(content='{"entities": [], "triples": []}')
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def llm_env(monkeypatch):
+    """live 传输层、独立的指标记录器与限流器；返回 (metrics, 设置限流器的函数)。"""
+    monkeypatch.setattr(transport, "_transport", Transport(mode="live"))
+    metrics = LLMMetrics()
+    monkeypatch.setattr(llm_client, "get_llm_metrics", lambda: metrics)
+    monkeypatch.setattr(llm_client, "_client", None)
+
+    def set_limiters(rpm, tpm):
+        monkeypatch.setattr(llm_client, "_limiters", (rpm, tpm))
+        return rpm, tpm
+
+    set_limiters(AdaptiveRateLimiter(1000, capacity=1000), AdaptiveRateLimiter(1e6, capacity=1e6))
+    return metrics, set_limiters
+
+
+def test_limiters_follow_configured_quota(monkeypatch):
+    monkeypatch.setattr(llm_client, "_limiters", None)
+    monkeypatch.setattr(llm_client, "LLM_RPM", 120)
+    monkeypatch.setattr(llm_client, "LLM_TPM", 6000)
+    rpm, tpm = llm_client.get_llm_limiters()
+    assert (rpm.rate, rpm.capacity) == (2.0, 20.0)
+    assert (tpm.rate, tpm.capacity) == (100.0, 1000.0)
+    assert llm_client.get_llm_limiters() == (rpm, tpm)
+
+
+def test_each_call_takes_one_request_and_actual_tokens(llm_env, monkeypatch):
+    metrics, set_limiters = llm_env
+    rpm, tpm = set_limiters(AdaptiveRateLimiter(1e-6, capacity=5), AdaptiveRateLimiter(1e-6, capacity=10000))
+    monkeypatch.setattr(llm_client, "_client", FakeClient(total_tokens=700))
+    _, usage = llm_client.chat_completion_with_usage(MESSAGES)
+    llm_client.chat_completion_with_usage(MESSAGES)
+    assert usage["total_tokens"] == 700
+    assert rpm._tokens == pytest.approx(3, abs=0.01)
+    # 预扣的估算值按实际用量补扣，桶里只少了两次实际消耗
+    assert tpm._tokens == pytest.approx(10000 - 2 * 700, abs=0.01)
+    assert metrics.summary()["prompt_tokens"] == 2 * 600
+
+
+def test_rpm_bucket_spaces_out_calls(llm_env, monkeypatch):
+    _, set_limiters = llm_env
+    set_limiters(AdaptiveRateLimiter(20, capacity=1), AdaptiveRateLimiter(1e6, capacity=1e6))
+    monkeypatch.setattr(llm_client, "_client", FakeClient())
+    start = time.monotonic()
+    for _ in range(3):
+        llm_client.chat_completion_with_usage(MESSAGES)
+    assert time.monotonic() - start >= 0.09
+
+
+def test_429_pauses_for_retry_after_plus_jitter_and_slows_down(llm_env, monkeypatch):
+    metrics, set_limiters = llm_env
+    rpm, _ = set_limiters(AdaptiveRateLimiter(10, capacity=10), AdaptiveRateLimiter(1e6, capacity=1e6))
+    monkeypatch.setattr(llm_client, "_client", FakeClient([TransportRateLimited(1.5), TransportRateLimited(1.5)]))
+    sleeps = []
+    monkeypatch.setattr(llm_client.time, "sleep", sleeps.append)
+    # sleep 已被替换，跳过 Retry-After 造成的阻塞等待
+    monkeypatch.setattr(rpm, "_reserve", lambda tokens: 0.0)
+    llm_client.chat_completion_with_usage(MESSAGES)
+    assert len(sleeps) == 2
+    assert all(1.5 <= s <= 1.5 + 0.75 + 0.1 for s in sleeps)
+    assert sleeps[0] != sleeps[1]
+    assert rpm.throttled == 2 and rpm.rate < 10
+    assert metrics.summary()["retries"] == 2
+
+
+def test_connection_errors_back_off_exponentially_with_jitter(llm_env, monkeypatch):
+    openai = pytest.importorskip("openai", minversion="1.0")
+    metrics, _ = llm_env
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed_port = s.getsockname()[1]
+    monkeypatch.setattr(
+        llm_client, "_client", openai.OpenAI(api_key="sk-local", base_url=f"http://127.0.0.1:{closed_port}/v1", max_retries=0)
+    )
+    sleeps = []
+    monkeypatch.setattr(llm_client.time, "sleep", sleeps.append)
+    with pytest.raises(openai.APIConnectionError):
+        llm_client.chat_completion_with_usage(MESSAGES, max_retries=3, base_delay=1)
+    assert len(sleeps) == 3
+    assert all(d <= s <= d * 1.5 + 0.1 for d, s in zip([1, 2, 4], sleeps))
+    s = metrics.summary()
+    assert (s["calls"], s["failed"], s["retries"]) == (1, 1, 3)
+
+
+def test_other_errors_are_not_retried(llm_env, monkeypatch):
+    metrics, _ = llm_env
+    client = FakeClient([ValueError("bad request")])
+    monkeypatch.setattr(llm_client, "_client", client)
+    with pytest.raises(ValueError):
+        llm_client.chat_completion_with_usage(MESSAGES)
+    assert client.calls == 1
+    s = metrics.summary()
+    assert (s["calls"], s["failed"], s["retries"]) == (1, 1, 0)
+
+
+@pytest.fixture
+def mock_server():
+    """在后台线程里启动替身 LLM 服务，返回启动函数 (error_rate, error_status) -> (base_url, state)。"""
+    servers = []
+
+    def start(error_rate, error_status):
+        server = mock_llm_server.serve(port=0, error_rate=error_rate, error_status=error_status, retry_after=0, seed=3)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/v1", mock_llm_server.ChatCompletionsHandler.state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retries_through_injected_errors_of_mock_server(llm_env, mock_server, monkeypatch, status):
+    openai = pytest.importorskip("openai", minversion="1.0")
+    metrics, _ = llm_env
+    base_url, state = mock_server(error_rate=0.3, error_status=status)
+    monkeypatch.setattr(llm_client, "_client", openai.OpenAI(api_key="sk-local", base_url=base_url, max_retries=0))
+    requests = [
+        [{"role": "system", "content": "extract"}, {"role": "user", "content": f"Title: Paper {i}\nAbstract: We train BERT on GLUE."}]
+        for i in range(12)
+    ]
+
+    def ask(messages):
+        content, _ = llm_client.chat_completion_with_usage(
+            messages, response_format={"type": "json_object"}, max_retries=10, base_delay=0.01
+        )
+        return json.loads(content)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(ask, requests))
+    expected = [
+        json.loads(mock_llm_server.build_reply({"messages": m, "response_format": {"type": "json_object"}}))
+        for m in requests
+    ]
+    assert results == expected
+    s = metrics.summary()
+    assert state.errors > 0
+    assert (s["calls"], s["failed"], s["retries"]) == (12, 0, state.errors)
+    assert state.requests == 12 + state.errors
+    if status == 429:
+        assert llm_client._limiters[0].throttled == state.errors
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import llm_metrics
+from llm_metrics import LLMMetrics, model_price, percentile
+
+
+@pytest.fixture(autouse=True)
+def no_price_override(monkeypatch):
+    monkeypatch.setattr(llm_metrics, "LLM_PRICE", "")
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(100, 0, -1)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile([7.0], 95) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_latency_percentiles_skip_failed_calls():
+    m = LLMMetrics()
+    for i in range(1, 21):
+        m.record_call("gpt-4o", i / 10, retries=1 if i % 5 == 0 else 0)
+    m.record_call("gpt-4o", 99.0, ok=False, error="RateLimitError")
+    s = m.summary()
+    assert (s["latency_p50"], s["latency_p95"]) == (1.0, 1.9)
+    assert s["latency_total"] == pytest.approx(21.0)
+    assert (s["calls"], s["failed"], s["retries"]) == (21, 1, 4)
+
+
+def test_cost_is_summed_per_model_from_price_per_million():
+    m = LLMMetrics()
+    m.record_call("deepseek-chat", 1.0, {"prompt_tokens": 1_000_000, "completion_tokens": 500_000})
+    m.record_call("deepseek-chat", 1.0, {"prompt_tokens": 200_000, "completion_tokens": 0})
+    m.record_call("gpt-4o-mini", 1.0, {"prompt_tokens": 10_000, "completion_tokens": 20_000})
+    m.record_call("unknown-model", 1.0, {"prompt_tokens": 5_000, "completion_tokens": 5_000})
+    s = m.summary()
+    # deepseek-chat: 1.2M * 0.27 + 0.5M * 1.10；gpt-4o-mini: 0.01M * 0.15 + 0.02M * 0.60
+    assert s["models"]["deepseek-chat"]["cost_usd"] == pytest.approx(0.324 + 0.55)
+    assert s["models"]["gpt-4o-mini"]["cost_usd"] == pytest.approx(0.0015 + 0.012)
+    assert s["models"]["unknown-model"]["cost_usd"] is None
+    assert s["cost_usd"] == pytest.approx(0.874 + 0.0135)
+    assert (s["prompt_tokens"], s["completion_tokens"]) == (1_215_000, 525_000)
+
+
+def test_llm_price_overrides_builtin_prices(monkeypatch):
+    monkeypatch.setattr(llm_metrics, "LLM_PRICE", "1/2")
+    assert model_price("unknown-model") == (1.0, 2.0)
+    assert model_price("gpt-4o") == (1.0, 2.0)
+    monkeypatch.setattr(llm_metrics, "LLM_PRICE", "cheap")
+    assert model_price("gpt-4o") == (2.50, 10.00)
+
+
+def test_parse_failures_and_written_file(tmp_path):
+    m = LLMMetrics()
+    m.record_call("gpt-4o", 0.5, {"prompt_tokens": 10, "completion_tokens": 5})
+    m.record_parse_failure()
+    m.record_parse_failure(2)
+    path = tmp_path / "metrics.json"
+    m.write(str(path))
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["summary"]["parse_failures"] == 3
+    assert data["calls"][0]["prompt_tokens"] == 10
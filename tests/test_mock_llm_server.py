@@ -0,0 +1,35 @@
+import json
+
+from class_schema import get_all_type_names
+from mock_llm_server import build_reply, extract_from_text
+
+ABSTRACTS = [
+    "We propose Transformer, evaluated on WMT 2014 with BLEU, outperforming ConvS2S and GNMT.",
+    "We introduce a new ResNet trained on ImageNet and COCO benchmark; we report FID, IoU and mAP.",
+    "BERT, GPT-2, RoBERTa and XLNet are compared on the GLUE benchmark, SQuAD dataset and RACE task with F1 and EM.",
+    "Nothing here is capitalised except this sentence.",
+]
+RELATIONS = {"proposed_model", "baseline_model", "evaluated_on", "uses_metric", "cites", "author_of"}
+
+
+def _text(i, abstract):
+    return f"Title: Paper {i}\nAbstract: {abstract}"
+
+
+def test_every_emitted_type_is_in_classes_json():
+    allowed = get_all_type_names()
+    emitted = set()
+    for i, abstract in enumerate(ABSTRACTS):
+        result = extract_from_text(_text(i, abstract))
+        emitted |= {e["type"] for e in result["entities"]}
+        assert {t["relation"] for t in result["triples"]} <= RELATIONS
+    assert emitted <= allowed
+    assert {"Thesis", "SoftwareApplication", "Dataset", "CreativeWork"} <= emitted
+
+
+def test_packed_reply_splits_by_tag_and_matches_single_reply():
+    user = "\n\n".join(f"[P{i + 1}]\n{_text(i, a)}" for i, a in enumerate(ABSTRACTS))
+    packed = json.loads(build_reply({"messages": [{"role": "user", "content": user}], "response_format": {"type": "json_object"}}))
+    assert sorted(packed["papers"]) == [f"P{i + 1}" for i in range(len(ABSTRACTS))]
+    for i, abstract in enumerate(ABSTRACTS):
+        assert packed["papers"][f"P{i + 1}"] == extract_from_text(_text(i, abstract))
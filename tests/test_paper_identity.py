@@ -0,0 +1,48 @@
+from paper_identity import PaperIndex, canonical_arxiv_id, normalize_doi, paper_key
+
+
+def test_canonical_ids():
+    assert canonical_arxiv_id("arXiv:1706.03762v7") == "1706.03762"
+    assert canonical_arxiv_id(None) == ""
+    assert normalize_doi("https://doi.org/10.1000/ABC") == "10.1000/abc"
+
+
+def test_arxiv_versions_are_one_paper_and_only_fill_missing_fields():
+    index = PaperIndex()
+    first = {"title": "Attention Is All You Need", "arxiv_id": "1706.03762v7", "abstract": ""}
+    pid = index.add(first)
+    assert index.add({"title": "attention is all you need", "id": "1706.03762", "abstract": "x", "year": 2017}) == pid
+    assert len(index) == 1
+    paper = index.get(pid)
+    assert paper is first
+    assert paper["title"] == "Attention Is All You Need"
+    assert paper["abstract"] == "x" and paper["year"] == 2017
+
+
+def test_same_title_different_ids_stay_apart():
+    index = PaperIndex()
+    a = index.add({"title": "Deep Learning", "arxiv_id": "1111.00001"})
+    b = index.add({"title": "Deep Learning", "paper_id_s2": "s2-b"})
+    assert a != b and len(index) == 2
+    assert index.display_title(a) == "Deep Learning"
+    assert index.display_title(b) == "Deep Learning [s2:s2-b]"
+
+
+def test_record_bridging_two_ids_merges_them():
+    index = PaperIndex()
+    a = index.add({"title": "A", "paper_id_s2": "abc"})
+    b = index.add({"title": "A (arXiv)", "arxiv_id": "2001.00001", "abstract": "text"})
+    c = index.add({"title": "A", "paper_id_s2": "abc", "arxiv_id": "2001.00001v2"})
+    assert c == a and index.resolve(b) == a
+    assert len(index) == 1 and index.ids() == [a]
+    assert index.get(b)["abstract"] == "text"
+    assert index.lookup("arxiv:2001.00001") == index.lookup("s2:abc") == a
+
+
+def test_title_fallback_and_lookup():
+    index = PaperIndex()
+    pid = index.add({"title": "No  Ids Here"})
+    assert index.add({"title": "no ids here"}) == pid
+    assert paper_key({"title": "No Ids Here"}) == "title:no ids here"
+    assert index.lookup("No Ids Here") == pid
+    assert index.find({"title": "Unknown"}) is None
@@ -0,0 +1,59 @@
+import email.utils
+import time
+
+import pytest
+
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+
+def test_throttle_halves_rate_down_to_the_floor():
+    limiter = AdaptiveRateLimiter(8, min_rate=1)
+    rates = []
+    for _ in range(5):
+        limiter.on_throttle(0)
+        rates.append(limiter.rate)
+    assert rates == [4, 2, 1, 1, 1]
+    assert limiter.throttled == 5
+
+
+def test_success_recovers_additively_up_to_the_quota():
+    limiter = AdaptiveRateLimiter(10, increase_step=3)
+    limiter.on_throttle(0)
+    limiter.on_throttle(0)
+    assert limiter.rate == 2.5
+    limiter.on_success()
+    assert limiter.rate == 5.5
+    for _ in range(5):
+        limiter.on_success()
+    assert limiter.rate == 10
+
+
+def test_burst_capacity_then_wait():
+    limiter = AdaptiveRateLimiter(1, capacity=3)
+    assert [limiter._reserve(1) for _ in range(3)] == [0, 0, 0]
+    assert limiter._reserve(1) == pytest.approx(1, abs=0.05)
+
+
+def test_retry_after_blocks_every_caller():
+    limiter = AdaptiveRateLimiter(100, capacity=10)
+    assert limiter.on_throttle(retry_after=2) == 2
+    assert limiter._reserve(1) == pytest.approx(2, abs=0.05)
+    # 较短的 Retry-After 不会提前解除已有的暂停
+    limiter.on_throttle(retry_after=0.1)
+    assert limiter._reserve(1) > 1.5
+
+
+def test_throttle_without_retry_after_waits_one_token_interval():
+    limiter = AdaptiveRateLimiter(4)
+    assert limiter.on_throttle() == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("value, expected", [("5", 5.0), (" 1.5 ", 1.5), ("-3", 0.0), ("", None), (None, None), ("soon", None)])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert parse_retry_after(date) == pytest.approx(30, abs=2)
+    assert parse_retry_after(email.utils.formatdate(time.time() - 30, usegmt=True)) == 0.0
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+import top_citations_kg
+from async_crawl import aiohttp
+from crawl_scheduler import REQUESTS_PER_EXPANSION
+from s2_replay import N_PAPERS, graph_of, run_crawl, use_replay_network
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "best-first"])
+def test_resume_after_budget_stop_matches_uninterrupted_crawl(tmp_path, monkeypatch, strategy):
+    replay = use_replay_network(tmp_path, monkeypatch)
+    full = run_crawl(tmp_path, monkeypatch, "full", strategy=strategy)
+    full_requests = replay.replayed
+    assert len(full["knowledge_graph"]["triples"]) > 10
+
+    partial = run_crawl(tmp_path, monkeypatch, "resumed", strategy=strategy, max_requests=4)
+    partial_requests = replay.replayed - full_requests
+    assert partial["crawl"]["stopped_by_budget"]
+    assert len(partial["knowledge_graph"]["triples"]) < len(full["knowledge_graph"]["triples"])
+
+    resumed = run_crawl(tmp_path, monkeypatch, "resumed", strategy=strategy, resume=True)
+    assert graph_of(resumed) == graph_of(full)
+    # 续爬不重复请求日志中已完成的部分：两次运行合计与一次完整爬取相同
+    assert replay.replayed - full_requests == full_requests
+    assert 0 < partial_requests < full_requests
+
+
+@pytest.mark.skipif(aiohttp is None, reason="需要 aiohttp")
+@pytest.mark.parametrize("strategy", ["bfs", "best-first"])
+@pytest.mark.parametrize("max_requests", [3, 7, 12])
+def test_concurrent_crawl_stays_within_request_budget(tmp_path, monkeypatch, strategy, max_requests):
+    use_replay_network(tmp_path, monkeypatch)
+    out = run_crawl(tmp_path, monkeypatch, "budget", top_k=3, depth=4, strategy=strategy,
+                    concurrency=8, max_requests=max_requests)
+    assert out["crawl"]["stopped_by_budget"]
+    # 超出量不多于一篇论文的请求
+    assert out["crawl"]["requests"] <= max_requests + REQUESTS_PER_EXPANSION
+    assert out["crawl"]["expanded"] < N_PAPERS
+
+
+def test_request_counter_is_exact_under_threads():
+    before = top_citations_kg.network_request_count()
+
+    def work():
+        for _ in range(5000):
+            top_citations_kg._count_request("s2")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert top_citations_kg.network_request_count() - before == 8 * 5000
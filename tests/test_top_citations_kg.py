@@ -0,0 +1,142 @@
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import llm_cache
+import top_citations_kg
+from mock_llm_server import build_reply, extract_from_text
+
+
+def _item(title, citations, arxiv_id=None):
+    return {"citedPaper": {"title": title, "citationCount": citations, "externalIds": {"ArXiv": arxiv_id} if arxiv_id else {}}}
+
+
+def _drive(steps, pages):
+    """按请求 URL 中的 offset 返回 pages[offset]，返回 (结果, 请求过的 (offset, limit))。"""
+    requested = []
+    try:
+        request = next(steps)
+        while True:
+            query = parse_qs(urlsplit(request["url"]).query)
+            offset, limit = int(query["offset"][0]), int(query["limit"][0])
+            requested.append((offset, limit))
+            request = steps.send(pages.get(offset))
+    except StopIteration as stop:
+        return stop.value, requested
+
+
+def _counts(papers):
+    return [(p["title"], p["citation_count"]) for p in papers]
+
+
+def test_heap_keeps_top_k_across_pages_and_ties_keep_first_seen():
+    pages = {
+        0: {"data": [_item("a", 5), _item("b", 50), _item("", 999), _item("c", 20)], "next": 4},
+        4: {"data": [_item("d", 20), _item("e", 70), _item("f", 1)], "next": None},
+    }
+    top, requested = _drive(top_citations_kg._top_k_relation_steps("1", "references", 3), pages)
+    assert _counts(top) == [("e", 70), ("b", 50), ("c", 20)]
+    assert requested == [(0, top_citations_kg.S2_RELATION_PAGE_SIZE), (4, top_citations_kg.S2_RELATION_PAGE_SIZE)]
+    all_items = [i["citedPaper"] for p in pages.values() for i in p["data"] if i["citedPaper"]["title"]]
+    expected = sorted(all_items, key=lambda p: -p["citationCount"])[:3]
+    assert [p["title"] for p in top] == [p["title"] for p in expected]
+
+
+def test_max_scan_stops_paging():
+    pages = {
+        0: {"data": [_item("a", 1), _item("b", 2)], "next": 2},
+        2: {"data": [_item("c", 100)], "next": None},
+    }
+    top, requested = _drive(top_citations_kg._top_k_relation_steps("1", "references", 5, max_scan=2), pages)
+    assert _counts(top) == [("b", 2), ("a", 1)]
+    assert requested == [(0, 2)]
+
+
+def test_citations_direction_and_missing_data():
+    page = {"data": [{"citingPaper": {"title": "x", "citationCount": 3, "externalIds": {"ArXiv": "2001.00001"}}}]}
+    top, _ = _drive(top_citations_kg._top_k_relation_steps("1", "citations", 2), {0: page})
+    assert top[0]["arxiv_id"] == "2001.00001"
+    assert _drive(top_citations_kg._top_k_relation_steps("1", "citations", 2), {}) == ([], [(0, 1000)])
+    assert _drive(top_citations_kg._top_k_relation_steps("1", "citations", 0), {}) == ([], [])
+
+
+PAPERS = [
+    {"title": f"Paper {i}", "abstract": f"We propose Net{i} and evaluate it on ImageNet with BLEU and GLUE."}
+    for i in range(1, 5)
+]
+EXPECTED = [extract_from_text(f"Title: {p['title']}\nAbstract: {p['abstract']}") for p in PAPERS]
+
+
+@pytest.fixture
+def llm_env(tmp_path, monkeypatch):
+    """替身回复 + 临时 LLM 缓存；返回 set_reply(mangle)，mangle 就地改写打包回复的 papers 字典。"""
+    monkeypatch.setattr(top_citations_kg, "is_api_configured", lambda: True)
+    monkeypatch.setattr(top_citations_kg, "record_parse_failure", lambda count=1: failures.append(count))
+    monkeypatch.setattr(llm_cache, "_llm_cache", None)
+    llm_cache.configure_llm_cache(str(tmp_path))
+    failures, calls = [], []
+
+    def set_reply(mangle=None):
+        def chat(messages, temperature=0.1, response_format=None, **kwargs):
+            calls.append(messages[-1]["content"])
+            content = build_reply({"messages": messages, "response_format": response_format})
+            reply = json.loads(content)
+            if mangle is not None and "papers" in reply:
+                content = mangle(reply["papers"]) or json.dumps(reply)
+            return content, {"total_tokens": 100}
+
+        monkeypatch.setattr(top_citations_kg, "chat_completion_with_usage", chat)
+
+    set_reply()
+    yield set_reply, calls, failures
+    llm_cache.configure_llm_cache()
+
+
+def _break_sections(papers):
+    del papers["P2"]
+    papers["P3"] = {"entities": "not a list", "triples": []}
+    papers["P4"] = "garbage"
+
+
+def test_missing_and_invalid_pack_sections_become_none(llm_env):
+    set_reply, _, failures = llm_env
+    set_reply(_break_sections)
+    stats = {"requests": 0, "tokens": 0, "seconds": 0.0, "lock": threading.Lock()}
+    results = top_citations_kg._extract_pack(PAPERS, top_citations_kg._extraction_system_prompt(), stats)
+    assert results == [EXPECTED[0], None, None, None]
+    assert failures == [3]
+
+
+def test_failed_pack_sections_fall_back_to_single_requests(llm_env):
+    set_reply, calls, _ = llm_env
+    set_reply(_break_sections)
+    assert top_citations_kg.extract_knowledge_packed(PAPERS, pack_size=4, workers=1) == EXPECTED
+    assert len(calls) == 4
+    assert calls[0].startswith("[P1]") and not any(c.startswith("[P") for c in calls[1:])
+
+
+def test_unparseable_pack_reply_retries_every_paper(llm_env):
+    set_reply, calls, failures = llm_env
+    set_reply(lambda papers: "{not json")
+    assert top_citations_kg.extract_knowledge_packed(PAPERS, pack_size=2, workers=2) == EXPECTED
+    assert len(calls) == 2 + 4
+    assert failures == [1, 1]
+
+
+def test_packed_results_are_cached_apart_from_single_results(llm_env):
+    set_reply, calls, _ = llm_env
+    set_reply(_break_sections)
+    top_citations_kg.extract_knowledge_packed(PAPERS, pack_size=4, workers=1)
+    calls.clear()
+    # 重跑打包：P1 命中打包键，其余命中逐篇重试时写入的单篇键
+    assert top_citations_kg.extract_knowledge_packed(PAPERS, pack_size=4, workers=1) == EXPECTED
+    assert calls == []
+    # 逐篇模式不复用打包回复
+    assert top_citations_kg.extract_knowledge_with_llm(PAPERS[0]) == EXPECTED[0]
+    assert len(calls) == 1
+    system_prompt = top_citations_kg._extraction_system_prompt()
+    assert top_citations_kg._extraction_cache_key(PAPERS[0], system_prompt) != top_citations_kg._extraction_cache_key(
+        PAPERS[0], system_prompt, packed=True
+    )
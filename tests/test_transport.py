@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+
+import transport
+from transport import FixtureMissing, Transport, TransportRateLimited
+
+URL = "https://api.semanticscholar.org/graph/v1/paper/ARXIV:1706.03762?fields=title,year"
+
+
+class _FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.headers = {"X-Live": "1"}
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def live_s2(monkeypatch):
+    """record 模式下的“真实服务”：记录收到的请求并按 URL 返回固定响应。"""
+    seen = []
+
+    def get(url, headers=None, timeout=None):
+        seen.append(("GET", url))
+        return _FakeResponse(404) if "missing" in url else _FakeResponse(200, {"title": "Attention", "year": 2017})
+
+    def post(url, json=None, headers=None, timeout=None):
+        seen.append(("POST", url))
+        return _FakeResponse(200, [{"title": pid} for pid in json["ids"]])
+
+    monkeypatch.setattr(transport.requests, "get", get)
+    monkeypatch.setattr(transport.requests, "post", post)
+    return seen
+
+
+def test_record_then_replay_round_trip(tmp_path, live_s2):
+    recorder = Transport(mode="record", fixture_dir=str(tmp_path))
+    live = [
+        recorder.http_request("GET", URL),
+        recorder.http_request("GET", URL.replace("ARXIV:1706.03762", "missing")),
+        recorder.http_request("POST", URL, json_body={"ids": ["a", "b"]}),
+    ]
+    arxiv_live = recorder.call("arxiv", {"id_list": ["1706.03762"]}, lambda: {"1706.03762": {"title": "Attention"}})
+    assert recorder.recorded == 4 and len(live_s2) == 3
+
+    replay = Transport(mode="replay", fixture_dir=str(tmp_path))
+    # 字段顺序、主机大小写不同的同一请求命中同一夹具
+    same = URL.replace("title,year", "year,title").replace("api.semanticscholar.org", "API.semanticscholar.org")
+    replayed = [
+        replay.http_request("GET", same),
+        replay.http_request("GET", URL.replace("ARXIV:1706.03762", "missing")),
+        replay.http_request("POST", URL, json_body={"ids": ["a", "b"]}),
+    ]
+    assert [(r.status_code, r.json()) for r in replayed] == [(r.status_code, r.json()) for r in live]
+    assert replay.call("arxiv", {"id_list": ["1706.03762"]}, lambda: pytest.fail("replay 不应调用真实服务")) == arxiv_live
+    assert replay.replayed == 4 and len(live_s2) == 3
+
+
+def test_replay_miss_raises(tmp_path):
+    replay = Transport(mode="replay", fixture_dir=str(tmp_path))
+    with pytest.raises(FixtureMissing):
+        replay.http_request("GET", URL)
+    with pytest.raises(FixtureMissing):
+        replay.call("llm", {"prompt": "x"}, lambda: "never")
+    # 请求体不同视为不同请求
+    Transport(mode="record", fixture_dir=str(tmp_path)).call("llm", {"prompt": "x"}, lambda: "answer")
+    with pytest.raises(FixtureMissing):
+        replay.call("llm", {"prompt": "y"}, lambda: "never")
+
+
+def test_fault_injection_every_nth_call(tmp_path, live_s2):
+    t = Transport(mode="record", fixture_dir=str(tmp_path), faults={"every": 3, "retry_after": 2})
+    outcomes = []
+    for i in range(6):
+        try:
+            outcomes.append(t.call("arxiv", {"i": i}, lambda: "ok"))
+        except TransportRateLimited as e:
+            outcomes.append(e.retry_after)
+    assert outcomes == ["ok", "ok", 2, "ok", "ok", 2]
+    assert t.injected_429 == 2 and t.recorded == 4
+    # HTTP 调用与 call 共用计数：第 7 次正常，第 9 次返回 429 + Retry-After，且不访问服务
+    assert t.http_request("GET", URL).status_code == 200
+    t.call("arxiv", {"i": 7}, lambda: "ok")
+    throttled = t.http_request("GET", URL)
+    assert (throttled.status_code, throttled.headers) == (429, {"Retry-After": "2"})
+    assert len(live_s2) == 1
+
+
+def test_probabilistic_faults_are_reproducible(tmp_path):
+    def pattern(seed):
+        t = Transport(mode="record", fixture_dir=str(tmp_path), faults={"p": 0.3}, seed=seed)
+        out = []
+        for i in range(50):
+            try:
+                t.call("x", {"i": i}, lambda: 1)
+                out.append(0)
+            except TransportRateLimited:
+                out.append(1)
+        return out
+
+    assert pattern(1) == pattern(1)
+    assert 5 < sum(pattern(1)) < 30
+
+
+def test_counters_are_exact_under_threads(tmp_path):
+    recorder = Transport(mode="record", fixture_dir=str(tmp_path))
+    recorder.call("arxiv", {"id_list": ["1"]}, lambda: {"1": {}})
+    replay = Transport(mode="replay", fixture_dir=str(tmp_path))
+
+    def work():
+        for _ in range(200):
+            replay.call("arxiv", {"id_list": ["1"]}, lambda: None)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert replay.replayed == replay.calls == 1600
@@ -0,0 +1,34 @@
+"""
+无第三方依赖的文本小工具：客户端（llm_client、transport、app_qa）与本地替身服务（mock_llm_server）共用，
+替身服务因此不必安装 openai / requests 也能启动。
+"""
+
+import re
+
+
+def estimate_tokens(text):
+    """服务端未返回用量时的粗略估计（约 4 字符 / token，中文按 1 字 / token）。"""
+    text = text or ""
+    cjk = sum(1 for ch in text if "一" <= ch <= "鿿")
+    return cjk + (len(text) - cjk) // 4
+
+
+def overlap_tokens(text):
+    """英文按词、中文按相邻两字切分，用于粗略的重合度打分（问答选事实、替身服务答题）。"""
+    text = (text or "").lower()
+    words = {w for w in re.findall(r"[a-z0-9]+", text) if len(w) > 1}
+    cjk = re.findall(r"[\u4e00-\u9fff]", text)
+    return words | {a + b for a, b in zip(cjk, cjk[1:])}
+
+
+def parse_latency(spec):
+    """延迟参数 "0.2" 或区间 "0.1-0.5" -> (下限, 上限) 秒；为空或非法时返回 None。"""
+    if not spec:
+        return None
+    try:
+        if "-" in spec:
+            lo, hi = spec.split("-", 1)
+            return float(lo), float(hi)
+        return float(spec), float(spec)
+    except ValueError:
+        return None
@@ -16,15 +16,49 @@
 """
 
 import arxiv
+import heapq
 import json
 import os
-import requests
+import threading
 import time
 import sys
 import argparse
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 
-from config import API_KEY, BASE_URL, MODEL_NAME, is_api_configured
+from config import MODEL_NAME, is_api_configured
+from api_cache import (
+    get_s2_cache,
+    configure_s2_cache,
+    print_s2_cache_stats,
+    normalize_s2_url,
+    S2_PAPER_TTL,
+    S2_RELATIONS_TTL,
+    S2_NOT_FOUND_TTL,
+)
+from rate_limiter import get_s2_limiter, parse_retry_after, s2_headers
+from transport import http_request, call_recorded, get_transport
+from llm_client import chat_completion_with_usage, get_llm_limiters
+from llm_metrics import record_parse_failure, report_llm_metrics
+from text_utils import estimate_tokens
+from llm_cache import (
+    get_llm_cache,
+    configure_llm_cache,
+    print_llm_cache_stats,
+    extraction_cache_key,
+)
+from gazetteer import load_gazetteer, GAZETTEER_MIN_HITS
+from knowledge_graph import KnowledgeGraph
+from paper_identity import PaperIndex, canonical_arxiv_id
+from corpus_store import (
+    DEFAULT_STORE_PATH,
+    configure_corpus_store,
+    get_corpus_store,
+    print_corpus_store_stats,
+    save_to_corpus_store,
+)
+from kg_analytics import symbol_size
+from kg_community import community_color
+from kg_stream import is_kg_stream, open_kg, spool_json_array, stream_path_for, write_kg_stream, write_spliced
 from class_schema import (
     get_all_type_names,
     normalize_entity_type,
@@ -32,6 +66,100 @@ from class_schema import (
     get_categories_for_entities,
 )
 ALLOWED_TYPES = get_all_type_names()
+HTML_NODES_PLACEHOLDER = "\x00graph-nodes\x00"  # generate_html 模板中节点 / 连线数组的占位符
+HTML_LINKS_PLACEHOLDER = "\x00graph-links\x00"
+
+
+ARXIV_PAGE_SIZE = 100  # 每次 id_list 查询的 id 数
+ARXIV_DELAY_SECONDS = 3.0  # ArXiv 要求的请求间隔
+
+_arxiv_client = None
+
+# 本进程实际发出的网络请求数（不含缓存命中），供爬取预算（--max-requests）统计；
+# 并发抓取时多个线程 / 协程同时计数，经 _count_request 加锁累加
+REQUEST_COUNTS = {"s2": 0, "arxiv": 0}
+_request_counts_lock = threading.Lock()
+
+
+def _count_request(kind):
+    with _request_counts_lock:
+        REQUEST_COUNTS[kind] += 1
+
+
+def network_request_count():
+    """已发出的 S2 + ArXiv 请求总数。"""
+    with _request_counts_lock:
+        return REQUEST_COUNTS["s2"] + REQUEST_COUNTS["arxiv"]
+
+
+def _get_arxiv_client():
+    """进程内共享的 ArXiv 客户端：由它统一保证相邻请求间隔 ≥ 3 秒。"""
+    global _arxiv_client
+    if _arxiv_client is None:
+        _arxiv_client = arxiv.Client(
+            page_size=ARXIV_PAGE_SIZE, delay_seconds=ARXIV_DELAY_SECONDS, num_retries=3
+        )
+    return _arxiv_client
+
+
+def _arxiv_result_to_meta(paper, paper_id):
+    meta = {
+        "id": paper_id,
+        "title": paper.title,
+        "abstract": paper.summary,
+        "published_date": paper.published.strftime("%Y-%m-%d"),
+        "pdf_url": paper.pdf_url,
+        "authors": [a.name for a in paper.authors],
+    }
+    if getattr(paper, "doi", None):
+        meta["doi"] = paper.doi
+    return meta
+
+
+def fetch_arxiv_papers(paper_ids, page_size=ARXIV_PAGE_SIZE):
+    """
+    批量获取 ArXiv 论文元数据：每次 id_list 查询 page_size 个 id，经共享客户端发出。
+    返回 {请求的 arxiv id: 元数据}，未找到的 id 不在结果中。
+    某一批整体失败（如含非法 id）时，该批退回逐个查询。
+    启用语料库（--store）时库中已完整的论文直接读库，新拉取的写回库中。
+    """
+    ids = list(dict.fromkeys(p for p in paper_ids if p))
+    store = get_corpus_store()
+    stored = store.papers_by_arxiv(ids) if store is not None and ids else {}
+    ids = [p for p in ids if p not in stored]
+    if not ids:
+        return stored
+    client = _get_arxiv_client()
+    results = {}
+    for start in range(0, len(ids), page_size):
+        chunk = ids[start:start + page_size]
+        if len(ids) > 1:
+            print(f"[*] [ArXiv] 批量获取论文元数据: {len(chunk)} 篇 ({start + 1}-{start + len(chunk)}/{len(ids)}) ...")
+        by_base = {canonical_arxiv_id(pid): pid for pid in chunk}
+        _count_request("arxiv")
+
+        def _query():
+            found = {}
+            search = arxiv.Search(id_list=chunk, max_results=len(chunk))
+            for paper in client.results(search):
+                pid = by_base.get(canonical_arxiv_id(paper.get_short_id()))
+                if pid:
+                    found[pid] = _arxiv_result_to_meta(paper, pid)
+            return found
+
+        try:
+            results.update(call_recorded("arxiv", {"id_list": chunk}, _query))
+        except Exception as e:
+            if len(chunk) == 1:
+                print(f"❌ ArXiv 获取失败 {chunk[0]}: {e}")
+                continue
+            print(f"   ⚠️ ArXiv 批量获取失败: {e}，改为逐个获取")
+            for pid in chunk:
+                if pid not in results:
+                    results.update(fetch_arxiv_papers([pid]))
+    if store is not None and results:
+        store.upsert_papers(results.values())
+    return dict(stored, **results)
 
 
 def fetch_arxiv_paper(paper_id):
@@ -39,148 +167,318 @@ def fetch_arxiv_paper(paper_id):
     获取 ArXiv 论文的元数据（摘要、作者、日期等）
     """
     print(f"[*] [ArXiv] 获取论文元数据: {paper_id} ...")
-    client = arxiv.Client()
-    search = arxiv.Search(id_list=[paper_id])
-    try:
-        paper = next(client.results(search))
-        return {
-            "id": paper_id,
-            "title": paper.title,
-            "abstract": paper.summary,
-            "published_date": paper.published.strftime("%Y-%m-%d"),
-            "pdf_url": paper.pdf_url,
-            "authors": [a.name for a in paper.authors],
-        }
-    except (StopIteration, Exception) as e:
-        print(f"❌ ArXiv 获取失败 {paper_id}: {e}")
-        return None
+    paper = fetch_arxiv_papers([paper_id]).get(paper_id)
+    if not paper:
+        print(f"❌ ArXiv 获取失败 {paper_id}: 未找到")
+    return paper
+
 
+S2_API_BASE = "https://api.semanticscholar.org/graph/v1"
+S2_PAPER_FIELDS = "title,abstract,authors,year"
+S2_BATCH_SIZE = 500  # POST /paper/batch 单次最多 500 个 id
 
-def _request_s2_with_retry(url, max_retries=4, base_delay=5):
-    """请求 S2 API，遇 429 时指数退避重试。无 Key 时 S2 约 100 次/5 分钟，故请求前留间隔。"""
+
+def _s2_request_steps(url, max_retries=4, base_delay=5, ttl=None, json_body=None):
+    """
+    单个 S2 请求的步骤生成器：缓存、限流、状态码处理与退避策略都在这里，同步与异步路径共用，
+    驱动方只负责实际的等待与 I/O。依次 yield：
+      ("acquire",)                       从共享令牌桶取一个令牌
+      ("http", 方法, json_body, 超时秒数)  发出请求，驱动方 send 回响应，或把请求异常 throw 进生成器
+      ("sleep", 秒数)                     退避等待
+    最终 return 解析后的数据（404 与放弃重试时为 None）。
+    """
+    cache = get_s2_cache() if json_body is None else None
+    cache_key = normalize_s2_url(url)
+    if cache is not None:
+        hit, cached = cache.get(cache_key)
+        if hit:
+            return cached
+    limiter = get_s2_limiter()
+    method, timeout = ("GET", 20) if json_body is None else ("POST", 60)
     for attempt in range(max_retries + 1):
-        time.sleep(3 if attempt == 0 else 0)  # 每次调用前间隔，降低触发 429 概率
+        yield ("acquire",)
+        _count_request("s2")
         try:
-            r = requests.get(url, timeout=20)
+            r = yield ("http", method, json_body, timeout)
             if r.status_code == 200:
-                return r.json()
+                limiter.on_success()
+                data = r.json()
+                if cache is not None:
+                    cache.set(cache_key, data, ttl=ttl)
+                return data
             if r.status_code == 429:
-                delay = base_delay * (2 ** attempt)
-                print(f"   ⚠️ 速率限制 (429)，{delay} 秒后重试 ({attempt + 1}/{max_retries + 1})...")
-                time.sleep(delay)
+                pause = limiter.on_throttle(parse_retry_after(r.headers.get("Retry-After")))
+                print(f"   ⚠️ 速率限制 (429)，暂停 {pause:.1f} 秒并降速后重试 ({attempt + 1}/{max_retries + 1})...")
                 continue
             if r.status_code == 404:
+                limiter.on_success()
+                if cache is not None:
+                    cache.set(cache_key, None, ttl=S2_NOT_FOUND_TTL)
                 return None
             if attempt < max_retries and r.status_code in (503, 502):
                 delay = base_delay * (2 ** attempt)
                 print(f"   ⚠️ 服务暂时不可用 ({r.status_code})，{delay} 秒后重试...")
-                time.sleep(delay)
+                yield ("sleep", delay)
                 continue
             return None
         except Exception as e:
             if attempt < max_retries:
                 delay = base_delay * (2 ** attempt)
                 print(f"   ⚠️ 请求异常: {e}，{delay} 秒后重试...")
-                time.sleep(delay)
+                yield ("sleep", delay)
             else:
                 raise
     return None
 
 
+def _request_s2_with_retry(url, **kwargs):
+    """
+    请求 S2 API。先查本地缓存（键为规范化 URL），命中则不发请求；成功结果按 ttl 写入缓存，404 短期缓存。
+    所有请求经共享的自适应令牌桶限流（无 Key 约 100 次/5 分钟，有 S2_API_KEY 按其配额）；
+    遇 429 按 Retry-After 暂停并降低速率后重试，502/503 与网络异常按 base_delay 指数退避重试。
+    json_body 非空时发 POST（批量接口），不走整体缓存，由调用方按 id 缓存。
+    策略见 _s2_request_steps，这里只做同步的等待与 I/O（异步版本见 async_crawl._request_s2_async）。
+    """
+    steps = _s2_request_steps(url, **kwargs)
+    limiter = get_s2_limiter()
+    try:
+        action = next(steps)
+        while True:
+            if action[0] == "acquire":
+                limiter.acquire()
+                action = steps.send(None)
+            elif action[0] == "sleep":
+                time.sleep(action[1])
+                action = steps.send(None)
+            else:
+                _, method, json_body, timeout = action
+                try:
+                    r = http_request(method, url, json_body=json_body, headers=s2_headers(), timeout=timeout)
+                except Exception as e:
+                    action = steps.throw(e)
+                else:
+                    action = steps.send(r)
+    except StopIteration as stop:
+        return stop.value
+
+
+def _s2_paper_url(paper_id_s2, fields=S2_PAPER_FIELDS):
+    """单篇论文接口 URL；批量接口的结果也按此 URL 写入缓存，两条路径共用缓存记录。"""
+    return f"{S2_API_BASE}/paper/{paper_id_s2}?fields={fields}"
+
+
+def _s2_paper_to_meta(data):
+    """S2 论文记录 -> 项目统一的元数据字典。"""
+    authors = [a.get("name") or "" for a in data.get("authors") or []]
+    return {
+        "title": data.get("title") or "",
+        "abstract": data.get("abstract") or "",
+        "authors": authors,
+        "published_date": str(data.get("year") or ""),
+        "pdf_url": "",
+    }
+
+
 def fetch_paper_from_semantic_scholar(paper_id_s2):
     """
     通过 Semantic Scholar paperId 获取论文的 title, abstract, authors（用于无 ArXiv ID 的论文）
     """
-    url = f"https://api.semanticscholar.org/graph/v1/paper/{paper_id_s2}?fields=title,abstract,authors,year"
+    url = _s2_paper_url(paper_id_s2)
     try:
-        data = _request_s2_with_retry(url)
+        data = _request_s2_with_retry(url, ttl=S2_PAPER_TTL)
         if not data:
             return None
-        authors = [a.get("name") or "" for a in data.get("authors", [])]
-        return {
-            "title": data.get("title") or "",
-            "abstract": data.get("abstract") or "",
-            "authors": authors,
-            "published_date": str(data.get("year") or ""),
-            "pdf_url": "",
-        }
+        return _s2_paper_to_meta(data)
     except Exception as e:
         print(f"   ⚠️ S2 获取失败 {paper_id_s2}: {e}")
         return None
 
 
-def fetch_related_papers_via_semantic_scholar(arxiv_id, top_n=5):
+def fetch_papers_batch_from_semantic_scholar(paper_ids, batch_size=S2_BATCH_SIZE):
     """
-    获取该论文的 references 和 citations，并按引用量排序各取前 top_n 篇。
-    遇 429 时指数退避重试，避免因速率限制导致漏爬。
+    通过 POST /paper/batch 批量获取论文元数据，每批最多 batch_size 个 id。
+    paper_ids 可为 S2 paperId 或 "ARXIV:xxxx" 形式。
+    返回 {id: 元数据}，未收录或请求失败的 id 不在结果中（由调用方逐篇回退）。
+    """
+    cache = get_s2_cache()
+    results = {}
+    pending = []
+    for pid in dict.fromkeys(p for p in paper_ids if p):
+        if cache is not None:
+            hit, cached = cache.get(normalize_s2_url(_s2_paper_url(pid)))
+            if hit:
+                if cached:
+                    results[pid] = _s2_paper_to_meta(cached)
+                continue
+        pending.append(pid)
+
+    url = f"{S2_API_BASE}/paper/batch?fields={S2_PAPER_FIELDS}"
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        print(f"[*] [S2] 批量获取元数据: {len(chunk)} 篇 ({start + 1}-{start + len(chunk)}/{len(pending)}) ...")
+        try:
+            data = _request_s2_with_retry(url, json_body={"ids": chunk})
+        except Exception as e:
+            print(f"   ⚠️ S2 批量获取失败: {e}")
+            continue
+        if not isinstance(data, list):
+            continue
+        for pid, item in zip(chunk, data):
+            if cache is not None:
+                cache_key = normalize_s2_url(_s2_paper_url(pid))
+                if item:
+                    cache.set(cache_key, item, ttl=S2_PAPER_TTL)
+                else:
+                    cache.set(cache_key, None, ttl=S2_NOT_FOUND_TTL)
+            if item:
+                results[pid] = _s2_paper_to_meta(item)
+    return results
+
+
+def _run_s2_steps(steps):
+    """
+    同步执行一个 S2 请求步骤生成器：生成器 yield 请求参数（传给 _request_s2_with_retry），
+    收到响应后继续，最终 return 解析结果。异步引擎用同一生成器，保证两条路径解析逻辑一致。
+    """
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(_request_s2_with_retry(**request))
+    except StopIteration as stop:
+        return stop.value
+
+
+def _parse_related_item(item):
     """
+    S2 引用/被引条目 -> 相关论文字典；无标题时返回 None。
+    条目带 abstract/authors（rich_fields 模式）时一并填入，后续无需再补全元数据。
+    """
+    if not item.get("title"):
+        return None
+    external = item.get("externalIds") or {}
+    paper = {
+        "title": item["title"],
+        "arxiv_id": external.get("ArXiv") or None,
+        "citation_count": item.get("citationCount") or 0,
+        "year": item.get("year") or 0,
+        "paper_id_s2": item.get("paperId"),
+    }
+    if external.get("DOI"):
+        paper["doi"] = external["DOI"]
+    if "abstract" in item or "authors" in item:
+        paper.update(_s2_paper_to_meta(item))
+        paper["title"] = item["title"]
+    return paper
+
+
+def has_full_metadata(paper_item):
+    """论文是否已有摘要与作者（无需再补全）。"""
+    return bool(paper_item and paper_item.get("abstract") and paper_item.get("authors"))
+
+
+S2_RELATION_FIELDS = "title,externalIds,citationCount,year,paperId"
+# rich_fields 模式：同一分页请求里带回邻居的摘要与作者
+S2_RELATION_FIELDS_RICH = S2_RELATION_FIELDS + ",abstract,authors"
+S2_RELATION_PAGE_SIZE = 1000  # /references 与 /citations 单页上限
+
+
+def _top_k_relation_steps(arxiv_id, direction, top_n, max_scan=None, rich_fields=False):
+    """
+    分页遍历 /paper/ARXIV:{id}/{direction}（direction 为 references 或 citations），
+    用大小为 top_n 的最小堆保留引用量最高的论文，内存 O(top_n + 单页)。
+    S2 分页不按引用量排序，剩余页随时可能出现更高引用量的论文，无法据堆顶证明可以提前结束；
+    max_scan 为可选截断：最多扫描这么多条后停止翻页（牺牲精确性换请求数）。
+    引用量相同时保留先出现的论文，与整体排序后取前 top_n 的结果一致。
+    rich_fields 为 True 时同一请求带回摘要、作者，邻居论文到手即完整。
+    """
+    if top_n <= 0:
+        return []
+    item_key = "citedPaper" if direction == "references" else "citingPaper"
+    fields = S2_RELATION_FIELDS_RICH if rich_fields else S2_RELATION_FIELDS
+    heap = []  # (citation_count, -序号, paper)
+    scanned = 0
+    offset = 0
+    while True:
+        limit = S2_RELATION_PAGE_SIZE
+        if max_scan is not None:
+            limit = min(limit, max_scan - offset)
+        url = (
+            f"{S2_API_BASE}/paper/ARXIV:{arxiv_id}/{direction}"
+            f"?fields={fields}&offset={offset}&limit={limit}"
+        )
+        page = yield {"url": url, "max_retries": 4, "base_delay": 5, "ttl": S2_RELATIONS_TTL}
+        if not page:
+            if offset == 0:
+                print(f"   ⚠️ 未获取到 {direction} 数据（未收录或已达重试上限）")
+            break
+        for item in page.get("data") or []:
+            scanned += 1
+            paper = _parse_related_item(item.get(item_key) or {})
+            if not paper:
+                continue
+            entry = (paper["citation_count"], -scanned, paper)
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        next_offset = page.get("next")
+        if next_offset is None or (max_scan is not None and next_offset >= max_scan):
+            break
+        offset = next_offset
+    return [p for _, _, p in sorted(heap, key=lambda e: e[:2], reverse=True)]
+
+
+def _related_papers_steps(arxiv_id, top_n, max_scan=None, rich_fields=False):
+    """fetch_related_papers_via_semantic_scholar 的请求步骤（见 _run_s2_steps）。"""
     print(f"[*] [S2] 获取引用关系 (top {top_n}): {arxiv_id} ...")
-    url = (
-        "https://api.semanticscholar.org/graph/v1/paper/ARXIV:"
-        + arxiv_id
-        + "?fields=title,year,citationCount,"
-        "references.title,references.externalIds,references.citationCount,references.year,references.paperId,"
-        "citations.title,citations.externalIds,citations.citationCount,citations.year,citations.paperId"
-    )
+    references = yield from _top_k_relation_steps(arxiv_id, "references", top_n, max_scan, rich_fields)
+    citations = yield from _top_k_relation_steps(arxiv_id, "citations", top_n, max_scan, rich_fields)
+    print(f"   --> 参考文献 top{top_n}: {len(references)} 篇, 被引文献 top{top_n}: {len(citations)} 篇")
+    return {"references": references, "citations": citations}
+
+
+def fetch_related_papers_via_semantic_scholar(arxiv_id, top_n=5, max_scan=None, rich_fields=False):
+    """
+    获取该论文的 references 和 citations，并按引用量排序各取前 top_n 篇。
+    分页请求 /references 与 /citations，边翻页边用堆保留 top_n；max_scan 限制每个方向最多扫描的条数。
+    rich_fields 为 True 时在同一请求中带回摘要与作者，省去逐篇补全。
+    遇 429 时限流重试，避免因速率限制导致漏爬。
+    启用语料库（--store）时先查库中的展开记录（rich_fields 时只认 rich 模式的记录），命中则不发请求；新拉取的结果写回库中。
+    """
+    store = get_corpus_store()
+    if store is not None:
+        rel = store.get_expansion(arxiv_id, top_n, max_scan, rich=rich_fields)
+        if rel is not None:
+            return rel
     try:
-        data = _request_s2_with_retry(url, max_retries=4, base_delay=5)
-        if not data:
-            print("   ⚠️ 未获取到数据（未收录或已达重试上限）")
-            return {"references": [], "citations": []}
-        references = []
-        if data.get("references"):
-            for item in data["references"]:
-                if not item.get("title"):
-                    continue
-                arxiv_id_ref = None
-                if item.get("externalIds") and item["externalIds"].get("ArXiv"):
-                    arxiv_id_ref = item["externalIds"]["ArXiv"]
-                references.append({
-                    "title": item["title"],
-                    "arxiv_id": arxiv_id_ref,
-                    "citation_count": item.get("citationCount") or 0,
-                    "year": item.get("year") or 0,
-                    "paper_id_s2": item.get("paperId"),
-                })
-        references = sorted(
-            references, key=lambda x: (x["citation_count"] or 0), reverse=True
-        )[:top_n]
-
-        citations = []
-        if data.get("citations"):
-            for item in data["citations"]:
-                if not item.get("title"):
-                    continue
-                arxiv_id_cite = None
-                if item.get("externalIds") and item["externalIds"].get("ArXiv"):
-                    arxiv_id_cite = item["externalIds"]["ArXiv"]
-                citations.append({
-                    "title": item["title"],
-                    "arxiv_id": arxiv_id_cite,
-                    "citation_count": item.get("citationCount") or 0,
-                    "year": item.get("year") or 0,
-                    "paper_id_s2": item.get("paperId"),
-                })
-        citations = sorted(
-            citations, key=lambda x: (x["citation_count"] or 0), reverse=True
-        )[:top_n]
-
-        print(f"   --> 参考文献 top{top_n}: {len(references)} 篇, 被引文献 top{top_n}: {len(citations)} 篇")
-        return {"references": references, "citations": citations}
+        rel = _run_s2_steps(_related_papers_steps(arxiv_id, top_n, max_scan, rich_fields))
     except Exception as e:
         print(f"❌ 网络错误: {e}")
         return {"references": [], "citations": []}
+    record_expansion(arxiv_id, rel, top_n, max_scan, rich=rich_fields)
+    return rel
+
 
+def record_expansion(arxiv_id, rel, top_n, max_scan=None, rich=False):
+    """把拉取到的引用/被引写入语料库（未启用或结果为空时跳过，避免把请求失败当成“没有引用”记下）。"""
+    store = get_corpus_store()
+    if store is not None and (rel["references"] or rel["citations"]):
+        store.record_expansion(arxiv_id, rel, top_n, max_scan, rich=rich)
 
-def ensure_paper_metadata(paper_item):
+
+def ensure_paper_metadata(paper_item, arxiv_meta=None):
     """
     确保论文有摘要、作者：有 arxiv_id 则从 ArXiv 拉取，否则从 S2 用 paperId 拉取。
+    arxiv_meta 为 fetch_arxiv_papers 预取的结果时直接查表，不再单独请求 ArXiv。
     不递归查找该论文的引用/被引用。
     """
-    if paper_item.get("abstract") and paper_item.get("authors"):
+    if has_full_metadata(paper_item):
         return paper_item
     if paper_item.get("arxiv_id"):
-        meta = fetch_arxiv_paper(paper_item["arxiv_id"])
+        if arxiv_meta is not None:
+            meta = arxiv_meta.get(paper_item["arxiv_id"])
+        else:
+            meta = fetch_arxiv_paper(paper_item["arxiv_id"])
         if meta:
             paper_item["abstract"] = meta.get("abstract", "")
             paper_item["authors"] = meta.get("authors", [])
@@ -202,46 +500,286 @@ def ensure_paper_metadata(paper_item):
     return paper_item
 
 
+def _s2_batch_id(paper_item):
+    """论文在 S2 批量接口中的 id：优先 paperId，否则用 ARXIV:xxxx。"""
+    if paper_item.get("paper_id_s2"):
+        return paper_item["paper_id_s2"]
+    if paper_item.get("arxiv_id"):
+        return "ARXIV:" + paper_item["arxiv_id"]
+    return None
+
+
 def batch_ensure_metadata(paper_list):
-    """批量补全摘要、作者等，不递归查引用。"""
+    """
+    批量补全摘要、作者等，不递归查引用。
+    先把缺摘要/作者的论文按 S2 id 分组走批量接口，仅对批量接口未解决的论文逐篇回退
+    （S2 未收录，或有 arxiv_id 但 S2 不提供摘要时改从 ArXiv 批量拉取）。
+    """
     print(f"\n[*] 补全 {len(paper_list)} 篇论文的摘要与作者...")
-    for idx, paper in enumerate(paper_list):
-        ensure_paper_metadata(paper)
-        time.sleep(0.5)
+    missing = [p for p in paper_list if not has_full_metadata(p)]
+    store = get_corpus_store()
+    if store is not None and missing:
+        filled = store.fill_metadata(missing)
+        if filled:
+            print(f"   --> 语料库中已有 {filled} 篇")
+            missing = [p for p in missing if not has_full_metadata(p)]
+    batch_meta = fetch_papers_batch_from_semantic_scholar([_s2_batch_id(p) for p in missing])
+
+    fallback = []
+    for paper in missing:
+        meta = batch_meta.get(_s2_batch_id(paper))
+        if not meta:
+            fallback.append(paper)
+            continue
+        paper["abstract"] = meta.get("abstract", "")
+        paper["authors"] = meta.get("authors", [])
+        paper["published_date"] = meta.get("published_date", "") or str(paper.get("year", ""))
+        paper["pdf_url"] = meta.get("pdf_url", "")
+        if paper.get("arxiv_id") and not has_full_metadata(paper):
+            fallback.append(paper)
+
+    if fallback:
+        print(f"   --> 批量接口未解决 {len(fallback)} 篇，逐篇回退补全")
+    arxiv_meta = fetch_arxiv_papers([p["arxiv_id"] for p in fallback if p.get("arxiv_id")])
+    for paper in fallback:
+        ensure_paper_metadata(paper, arxiv_meta=arxiv_meta)
+    for paper in paper_list:
+        paper.setdefault("abstract", "")
+        paper.setdefault("authors", [])
     return paper_list
 
 
-def extract_knowledge_with_llm(paper_info):
-    """可选：LLM 深度抽取。未配置 API Key 则跳过。实体类型必须为 classes.json 中的类型。"""
-    if not is_api_configured():
-        return {"entities": [], "triples": []}
-    print(f"[*] [LLM] 深度抽取: {paper_info['title'][:30]}...")
-    client = OpenAI(api_key=API_KEY, base_url=BASE_URL)
+def _extraction_system_prompt():
     allowed_types = get_types_for_llm_prompt()
-    system_prompt = f"""你是一个知识图谱专家。从论文摘要中提取实体和关系。
+    return f"""你是一个知识图谱专家。从论文摘要中提取实体和关系。
 实体类型必须且仅能从以下类型中选择（来自 classes.json 规范）: {allowed_types}
 关系类型: proposed_model, baseline_model, evaluated_on, uses_metric, cites, author_of
 要求：triples 必须使用 "head" 和 "tail" 字段（不要用 subject/object）；head 和 tail 的值必须是实体名称（如论文标题、模型名、数据集名），不要用 E1、E2 等 ID。
 严格输出 JSON: {{"entities": [{{"name": "...", "type": "..."}}], "triples": [{{"head": "...", "relation": "...", "tail": "..."}}]}}"""
+
+
+def _extraction_cache_key(paper_info, system_prompt, packed=False):
+    """packed=True 时键里带上打包提示词：打包回复与单篇回复分开缓存。"""
+    if packed:
+        system_prompt += PACKED_PROMPT_SUFFIX
+    return extraction_cache_key(MODEL_NAME, system_prompt, paper_info["title"], paper_info.get("abstract", ""))
+
+
+def extract_knowledge_with_llm(paper_info):
+    """
+    可选：LLM 深度抽取。未配置 API Key 则跳过。实体类型必须为 classes.json 中的类型。
+    结果按 (模型, 提示词, 标题, 摘要) 的内容哈希缓存，内容未变的论文重跑时不再调用大模型。
+    """
+    if not is_api_configured():
+        return {"entities": [], "triples": []}
+    system_prompt = _extraction_system_prompt()
+    user_prompt = f"Title: {paper_info['title']}\nAbstract: {paper_info.get('abstract', '')}"
+
+    cache = get_llm_cache()
+    cache_key = _extraction_cache_key(paper_info, system_prompt)
+    if cache is not None:
+        hit, cached = cache.get(cache_key)
+        if hit:
+            print(f"[*] [LLM] 缓存命中: {paper_info['title'][:30]}...")
+            return cached
+
+    print(f"[*] [LLM] 深度抽取: {paper_info['title'][:30]}...")
     try:
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
+        content, usage = chat_completion_with_usage(
+            [
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Title: {paper_info['title']}\nAbstract: {paper_info.get('abstract', '')}"},
+                {"role": "user", "content": user_prompt},
             ],
             temperature=0.1,
             response_format={"type": "json_object"},
         )
-        return json.loads(response.choices[0].message.content)
+        result = json.loads(content)
+    except json.JSONDecodeError as e:
+        record_parse_failure()
+        print(f"❌ LLM 返回无法解析为 JSON: {e}")
+        return {"entities": [], "triples": []}
     except Exception as e:
         print(f"❌ LLM 错误: {e}")
         return {"entities": [], "triples": []}
+    if cache is not None:
+        tokens = usage["total_tokens"] if usage else estimate_tokens(system_prompt + user_prompt + content)
+        cache.set(cache_key, result, tokens=tokens)
+    return result
+
+
+LLM_WORKERS = 4  # 并发抽取的默认线程数（总速率仍受 LLM_RPM / LLM_TPM 限制）
+
+# 打包模式：一次请求抽取多篇，系统提示词只发送一次
+PACKED_PROMPT_SUFFIX = """
+本次输入包含多篇论文，每篇以 [P编号] 开头。请逐篇独立抽取（每篇的实体与三元组只来自该篇摘要），按编号输出，不要遗漏任何编号：
+{"papers": {"P1": {"entities": [...], "triples": [...]}, "P2": {"entities": [...], "triples": [...]}}}"""
+
+
+def _parse_packed_section(section):
+    """校验打包回复中的单篇结果；格式不对返回 None。"""
+    if not isinstance(section, dict):
+        return None
+    entities = section.get("entities", [])
+    triples = section.get("triples", [])
+    if not isinstance(entities, list) or not isinstance(triples, list):
+        return None
+    return {"entities": entities, "triples": triples}
+
+
+def _extract_pack(papers, system_prompt, stats):
+    """
+    用一次请求抽取一组论文。返回与 papers 一一对应的结果，解析失败的位置为 None。
+    成功的结果逐篇写入缓存（token 按篇数均摊）。
+    """
+    tags = [f"P{i + 1}" for i in range(len(papers))]
+    user_prompt = "\n\n".join(
+        f"[{tag}]\nTitle: {p['title']}\nAbstract: {p.get('abstract', '')}" for tag, p in zip(tags, papers)
+    )
+    print(f"[*] [LLM] 打包抽取 {len(papers)} 篇: {papers[0]['title'][:30]}...")
+    start = time.monotonic()
+    try:
+        content, usage = chat_completion_with_usage(
+            [
+                {"role": "system", "content": system_prompt + PACKED_PROMPT_SUFFIX},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.1,
+            response_format={"type": "json_object"},
+        )
+        sections = json.loads(content).get("papers") or {}
+    except (json.JSONDecodeError, AttributeError) as e:
+        record_parse_failure()
+        print(f"❌ LLM 打包回复无法解析: {e}")
+        return [None] * len(papers)
+    except Exception as e:
+        print(f"❌ LLM 打包抽取错误: {e}")
+        return [None] * len(papers)
+    tokens = usage["total_tokens"] if usage else estimate_tokens(system_prompt + user_prompt + content)
+    with stats["lock"]:
+        stats["requests"] += 1
+        stats["tokens"] += tokens
+        stats["seconds"] += time.monotonic() - start
+    results = [_parse_packed_section(sections.get(tag)) if isinstance(sections, dict) else None for tag in tags]
+    if None in results:
+        record_parse_failure(results.count(None))
+    cache = get_llm_cache()
+    if cache is not None:
+        per_paper = tokens // len(papers)
+        for p, result in zip(papers, results):
+            if result is not None:
+                cache.set(_extraction_cache_key(p, system_prompt, packed=True), result, tokens=per_paper)
+    return results
+
+
+def extract_knowledge_packed(papers, pack_size, workers=LLM_WORKERS):
+    """
+    打包抽取：未命中缓存的论文每 pack_size 篇合成一次请求（各篇带 [P编号]，回复按编号拆回），
+    多个包之间最多 workers 个并发。某篇的结果缺失或解析失败时只对该篇单独重试。
+    返回与 papers 一一对应的结果列表，并打印每篇平均 token 与耗时。
+    """
+    if not is_api_configured():
+        return [{"entities": [], "triples": []} for _ in papers]
+    system_prompt = _extraction_system_prompt()
+    cache = get_llm_cache()
+    results = [None] * len(papers)
+    pending = []
+    for i, p in enumerate(papers):
+        if cache is not None:
+            # 先查打包结果，再查单篇结果（逐篇重试过的论文缓存在单篇键下）
+            hit, cached = cache.get(_extraction_cache_key(p, system_prompt, packed=True))
+            if not hit:
+                hit, cached = cache.get(_extraction_cache_key(p, system_prompt))
+            if hit:
+                results[i] = cached
+                continue
+        pending.append(i)
+    if not pending:
+        return results
+
+    stats = {"requests": 0, "tokens": 0, "seconds": 0.0, "lock": threading.Lock()}
+    packs = [pending[j:j + pack_size] for j in range(0, len(pending), pack_size)]
+    started = time.monotonic()
+
+    def run(pack):
+        return _extract_pack([papers[i] for i in pack], system_prompt, stats)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for pack, pack_results in zip(packs, pool.map(run, packs)):
+            for i, result in zip(pack, pack_results):
+                results[i] = result
+    elapsed = time.monotonic() - started
+
+    failed = [i for i in pending if results[i] is None]
+    if failed:
+        print(f"   --> {len(failed)} 篇未能从打包回复中解析，逐篇重试")
+        for i, result in zip(failed, extract_knowledge_for_papers([papers[i] for i in failed], workers)):
+            results[i] = result
+    done = len(pending) - len(failed)
+    if done:
+        print(
+            f"[*] [LLM] 打包抽取 {done} 篇，共 {stats['requests']} 次请求，"
+            f"每篇平均 {stats['tokens'] / done:.0f} tokens、{stats['seconds'] / done:.2f} 秒请求时间"
+            f"（总耗时 {elapsed:.1f} 秒）"
+        )
+    return results
+
+
+def extract_knowledge_for_papers(
+    papers, workers=LLM_WORKERS, pack_size=1, gazetteer=None, gazetteer_min=GAZETTEER_MIN_HITS
+):
+    """
+    对多篇论文做 LLM 抽取：最多 workers 篇同时进行，共用一个客户端与限流器。
+    pack_size > 1 时改用打包模式（见 extract_knowledge_packed）。
+    给出 gazetteer（见 gazetteer.py）时先做本地词典抽取，命中 gazetteer_min 个以上不同专有词条的论文
+    直接使用本地结果，只有命中太少的论文才调用 LLM。
+    返回与 papers 一一对应的结果列表（顺序与输入一致，合并结果稳定）。
+    """
+    if gazetteer is not None:
+        results = [None] * len(papers)
+        rest = []
+        start = time.perf_counter()
+        for i, p in enumerate(papers):
+            local = gazetteer.extract_if_confident(p, gazetteer_min)
+            if local is not None:
+                results[i] = local
+            else:
+                rest.append(i)
+        elapsed = time.perf_counter() - start
+        print(
+            f"[*] [词典] 本地抽取 {len(papers) - len(rest)}/{len(papers)} 篇"
+            f"（平均 {elapsed / max(1, len(papers)) * 1e3:.2f} 毫秒/篇），其余 {len(rest)} 篇交给 LLM"
+        )
+        for i, result in zip(rest, extract_knowledge_for_papers([papers[i] for i in rest], workers, pack_size)):
+            results[i] = result
+        return results
+    if pack_size > 1 and len(papers) > 1:
+        return extract_knowledge_packed(papers, pack_size, workers)
+    if workers <= 1 or len(papers) <= 1:
+        return [extract_knowledge_with_llm(p) for p in papers]
+    print(f"[*] [LLM] 并发抽取 {len(papers)} 篇 (线程数 {workers}) ...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(extract_knowledge_with_llm, papers))
 
 
-def build_top_citations_kg(arxiv_id, top_n=5, run_llm=False):
+def build_top_citations_kg(
+    arxiv_id,
+    top_n=5,
+    run_llm=False,
+    max_scan=None,
+    rich_fields=False,
+    llm_workers=LLM_WORKERS,
+    llm_pack=1,
+    gazetteer=None,
+    gazetteer_min=GAZETTEER_MIN_HITS,
+    stream=False,
+):
     """
     主流程：根据 arxiv_id 和 top_n 构建知识图谱（不递归），输出 JSON 与 HTML。
+    max_scan、rich_fields 见 fetch_related_papers_via_semantic_scholar。
+    llm_workers 为 LLM 并发抽取线程数，llm_pack > 1 时每次请求打包抽取 llm_pack 篇。
+    gazetteer 不为空时先用本地词典抽取，命中不足 gazetteer_min 个词条的论文才调用 LLM。
+    stream 为 True 时输出流式 JSONL（.kg.jsonl）而不是缩进 JSON，见 write_kg_output。
+    启用语料库（configure_corpus_store）时拉取前先查库，结束后把论文与图谱写回库中。
     """
     print("\n" + "=" * 60)
     print("🚀 Top 引用知识图谱 (Top Citations KG)")
@@ -252,71 +790,34 @@ def build_top_citations_kg(arxiv_id, top_n=5, run_llm=False):
     if not seed:
         return False
 
-    relation = fetch_related_papers_via_semantic_scholar(arxiv_id, top_n=top_n)
+    relation = fetch_related_papers_via_semantic_scholar(
+        arxiv_id, top_n=top_n, max_scan=max_scan, rich_fields=rich_fields
+    )
     refs = relation["references"]
     cites = relation["citations"]
-    related = refs + cites
+
+    # 按 S2 paperId / arXiv id / DOI 去重：同一篇论文只补全、只入图一次
+    index = PaperIndex()
+    seed_pid = index.add(seed)
+    ref_pids = [index.add(r) for r in refs]
+    cite_pids = [index.add(c) for c in cites]
+    related_pids = [pid for pid in index.ids() if pid != seed_pid]
+    related = [index.get(pid) for pid in related_pids]
     batch_ensure_metadata(related)
 
-    all_papers = [seed] + related
-    seen_names = set()
-    entities = []
-    triples = []
-
-    for p in all_papers:
-        name = p.get("title") or ""
-        if name and name not in seen_names:
-            arxiv_id_val = p.get("arxiv_id") or p.get("id", "")
-            entities.append({
-                "name": name,
-                "type": normalize_entity_type("AIPaper", allowed=ALLOWED_TYPES),
-                "arxiv_id": arxiv_id_val,
-            })
-            seen_names.add(name)
-    for p in all_papers:
-        for a in p.get("authors", []):
-            a = (a or "").strip()
-            if a and a not in seen_names:
-                entities.append({"name": a, "type": normalize_entity_type("Researcher", allowed=ALLOWED_TYPES)})
-                seen_names.add(a)
-
-    for p in all_papers:
-        for a in p.get("authors", []):
-            a = (a or "").strip()
-            if a and p.get("title"):
-                triples.append({"head": a, "relation": "author_of", "tail": p["title"]})
-    for r in refs:
-        if r.get("title") and seed.get("title"):
-            triples.append({"head": seed["title"], "relation": "cites", "tail": r["title"]})
-    for c in cites:
-        if c.get("title") and seed.get("title"):
-            triples.append({"head": c["title"], "relation": "cites", "tail": seed["title"]})
+    pids = [seed_pid] + related_pids
+    all_papers = [index.get(pid) for pid in pids]
+    kg = KnowledgeGraph(ALLOWED_TYPES)
+    kg.add_papers(all_papers, titles=[index.display_title(pid) for pid in pids])
+    seed_title = index.display_title(seed_pid)
+    kg.add_triples("cites", [(seed_title, index.display_title(pid)) for pid in ref_pids if pid != seed_pid])
+    kg.add_triples("cites", [(index.display_title(pid), seed_title) for pid in cite_pids if pid != seed_pid])
 
     if run_llm:
-        for p in all_papers:
-            llm_data = extract_knowledge_with_llm(p)
-            # 实体 ID -> name，用于把三元组里的 E1/E2 解析成论文名、模型名等
-            id_to_name = {}
-            for e in llm_data.get("entities", []):
-                n = e.get("name")
-                if n:
-                    if n not in seen_names:
-                        raw_type = e.get("type", "Thesis")
-                        entities.append({"name": n, "type": normalize_entity_type(raw_type, allowed=ALLOWED_TYPES)})
-                        seen_names.add(n)
-                    eid = e.get("id")
-                    if eid:
-                        id_to_name[eid] = n
-                    id_to_name[n] = n  # 名字也映射到自己，方便 triples 里已用 name 的情况
-            # 统一三元组格式并解析 ID：兼容 head/tail 与 subject/object，ID 转为 name
-            for t in llm_data.get("triples", []):
-                head = t.get("head") or t.get("subject")
-                tail = t.get("tail") or t.get("object")
-                if not head or not tail:
-                    continue
-                head = id_to_name.get(head, head)
-                tail = id_to_name.get(tail, tail)
-                triples.append({"head": head, "relation": t.get("relation", ""), "tail": tail})
+        llm_results = extract_knowledge_for_papers(all_papers, llm_workers, llm_pack, gazetteer, gazetteer_min)
+        for llm_data in llm_results:
+            kg.add_llm_result(llm_data)
+    save_to_corpus_store(all_papers, kg)
 
     # 相关论文保留完整元数据（摘要、作者等），不递归查其引用/被引
     def _paper_meta(p):
@@ -330,78 +831,108 @@ def build_top_citations_kg(arxiv_id, top_n=5, run_llm=False):
             "citation_count": p.get("citation_count"),
             "year": p.get("year"),
         }
-    related_with_meta = [_paper_meta(p) for p in related]
     output_data = {
         "paper_metadata": seed,
         "related_papers_count": {"references": len(refs), "citations": len(cites)},
-        "related_papers": related_with_meta,
+        "related_papers": None,
         "top_n": top_n,
-        "knowledge_graph": {"entities": entities, "triples": triples},
+        "knowledge_graph": None,
     }
+    write_kg_output(f"top_citations_kg_{arxiv_id}", output_data, kg, (_paper_meta(p) for p in related), stream)
+    return True
 
-    base_name = f"top_citations_kg_{arxiv_id}"
-    json_path = f"{base_name}.json"
+
+def write_kg_output(base_name, output_data, kg, related_papers, stream=False):
+    """
+    写出图谱文件与 HTML，返回图谱文件路径。output_data 中 related_papers、knowledge_graph 两项占位，
+    由 related_papers（可为生成器）与 kg 填充：
+      stream 为 False：整体写成 <base_name>.json（缩进 JSON）；
+      stream 为 True：逐条写成 <base_name>.kg.jsonl（见 kg_stream），不在内存中拼出完整输出。
+    """
     html_path = f"{base_name}.html"
-    with open(json_path, "w", encoding="utf-8") as f:
+    if stream:
+        path = stream_path_for(base_name)
+        counts = write_kg_stream(path, output_data, kg.iter_entities(), kg.iter_triples(), related_papers)
+        print(f"\n✅ 流式 JSONL 已保存: {path}（实体 {counts['entities']}，三元组 {counts['triples']}）")
+        generate_html(path, html_path)
+        return path
+    path = f"{base_name}.json"
+    output_data["related_papers"] = list(related_papers)
+    output_data["knowledge_graph"] = kg.to_json()
+    with open(path, "w", encoding="utf-8") as f:
         json.dump(output_data, f, ensure_ascii=False, indent=2)
-    print(f"\n✅ JSON 已保存: {json_path}")
-
-    generate_html(json_path, html_path, output_data)
-    return True
+    print(f"\n✅ JSON 已保存: {path}")
+    generate_html(path, html_path, output_data)
+    return path
 
 
 def generate_html(json_file, output_html_file, data=None):
     """
-    根据 JSON 生成类似 visualize 的 ECharts 力导向图 HTML。
+    根据 JSON 生成类似 visualize 的 ECharts 力导向图 HTML。json_file 可为流式图谱（.kg.jsonl）。
     """
     if data is None:
         if not os.path.exists(json_file):
             print(f"❌ 找不到文件: {json_file}")
             return
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        if is_kg_stream(json_file):
+            data = open_kg(json_file)
+        else:
+            with open(json_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
     paper_meta = data.get("paper_metadata", {})
     kg = data.get("knowledge_graph", {})
     entities = kg.get("entities", [])
     triples = kg.get("triples", [])
 
     # 基于 classes.json 扩展：仅使用 schema 中存在的类型作为 categories
-    raw_types = [e.get("type", "Thesis") for e in entities]
+    raw_types = dict.fromkeys(e.get("type", "Thesis") for e in entities)
     type_list = get_categories_for_entities(raw_types)
     category_map = {t: i for i, t in enumerate(type_list)}
     categories = [{"name": t} for t in type_list]
 
-    # 按 name 去重：同一人（同名）只保留一个节点，避免多篇论文作者出现重复节点
-    name_to_entity = {}
-    for e in entities:
-        n = (e.get("name") or "").strip()
-        if n and n not in name_to_entity:
-            name_to_entity[n] = e
-    echarts_nodes = []
-    for n, e in name_to_entity.items():
-        norm_type = normalize_entity_type(e.get("type", "Thesis"), allowed=ALLOWED_TYPES)
-        sz = 50 if norm_type in ("Thesis", "Article", "CreativeWork") else 25
-        echarts_nodes.append({
-            "name": n,
-            "category": category_map.get(norm_type, 0),
-            "symbolSize": sz,
-            "draggable": True,
-            "value": norm_type,
-        })
-    seen = set(name_to_entity.keys())
+    # 按 name 去重：同一人（同名）只保留一个节点，避免多篇论文作者出现重复节点。
+    # 节点与连线逐条生成并写入临时文件（流式图谱不整体载入内存），同时统计面板上的数字
+    seen = set()
+    type_counts = {}
+    n_triples = 0
+
+    def iter_nodes():
+        for e in entities:
+            n = (e.get("name") or "").strip()
+            if not n or n in seen:
+                continue
+            seen.add(n)
+            type_counts[e.get("type")] = type_counts.get(e.get("type"), 0) + 1
+            norm_type = normalize_entity_type(e.get("type", "Thesis"), allowed=ALLOWED_TYPES)
+            sz = symbol_size(e, 50 if norm_type in ("Thesis", "Article", "CreativeWork") else 25)
+            node = {
+                "name": n,
+                "category": category_map.get(norm_type, 0),
+                "symbolSize": sz,
+                "draggable": True,
+                "value": norm_type,
+            }
+            color = community_color(e)
+            if color:
+                node["itemStyle"] = {"color": color}
+            yield node
 
     # 兼容 head/tail 与 subject/object；只保留两端都在节点集合中的边；head/tail 做 strip 与节点名一致
-    node_names = seen
-    echarts_links = []
-    for t in triples:
-        head = (t.get("head") or t.get("subject") or "").strip()
-        tail = (t.get("tail") or t.get("object") or "").strip()
-        if head and tail and head in node_names and tail in node_names:
-            echarts_links.append({
-                "source": head,
-                "target": tail,
-                "value": t.get("relation", ""),
-            })
+    def iter_links():
+        nonlocal n_triples
+        for t in triples:
+            n_triples += 1
+            head = (t.get("head") or t.get("subject") or "").strip()
+            tail = (t.get("tail") or t.get("object") or "").strip()
+            if head and tail and head in seen and tail in seen:
+                yield {
+                    "source": head,
+                    "target": tail,
+                    "value": t.get("relation", ""),
+                }
+
+    nodes_buf, _ = spool_json_array(iter_nodes())
+    links_buf, _ = spool_json_array(iter_links())
 
     # 优先使用同目录下的 echarts.min.js（避免 CDN 超时/被拦截），否则用 unpkg
     out_dir = os.path.dirname(os.path.abspath(output_html_file))
@@ -442,9 +973,9 @@ def generate_html(json_file, output_html_file, data=None):
         <p><strong>ArXiv ID:</strong> <code>{paper_meta.get('id', '')}</code></p>
     </div>
     <div class="panel stats">
-        <div class="stat-item"><span class="stat-label">论文节点:</span> <span class="stat-value">{sum(1 for e in name_to_entity.values() if e.get('type') == 'AIPaper')}</span></div>
-        <div class="stat-item"><span class="stat-label">研究者节点:</span> <span class="stat-value">{sum(1 for e in name_to_entity.values() if e.get('type') == 'Researcher')}</span></div>
-        <div class="stat-item"><span class="stat-label">关系数:</span> <span class="stat-value">{len(triples)}</span></div>
+        <div class="stat-item"><span class="stat-label">论文节点:</span> <span class="stat-value">{type_counts.get('AIPaper', 0)}</span></div>
+        <div class="stat-item"><span class="stat-label">研究者节点:</span> <span class="stat-value">{type_counts.get('Researcher', 0)}</span></div>
+        <div class="stat-item"><span class="stat-label">关系数:</span> <span class="stat-value">{n_triples}</span></div>
         <div class="stat-item"><span class="stat-label">引用的论文 (top N):</span> <span class="stat-value">{data.get('related_papers_count', {}).get('references', 0)}</span></div>
         <div class="stat-item"><span class="stat-label">被引用的论文 (top N):</span> <span class="stat-value">{data.get('related_papers_count', {}).get('citations', 0)}</span></div>
     </div>
@@ -464,8 +995,8 @@ def generate_html(json_file, output_html_file, data=None):
                 legend: {{ data: {json.dumps([c['name'] for c in categories])} }},
                 series: [{{
                     type: 'graph', layout: 'force',
-                    data: {json.dumps(echarts_nodes)},
-                    links: {json.dumps(echarts_links)},
+                    data: {HTML_NODES_PLACEHOLDER},
+                    links: {HTML_LINKS_PLACEHOLDER},
                     categories: {json.dumps(categories)},
                     roam: true,
                     label: {{ show: true, position: 'right', formatter: '{{b}}' }},
@@ -488,8 +1019,7 @@ def generate_html(json_file, output_html_file, data=None):
     </script>
 </body>
 </html>"""
-    with open(output_html_file, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    write_spliced(output_html_file, html_content, [(HTML_NODES_PLACEHOLDER, nodes_buf), (HTML_LINKS_PLACEHOLDER, links_buf)])
     print(f"✅ HTML 已生成: {os.path.abspath(output_html_file)}")
 
 
@@ -500,6 +1030,51 @@ if __name__ == "__main__":
     parser.add_argument("arxiv_id", nargs="?", default="1706.03762", help="论文 ArXiv ID，例如 1706.03762")
     parser.add_argument("-n", "--top", type=int, default=5, help="引用/被引各取前 N 篇 (默认 5)")
     parser.add_argument("--llm", action="store_true", help="是否进行 LLM 深度抽取（需配置 API_KEY）")
+    parser.add_argument("--llm-workers", type=int, default=LLM_WORKERS, help=f"LLM 并发抽取线程数 (默认 {LLM_WORKERS})")
+    parser.add_argument("--llm-pack", type=int, default=1, help="每次 LLM 请求打包抽取的论文篇数 (默认 1 即逐篇)")
+    parser.add_argument(
+        "--gazetteer", nargs="*", default=None, metavar="KG_JSON",
+        help="与 --llm 同用：先用本地词典抽取（词条取自给定的图谱 JSON，不给路径则读取当前目录下已生成的图谱）",
+    )
+    parser.add_argument(
+        "--gazetteer-min", type=int, default=GAZETTEER_MIN_HITS,
+        help=f"词典命中的不同专有词条数不少于此值时不再调用 LLM (默认 {GAZETTEER_MIN_HITS})",
+    )
+    parser.add_argument("--max-scan", type=int, default=None, help="引用/被引各最多扫描的条数 (默认全部扫描，精确 top N)")
+    parser.add_argument("--rich-fields", action="store_true", help="拉取引用/被引时一并取摘要与作者，省去逐篇补全请求")
+    parser.add_argument("--cache-dir", default=None, help="S2 响应缓存目录 (默认: 脚本目录下 .cache)")
+    parser.add_argument("--no-cache", action="store_true", help="不读写 S2 响应缓存")
+    parser.add_argument("--no-llm-cache", action="store_true", help="不读写 LLM 抽取结果缓存")
+    parser.add_argument("--refresh-llm-cache", action="store_true", help="清空 LLM 抽取缓存后重新抽取（提示词调整后使用）")
+    parser.add_argument("--stream", action="store_true", help="输出流式 JSONL（.kg.jsonl，逐条写出）而不是缩进 JSON")
+    parser.add_argument(
+        "--store", nargs="?", const=DEFAULT_STORE_PATH, default=None, metavar="SQLITE",
+        help=f"累积写入语料库并优先从库中读取已爬过的论文 (不给路径时为 {DEFAULT_STORE_PATH})",
+    )
     args = parser.parse_args()
 
-    build_top_citations_kg(args.arxiv_id, top_n=args.top, run_llm=args.llm)
+    configure_s2_cache(args.cache_dir, enabled=not args.no_cache)
+    configure_corpus_store(args.store)
+    configure_llm_cache(args.cache_dir, enabled=not args.no_llm_cache, refresh=args.refresh_llm_cache)
+    build_top_citations_kg(
+        args.arxiv_id,
+        top_n=args.top,
+        run_llm=args.llm,
+        max_scan=args.max_scan,
+        rich_fields=args.rich_fields,
+        llm_workers=args.llm_workers,
+        llm_pack=args.llm_pack,
+        gazetteer=load_gazetteer(args.gazetteer) if args.gazetteer is not None else None,
+        gazetteer_min=args.gazetteer_min,
+        stream=args.stream,
+    )
+    print_s2_cache_stats()
+    print_llm_cache_stats()
+    print_corpus_store_stats()
+    report_llm_metrics()
+    print(f"[*] [S2 限流] {get_s2_limiter().describe()}")
+    if args.llm:
+        for limiter in get_llm_limiters():
+            print(f"[*] [LLM 限流] {limiter.describe()}")
+    if get_transport().mode != "live" or get_transport().injected_429:
+        print(f"[*] [传输层] {get_transport().describe()}")
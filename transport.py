@@ -0,0 +1,240 @@
+"""
+可插拔的外部调用传输层：所有 arXiv / Semantic Scholar / LLM 调用都经过这里。
+
+模式（环境变量 KG_TRANSPORT 或 configure_transport）：
+  live    直接访问真实服务（默认）
+  record  访问真实服务，并把响应写入夹具目录
+  replay  只从夹具目录读取响应，不访问网络；缺夹具时抛 FixtureMissing
+
+夹具按 (类别, 规范化请求) 的哈希存放在 KG_FIXTURES 目录（默认 fixtures/）下：
+  fixtures/s2/<hash>.json、fixtures/arxiv/<hash>.json、fixtures/llm/<hash>.json
+
+故障注入（任何模式下均生效，便于离线压测重试与限流逻辑）：
+  KG_LATENCY  每次调用前注入的延迟秒数，如 "0.2" 或区间 "0.1-0.5"
+  KG_FAULTS   429 注入规则，逗号分隔：every=N（每第 N 次调用）、p=0.1（概率）、retry_after=1
+  KG_FAULT_SEED  概率注入的随机种子（默认 0，保证可复现）
+HTTP 调用注入的 429 表现为状态码 429 + Retry-After；arXiv / LLM 调用注入时抛 TransportRateLimited。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+
+from api_cache import normalize_s2_url
+from text_utils import parse_latency
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MODES = ("live", "record", "replay")
+
+
+class FixtureMissing(RuntimeError):
+    """replay 模式下请求没有对应夹具。"""
+
+
+class TransportRateLimited(RuntimeError):
+    """注入的 429（用于 arXiv / LLM 这类非 HTTP 层调用）。"""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"injected 429 (retry_after={retry_after})")
+        self.retry_after = retry_after
+
+
+class TransportResponse:
+    """与 requests.Response 用法相近的最小响应对象。"""
+
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+def _parse_faults(spec):
+    faults = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        k, v = part.split("=", 1)
+        try:
+            faults[k.strip()] = float(v)
+        except ValueError:
+            continue
+    return faults
+
+
+class Transport:
+    def __init__(self, mode="live", fixture_dir=None, latency=None, faults=None, seed=0):
+        if mode not in MODES:
+            raise ValueError(f"unknown transport mode: {mode}")
+        self.mode = mode
+        self.fixture_dir = fixture_dir or DEFAULT_FIXTURE_DIR
+        self.latency = latency
+        self.faults = faults or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # 计数器与随机数在线程池 / 协程并发调用时共用
+        self.calls = 0
+        self.injected_429 = 0
+        self.replayed = 0
+        self.recorded = 0
+
+    # ---------- 夹具 ----------
+
+    def _fixture_path(self, kind, key):
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return os.path.join(self.fixture_dir, kind, f"{digest}.json")
+
+    def _load(self, kind, key):
+        path = self._fixture_path(kind, key)
+        if not os.path.exists(path):
+            raise FixtureMissing(f"[{kind}] 无夹具: {json.dumps(key, ensure_ascii=False)[:200]}")
+        with open(path, "r", encoding="utf-8") as f:
+            response = json.load(f)["response"]
+        with self._lock:
+            self.replayed += 1
+        return response
+
+    def _save(self, kind, key, response):
+        path = self._fixture_path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"  # 并发录制同一请求时各写各的临时文件
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"request": key, "response": response}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        with self._lock:
+            self.recorded += 1
+
+    # ---------- 故障注入 ----------
+
+    def _next_delay_and_fault(self):
+        """返回 (注入延迟秒数, 是否注入 429)。"""
+        with self._lock:
+            self.calls += 1
+            delay = self._rng.uniform(*self.latency) if self.latency else 0.0
+            every = int(self.faults.get("every") or 0)
+            p = self.faults.get("p") or 0.0
+            fault = bool(every and self.calls % every == 0) or bool(p and self._rng.random() < p)
+            if fault:
+                self.injected_429 += 1
+            return delay, fault
+
+    def _retry_after(self):
+        return self.faults.get("retry_after")
+
+    def _rate_limited_response(self):
+        ra = self._retry_after()
+        return TransportResponse(429, {"Retry-After": str(ra)} if ra is not None else {}, None)
+
+    # ---------- HTTP（S2） ----------
+
+    @staticmethod
+    def _http_key(method, url, json_body):
+        return {"method": method, "url": normalize_s2_url(url), "json": json_body}
+
+    def http_request(self, method, url, json_body=None, headers=None, timeout=20):
+        delay, fault = self._next_delay_and_fault()
+        if delay:
+            time.sleep(delay)
+        if fault:
+            return self._rate_limited_response()
+        key = self._http_key(method, url, json_body)
+        if self.mode == "replay":
+            return TransportResponse(**self._load("s2", key))
+        if method == "POST":
+            r = requests.post(url, json=json_body, headers=headers, timeout=timeout)
+        else:
+            r = requests.get(url, headers=headers, timeout=timeout)
+        resp = TransportResponse(r.status_code, r.headers, r.json() if r.status_code == 200 else None)
+        if self.mode == "record" and r.status_code in (200, 404):
+            self._save("s2", key, {"status_code": resp.status_code, "headers": {}, "body": resp.body})
+        return resp
+
+    async def http_request_async(self, session, method, url, json_body=None, headers=None, timeout=None):
+        """http_request 的异步版本，session 为 aiohttp.ClientSession。"""
+        delay, fault = self._next_delay_and_fault()
+        if delay:
+            await asyncio.sleep(delay)
+        if fault:
+            return self._rate_limited_response()
+        key = self._http_key(method, url, json_body)
+        if self.mode == "replay":
+            return TransportResponse(**self._load("s2", key))
+        if method == "POST":
+            r = await session.post(url, json=json_body, headers=headers, timeout=timeout)
+        else:
+            r = await session.get(url, headers=headers, timeout=timeout)
+        async with r:
+            body = await r.json(content_type=None) if r.status == 200 else None
+            resp = TransportResponse(r.status, r.headers, body)
+        if self.mode == "record" and resp.status_code in (200, 404):
+            self._save("s2", key, {"status_code": resp.status_code, "headers": {}, "body": resp.body})
+        return resp
+
+    # ---------- 通用调用（arXiv、LLM） ----------
+
+    def call(self, kind, key, fn):
+        """
+        执行一次可录制的调用：live 直接调用 fn()；record 调用后保存结果；replay 直接返回已保存结果。
+        fn 的返回值须可 JSON 序列化。注入 429 时抛 TransportRateLimited。
+        """
+        delay, fault = self._next_delay_and_fault()
+        if delay:
+            time.sleep(delay)
+        if fault:
+            raise TransportRateLimited(self._retry_after())
+        if self.mode == "replay":
+            return self._load(kind, key)
+        result = fn()
+        if self.mode == "record":
+            self._save(kind, key, result)
+        return result
+
+    def describe(self):
+        return (
+            f"模式 {self.mode}，调用 {self.calls} 次，回放 {self.replayed}，录制 {self.recorded}，"
+            f"注入 429 {self.injected_429} 次"
+        )
+
+
+_transport = None
+
+
+def configure_transport(mode=None, fixture_dir=None, latency=None, faults=None, seed=None):
+    """显式配置传输层；未给出的参数取环境变量（KG_TRANSPORT 等）。"""
+    global _transport
+    _transport = Transport(
+        mode=mode or os.environ.get("KG_TRANSPORT", "live"),
+        fixture_dir=fixture_dir or os.environ.get("KG_FIXTURES") or None,
+        latency=latency if latency is not None else parse_latency(os.environ.get("KG_LATENCY")),
+        faults=faults if faults is not None else _parse_faults(os.environ.get("KG_FAULTS")),
+        seed=seed if seed is not None else int(os.environ.get("KG_FAULT_SEED", "0") or 0),
+    )
+    return _transport
+
+
+def get_transport():
+    """返回进程内共享的传输层（首次调用时按环境变量创建）。"""
+    if _transport is None:
+        configure_transport()
+    return _transport
+
+
+def http_request(method, url, json_body=None, headers=None, timeout=20):
+    return get_transport().http_request(method, url, json_body=json_body, headers=headers, timeout=timeout)
+
+
+async def http_request_async(session, method, url, json_body=None, headers=None, timeout=None):
+    return await get_transport().http_request_async(
+        session, method, url, json_body=json_body, headers=headers, timeout=timeout
+    )
+
+
+def call_recorded(kind, key, fn):
+    return get_transport().call(kind, key, fn)
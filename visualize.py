@@ -3,27 +3,40 @@ import json
 import os
 
 from class_schema import get_all_type_names, normalize_entity_type, get_categories_for_entities
+from kg_analytics import symbol_size
+from kg_community import collapse_communities, community_color
+from kg_stream import is_kg_stream, open_kg, spool_json_array, write_spliced
 
 # ================= 配置区域 =================
 INPUT_FILE = "final_kg_5_papers.json"
 OUTPUT_FILE = "knowledge_graph.html"
 # ===========================================
 ALLOWED_TYPES = get_all_type_names()
+NODES_PLACEHOLDER = "\x00graph-nodes\x00"
+LINKS_PLACEHOLDER = "\x00graph-links\x00"
 
 
-def generate_html(json_file, output_file=None):
+def generate_html(json_file, output_file=None, collapse=False):
     """
     根据知识图谱 JSON 生成 ECharts 力导向图 HTML。
     增强版 V2：
     1. 复选框直接控制类别显示/隐藏 (Legend Toggle)。
     2. 搜索功能支持节点名与关系名，并在当前视野中高亮。
+    json_file 可为流式图谱（.kg.jsonl）：实体与三元组逐条读取，节点与连线逐条写出，
+    内存中只保留节点名集合（用于过滤连线）。
+    实体带 community 属性（kg_community 写入）时节点按社区着色；collapse 为 True 时每个社区折叠为一个节点。
     """
     if not os.path.exists(json_file):
         print(f"❌ 错误：找不到文件 {json_file}")
         return None
 
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if is_kg_stream(json_file):
+        data = open_kg(json_file)
+    else:
+        with open(json_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if collapse:
+        data = collapse_communities(data)
 
     paper_meta = data.get("paper_metadata", {})
     kg = data.get("knowledge_graph", {})
@@ -31,69 +44,75 @@ def generate_html(json_file, output_file=None):
     triples = kg.get("triples", [])
 
     # 1. 处理类别 (Categories)
-    raw_types = [e.get("type", "Thesis") for e in entities]
+    raw_types = dict.fromkeys(e.get("type", "Thesis") for e in entities)
     type_list = get_categories_for_entities(raw_types)
     category_map = {t: i for i, t in enumerate(type_list)}
     categories = [{"name": t} for t in type_list]
 
-    # 2. 处理节点 (Nodes)
-    name_to_entity = {}
-    for e in entities:
-        name = (e.get("name") or "").strip()
-        if name and name not in name_to_entity:
-            name_to_entity[name] = e
-    
-    echarts_nodes = []
-    seen_nodes = set()
-    for name, e in name_to_entity.items():
-        etype = normalize_entity_type(e.get("type", "Thesis"), allowed=ALLOWED_TYPES)
-        echarts_nodes.append({
-            "name": name,
-            "category": category_map.get(etype, 0),
-            "symbolSize": 50 if etype in ("Thesis", "Article", "CreativeWork") else 25,
-            "draggable": True,
-            "value": etype,
-            "label": {"show": True} 
-        })
-        seen_nodes.add(name)
-
     # 补充 Researcher 类别
     person_type = normalize_entity_type("Researcher", allowed=ALLOWED_TYPES)
     if person_type not in category_map:
         categories.append({"name": person_type})
         category_map[person_type] = len(categories) - 1
-    
-    # 补充作者节点
-    for author in paper_meta.get("authors", []):
-        author = (author or "").strip()
-        if author and author not in seen_nodes:
-            echarts_nodes.append({
-                "name": author,
-                "category": category_map[person_type],
-                "symbolSize": 20,
-                "value": person_type,
-            })
-            seen_nodes.add(author)
-
-    # 3. 处理连线 (Links)
-    echarts_links = []
-    title = paper_meta.get("title")
-    if title and title in seen_nodes:
+
+    seen_nodes = set()
+
+    # 2. 处理节点 (Nodes)：同名实体只保留第一次出现的
+    def iter_nodes():
+        for e in entities:
+            name = (e.get("name") or "").strip()
+            if not name or name in seen_nodes:
+                continue
+            etype = normalize_entity_type(e.get("type", "Thesis"), allowed=ALLOWED_TYPES)
+            seen_nodes.add(name)
+            node = {
+                "name": name,
+                "category": category_map.get(etype, 0),
+                "symbolSize": symbol_size(e, 50 if etype in ("Thesis", "Article", "CreativeWork") else 25),
+                "draggable": True,
+                "value": etype,
+                "label": {"show": True}
+            }
+            color = community_color(e)
+            if color:
+                node["itemStyle"] = {"color": color}
+            yield node
+
+        # 补充作者节点
         for author in paper_meta.get("authors", []):
-            if author and author in seen_nodes:
-                echarts_links.append({"source": author, "target": title, "value": "author"})
-
-    for t in triples:
-        head = (t.get("head") or t.get("subject") or "").strip()
-        tail = (t.get("tail") or t.get("object") or "").strip()
-        if head and tail and head in seen_nodes and tail in seen_nodes:
-            echarts_links.append({
-                "source": head,
-                "target": tail,
-                "value": t.get("relation", ""),
-            })
-
-    # 4. 生成 HTML 模板
+            author = (author or "").strip()
+            if author and author not in seen_nodes:
+                seen_nodes.add(author)
+                yield {
+                    "name": author,
+                    "category": category_map[person_type],
+                    "symbolSize": 20,
+                    "value": person_type,
+                }
+
+    # 3. 处理连线 (Links)：须在节点写完后遍历
+    def iter_links():
+        title = paper_meta.get("title")
+        if title and title in seen_nodes:
+            for author in paper_meta.get("authors", []):
+                if author and author in seen_nodes:
+                    yield {"source": author, "target": title, "value": "author"}
+
+        for t in triples:
+            head = (t.get("head") or t.get("subject") or "").strip()
+            tail = (t.get("tail") or t.get("object") or "").strip()
+            if head and tail and head in seen_nodes and tail in seen_nodes:
+                yield {
+                    "source": head,
+                    "target": tail,
+                    "value": t.get("relation", ""),
+                }
+
+    # 节点与连线先写入临时文件，得到数量后再拼进模板
+    nodes_buf, n_nodes = spool_json_array(iter_nodes())
+    links_buf, n_links = spool_json_array(iter_links())
+
+    # 4. 生成 HTML 模板（节点与连线处为占位符）
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -156,7 +175,7 @@ def generate_html(json_file, output_file=None):
         <div class="header">
             <h2>📄 {paper_meta.get('title', 'Paper KG')}</h2>
             <p><strong>Published:</strong> {paper_meta.get('published_date', '')}</p>
-            <p><strong>Entities:</strong> {len(echarts_nodes)} | <strong>Relations:</strong> {len(echarts_links)}</p>
+            <p><strong>Entities:</strong> {n_nodes} | <strong>Relations:</strong> {n_links}</p>
         </div>
 
         <div class="search-panel">
@@ -186,8 +205,8 @@ def generate_html(json_file, output_file=None):
             var chartDom = document.getElementById('main');
             var myChart = echarts.init(chartDom);
             
-            var graphNodes = {json.dumps(echarts_nodes)};
-            var graphLinks = {json.dumps(echarts_links)};
+            var graphNodes = {NODES_PLACEHOLDER};
+            var graphLinks = {LINKS_PLACEHOLDER};
             var graphCategories = {json.dumps(categories)};
 
             // 初始化所有类别为选中状态
@@ -397,8 +416,7 @@ def generate_html(json_file, output_file=None):
     """
 
     out_path = output_file or OUTPUT_FILE
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    write_spliced(out_path, html_content, [(NODES_PLACEHOLDER, nodes_buf), (LINKS_PLACEHOLDER, links_buf)])
     abs_path = os.path.abspath(out_path)
     print(f"✅ 最终版可视化生成成功！请在浏览器中打开: {abs_path}")
     return abs_path
@@ -408,5 +426,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="根据知识图谱 JSON 生成 ECharts 力导向图 HTML (含显隐控制与搜索)")
     parser.add_argument("json_file", nargs="?", default=INPUT_FILE, help=f"输入的 JSON 文件 (默认: {INPUT_FILE})")
     parser.add_argument("-o", "--output", default=OUTPUT_FILE, help=f"输出的 HTML 文件 (默认: {OUTPUT_FILE})")
+    parser.add_argument(
+        "--collapse-communities", action="store_true",
+        help="每个社区折叠为一个节点（需先用 kg_community.py 写入 community 属性；社区只按 cites / author_of 边划分，"
+        "模型、数据集等只经 LLM 三元组相连的节点没有 community，保持单独显示）",
+    )
     args = parser.parse_args()
-    generate_html(args.json_file, args.output)
\ No newline at end of file
+    generate_html(args.json_file, args.output, collapse=args.collapse_communities)
\ No newline at end of file